@@ -0,0 +1,471 @@
+"""
+Нагрузочный тест всех маршрутов приложения (src/urls.py) на локальном MongoDB.
+
+Заполняет отдельную БД (<MONGO_INITDB_DATABASE>_load) пользователями и постами, запускает приложение
+в том же процессе (либо обращается к уже запущенному по --base-url) и по очереди нагружает каждый маршрут
+заданным кол-вом одновременных клиентов. Для каждого маршрута выводятся p50/p95/p99 времени ответа,
+пропускная способность и кол-во команд MongoDB на запрос (по /metrics), результаты сохраняются в JSON.
+
+Зависимости нагрузочного теста: pip install -r benchmarks/requirements.txt
+
+Запуск из корня проекта (нужен .env и доступный MongoDB из DATABASE_URL):
+    python -m benchmarks.load --users 100000 --posts 1000000 --concurrency 64
+    python -m benchmarks.load --skip-seed --compare benchmarks/results/load-<commit>.json
+
+Без установленного MongoDB (CI) флаг --in-memory запускает временный mongod (pymongo_inmemory).
+При нагрузке уже запущенного сервера (--base-url) он должен использовать ту же БД (--db),
+а ограничение попыток входа (AUTH_THROTTLE_ENABLED) должно быть выключено. Выгрузка постов нагружается
+без ограничения частоты (EXPORT_THROTTLE_*) и с лимитом одновременных выгрузок (LIMIT_EXPORT_CONCURRENCY)
+не меньше --concurrency: иначе время ответа маршрута измеряет отказы 503, а не выгрузки.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+
+_PASSWORD = 'load-test-password'
+_WORDS = (
+    'mongo', 'python', 'fastapi', 'index', 'cursor', 'query', 'cache', 'latency', 'worker', 'backend',
+    'search', 'author', 'feed', 'token', 'shard', 'replica', 'pipeline', 'lookup', 'schema', 'deploy',
+)
+_SEED_BATCH = 10000
+_SAMPLE_IDS = 10000
+_METRIC_MONGO_OPS = re.compile(r'^mongo_command_duration_seconds_count\{[^}]*\} ([0-9.e+]+)$', re.MULTILINE)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Нагрузочный тест маршрутов приложения')
+    parser.add_argument('--users', type=int, default=1000, help='кол-во пользователей в БД')
+    parser.add_argument('--posts', type=int, default=10000, help='кол-во постов в БД')
+    parser.add_argument('--concurrency', type=int, default=16, help='кол-во одновременных клиентов')
+    parser.add_argument('--requests', type=int, default=200, help='кол-во запросов к каждому маршруту')
+    parser.add_argument('--db', default=None, help='название БД (по умолчанию <MONGO_INITDB_DATABASE>_load)')
+    parser.add_argument('--skip-seed', action='store_true', help='не заполнять БД (использовать заполненную ранее)')
+    parser.add_argument('--in-memory', action='store_true', help='временный mongod вместо DATABASE_URL')
+    parser.add_argument('--base-url', default=None, help='адрес запущенного сервера (по умолчанию - в процессе)')
+    parser.add_argument('--routes', default=None, help='регулярное выражение для выбора маршрутов')
+    parser.add_argument('--output', default=None, help='файл результатов (по умолчанию benchmarks/results/)')
+    parser.add_argument('--compare', default=None, help='файл результатов для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.2, help='допустимый рост p95 при сравнении (доля)')
+
+    return parser.parse_args()
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Перцентиль q (0..100) отсортированного списка значений (линейная интерполяция)
+    """
+    if not values:
+        return 0.0
+
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+async def seed(db, users_count: int, posts_count: int) -> None:
+    """
+    Заполнение БД пользователями (с одинаковым известным паролем) и постами, создание индексов
+    """
+    from src.indexes import ensure_indexes
+    from src.utils.password import pwd_context
+
+    await db.users.drop()
+    await db.posts.drop()
+
+    now = datetime.utcnow().replace(microsecond=0)
+    password_hash = pwd_context.hash(_PASSWORD)  # Один хэш на всех: bcrypt для каждого пользователя слишком долог
+    user_ids = []
+
+    for start in range(0, users_count, _SEED_BATCH):
+        users = [
+            {
+                'name': f'user {number}',
+                'email': f'user{number}@load.example.com',
+                'photo': None,
+                'role': 'user',
+                'verified': True,
+                'password': password_hash,
+                'created_at': now,
+                'updated_at': now,
+            }
+            for number in range(start, min(start + _SEED_BATCH, users_count))
+        ]
+        result = await db.users.insert_many(users, ordered=False)
+        user_ids += result.inserted_ids
+
+    for start in range(0, posts_count, _SEED_BATCH):
+        posts = [
+            {
+                'title': ' '.join(random.choices(_WORDS, k=4)),
+                'content': ' '.join(random.choices(_WORDS, k=60)),
+                'category': f'category {number % 20}',
+                'image': None,
+                'user': user_ids[number % len(user_ids)],
+                'created_at': now - timedelta(seconds=number),
+                'updated_at': now - timedelta(seconds=number),
+            }
+            for number in range(start, min(start + _SEED_BATCH, posts_count))
+        ]
+        await db.posts.insert_many(posts, ordered=False)
+        print(f'\rПостов добавлено: {min(start + _SEED_BATCH, posts_count)}/{posts_count}', end='', flush=True)
+
+    print()
+    await ensure_indexes(db)
+
+
+class VirtualUser:
+    """
+    Клиент нагрузочного теста: авторизованный пользователь со своими куками и созданными постами
+    """
+
+    def __init__(self, client, email: str):
+        self.client = client
+        self.email = email
+        self.post_ids: List[str] = []
+
+    async def login(self) -> None:
+        response = await self.client.post('/api/v1/auth/login', json={'email': self.email, 'password': _PASSWORD})
+        response.raise_for_status()
+
+
+class Context:
+    """
+    Общие данные сценариев: id постов из БД, счетчик уникальных значений
+    """
+
+    def __init__(self, post_ids: List[str]):
+        self.post_ids = post_ids
+        self.run_id = os.urandom(4).hex()
+        self.counter = 0
+
+    def unique(self) -> int:
+        self.counter += 1
+        return self.counter
+
+
+def _post_body() -> Dict:
+    return {
+        'title': ' '.join(random.choices(_WORDS, k=4)),
+        'content': ' '.join(random.choices(_WORDS, k=60)),
+        'category': 'category load',
+    }
+
+
+def _own_post(vu: VirtualUser) -> str:
+    return random.choice(vu.post_ids) if vu.post_ids else '000000000000000000000000'
+
+
+def _pop_own_post(vu: VirtualUser) -> str:
+    return vu.post_ids.pop() if vu.post_ids else '000000000000000000000000'
+
+
+# Сценарии: (метод, шаблон маршрута, функция запроса). Порядок важен: записи, созданные одними сценариями,
+# используются следующими (чтение, изменение и удаление своих постов), выход из системы выполняется последним
+Request = Tuple[str, str, Dict]
+SCENARIOS: List[Tuple[str, str, Callable[[VirtualUser, Context], Request]]] = [
+    ('GET', '/healthz', lambda vu, ctx: ('GET', '/healthz', {})),
+    ('GET', '/readyz', lambda vu, ctx: ('GET', '/readyz', {})),
+    ('GET', '/api/v1/posts', lambda vu, ctx: (
+        'GET', '/api/v1/posts',
+        {'params': {'page': random.randint(1, 20), 'limit': 10}}
+        if random.random() < 0.8 else {'params': {'search': random.choice(_WORDS), 'limit': 10}}
+    )),
+    ('GET', '/api/v1/posts/{post_id}', lambda vu, ctx: ('GET', f'/api/v1/posts/{random.choice(ctx.post_ids)}', {})),
+    ('GET', '/api/v1/posts/export', lambda vu, ctx: ('GET', '/api/v1/posts/export', {})),
+    ('POST', '/api/v1/auth/register', lambda vu, ctx: (
+        'POST', '/api/v1/auth/register',
+        {'json': {
+            'name': 'load user',
+            'email': f'register-{ctx.run_id}-{ctx.unique()}@load.example.com',
+            'password': _PASSWORD,
+            'password_confirm': _PASSWORD,
+        }}
+    )),
+    ('POST', '/api/v1/auth/login', lambda vu, ctx: (
+        'POST', '/api/v1/auth/login', {'json': {'email': vu.email, 'password': _PASSWORD}}
+    )),
+    ('GET', '/api/v1/auth/refresh', lambda vu, ctx: ('GET', '/api/v1/auth/refresh', {})),
+    ('GET', '/api/v1/users/me', lambda vu, ctx: ('GET', '/api/v1/users/me', {})),
+    ('POST', '/api/v1/author/posts', lambda vu, ctx: ('POST', '/api/v1/author/posts', {'json': _post_body()})),
+    ('GET', '/api/v1/author/posts', lambda vu, ctx: (
+        'GET', '/api/v1/author/posts', {'params': {'page': 1, 'limit': 10}}
+    )),
+    ('GET', '/api/v1/author/posts/{post_id}', lambda vu, ctx: (
+        'GET', f'/api/v1/author/posts/{_own_post(vu)}', {}
+    )),
+    ('PATCH', '/api/v1/author/posts/{post_id}', lambda vu, ctx: (
+        'PATCH', f'/api/v1/author/posts/{_own_post(vu)}', {'json': {'title': 'updated by load test'}}
+    )),
+    ('POST', '/api/v1/author/posts/bulk', lambda vu, ctx: (
+        'POST', '/api/v1/author/posts/bulk', {'json': {'posts': [_post_body() for _ in range(10)]}}
+    )),
+    ('PATCH', '/api/v1/author/posts/bulk', lambda vu, ctx: (
+        'PATCH', '/api/v1/author/posts/bulk',
+        {'json': {'posts': [{'id': _own_post(vu), 'category': 'category bulk'} for _ in range(10)]}}
+    )),
+    ('DELETE', '/api/v1/author/posts/bulk', lambda vu, ctx: (
+        'DELETE', '/api/v1/author/posts/bulk', {'json': {'ids': [_pop_own_post(vu) for _ in range(5)]}}
+    )),
+    ('DELETE', '/api/v1/author/posts/{post_id}', lambda vu, ctx: (
+        'DELETE', f'/api/v1/author/posts/{_pop_own_post(vu)}', {}
+    )),
+    ('GET', '/metrics', lambda vu, ctx: ('GET', '/metrics', {})),
+    ('GET', '/api/v1/auth/logout', lambda vu, ctx: ('GET', '/api/v1/auth/logout', {})),
+]
+
+
+def _remember_created(vu: VirtualUser, method: str, url: str, response) -> None:
+    """
+    Сохранение id постов, созданных клиентом (для сценариев чтения, изменения и удаления своих постов)
+    """
+    if method != 'POST' or not url.startswith('/api/v1/author/posts') or response.status_code not in (200, 201):
+        return
+
+    data = response.json()
+
+    # Добавление одной записи возвращает запись, пакетное - результат по каждой записи
+    if 'id' in data:
+        vu.post_ids.append(data['id'])
+
+    elif isinstance(data.get('results'), list):
+        vu.post_ids += [item['id'] for item in data['results'] if item.get('status') == 'created']
+
+
+async def mongo_ops(client) -> float:
+    """
+    Общее кол-во выполненных команд MongoDB по /metrics
+    """
+    response = await client.get('/metrics')
+
+    return sum(float(value) for value in _METRIC_MONGO_OPS.findall(response.text))
+
+
+async def run_scenario(
+        vus: List[VirtualUser],
+        ctx: Context,
+        make_request: Callable[[VirtualUser, Context], Request],
+        total: int,
+        logout: bool
+) -> Dict:
+    """
+    Выполнение total запросов сценария всеми клиентами одновременно
+    :return: статистика сценария
+    """
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    remaining = [total]
+
+    async def worker(vu: VirtualUser) -> None:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+
+            # Выход из системы отзывает токены - перед каждым запросом клиент входит заново (вне замера)
+            if logout:
+                await vu.login()
+
+            method, url, kwargs = make_request(vu, ctx)
+            started_at = time.perf_counter()
+            response = await vu.client.request(method, url, **kwargs)
+            await response.aread()
+            latencies.append((time.perf_counter() - started_at) * 1000)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            _remember_created(vu, method, url, response)
+
+    ops_before = await mongo_ops(vus[0].client)
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker(vu) for vu in vus))
+    elapsed = time.perf_counter() - started_at
+    ops_after = await mongo_ops(vus[0].client)
+
+    latencies.sort()
+
+    return {
+        'requests': len(latencies),
+        'statuses': statuses,
+        'errors': sum(count for status, count in statuses.items() if not status.startswith(('2', '3'))),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        # Для сценария выхода учитываются и команды повторного входа перед каждым запросом
+        'mongo_ops_per_request': round((ops_after - ops_before) / len(latencies), 2) if latencies else 0.0,
+    }
+
+
+def check_coverage(app) -> List[str]:
+    """
+    Маршруты приложения, для которых нет сценария
+    """
+    from fastapi.routing import APIRoute
+
+    covered = {(method, path) for method, path, _ in SCENARIOS}
+    missing = []
+
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            for method in route.methods:
+                if (method, route.path) not in covered:
+                    missing.append(f'{method} {route.path}')
+
+    return missing
+
+
+def compare(results: Dict, baseline_path: str, threshold: float) -> List[str]:
+    """
+    Маршруты, у которых p95 вырос больше допустимого по сравнению с сохраненными результатами
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    regressions = []
+
+    for route, stats in results['routes'].items():
+        previous = baseline['routes'].get(route)
+
+        if previous and previous['p95_ms'] and stats['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f"{route}: p95 {previous['p95_ms']} -> {stats['p95_ms']} мс")
+
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    import httpx
+
+    async with AsyncExitStack() as stack:
+        if args.in_memory:
+            from pymongo_inmemory import Mongod
+
+            mongod = stack.enter_context(Mongod())
+            os.environ['DATABASE_URL'] = mongod.connection_string
+
+        # Настройки читаются при импорте приложения, поэтому переопределяются до него
+        from src.config import settings
+
+        database = args.db or f'{settings.MONGO_INITDB_DATABASE}_load'
+        os.environ['MONGO_INITDB_DATABASE'] = database
+        os.environ['AUTH_THROTTLE_ENABLED'] = 'false'
+        settings.MONGO_INITDB_DATABASE = database
+        settings.DATABASE_URL = os.environ.get('DATABASE_URL', settings.DATABASE_URL)
+        settings.AUTH_THROTTLE_ENABLED = False
+        settings.EXPORT_THROTTLE_CAPACITY = sys.maxsize
+        settings.LIMIT_EXPORT_CONCURRENCY = max(settings.LIMIT_EXPORT_CONCURRENCY, args.concurrency)
+
+        from motor import motor_asyncio
+
+        from src.main import app
+
+        seed_client = motor_asyncio.AsyncIOMotorClient(settings.DATABASE_URL)
+        db = seed_client[database]
+
+        if not args.skip_seed:
+            print(f'Заполнение БД {database}: {args.users} пользователей, {args.posts} постов')
+            await seed(db=db, users_count=args.users, posts_count=args.posts)
+
+        post_ids = [str(post['_id']) for post in await db.posts.aggregate(
+            [{'$sample': {'size': _SAMPLE_IDS}}, {'$project': {'_id': 1}}]
+        ).to_list(length=None)]
+        users_count = await db.users.count_documents({'email': {'$regex': r'^user\d+@load\.example\.com$'}})
+        seed_client.close()
+
+        if not users_count:
+            print(f'В БД {database} нет пользователей нагрузочного теста: запустите тест без --skip-seed')
+            return 1
+
+        if args.base_url:
+            transport, base_url = None, args.base_url
+        else:
+            # Приложение в том же процессе (с запуском и остановкой lifespan)
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport, base_url = httpx.ASGITransport(app=app), 'http://load.test'
+
+        for route in check_coverage(app):
+            print(f'Нет сценария для маршрута {route}')
+
+        vus = []
+
+        for number in range(args.concurrency):
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60)
+            )
+            vu = VirtualUser(client=client, email=f'user{number % users_count}@load.example.com')
+            await vu.login()
+            vus.append(vu)
+
+        ctx = Context(post_ids=post_ids)
+        route_filter = re.compile(args.routes) if args.routes else None
+        results = {
+            'meta': {
+                'commit': git_commit(),
+                'date': datetime.utcnow().isoformat(),
+                'python': platform.python_version(),
+                'base_url': args.base_url or 'in-process',
+                'users': args.users,
+                'posts': args.posts,
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+            },
+            'routes': {},
+        }
+
+        print(f'{"маршрут":<46} {"p50":>8} {"p95":>8} {"p99":>8} {"rps":>8} {"ops":>6} {"ошибки":>7}')
+
+        for method, path, make_request in SCENARIOS:
+            name = f'{method} {path}'
+
+            if route_filter and not route_filter.search(name):
+                continue
+
+            stats = await run_scenario(
+                vus=vus, ctx=ctx, make_request=make_request, total=args.requests, logout=path.endswith('/logout')
+            )
+            results['routes'][name] = stats
+
+            print(
+                f'{name:<46} {stats["p50_ms"]:>8.2f} {stats["p95_ms"]:>8.2f} {stats["p99_ms"]:>8.2f} '
+                f'{stats["throughput_rps"]:>8.1f} {stats["mongo_ops_per_request"]:>6.1f} {stats["errors"]:>7}'
+            )
+
+    output = args.output or os.path.join('benchmarks', 'results', f'load-{results["meta"]["commit"]}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+    with open(output, 'w') as output_file:
+        json.dump(results, output_file, ensure_ascii=False, indent=2)
+
+    print(f'Результаты сохранены: {output}')
+
+    if args.compare:
+        regressions = compare(results=results, baseline_path=args.compare, threshold=args.threshold)
+
+        for regression in regressions:
+            print(f'Регрессия {regression}')
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,212 @@
+"""
+Микробенчмарки горячих участков без ввода-вывода: сериализаторы постов, валидация схемы ленты,
+валидаторы дат (DatetimeFormatterMixin), создание токенов (SetTokenUtils) и проверка пароля.
+
+Для каждого случая выводится время на одну запись (мкс) - медиана нескольких замеров.
+Результаты сравниваются с сохраненными (benchmarks/baseline.json): если какой-либо случай стал медленнее
+больше чем на --threshold, бенчмарк завершается с кодом 1. Базовые значения зависят от машины,
+поэтому записываются на той же машине, где выполняется проверка (например, в CI перед изменениями).
+
+Запуск из корня проекта (нужен .env):
+    python -m benchmarks.micro --save-baseline
+    python -m benchmarks.micro
+    python -m benchmarks.micro --cases post_entity verify_password
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from bson import ObjectId
+from fastapi import Response
+from fastapi_jwt_auth import AuthJWT
+
+import src.oauth2  # noqa: F401 (настройки AuthJWT)
+from benchmarks.serializers import make_posts
+from src.config import settings
+from src.schemas.mixin import DatetimeFormatterMixin
+from src.schemas.post import ListPostWithAuthorsResponse
+from src.serializers.post import populated_post_entity, post_entity, post_list_all_entity
+from src.utils.password import pwd_context, verify_password
+from src.utils.token import SetTokenUtils
+
+
+_BASELINE_PATH = os.path.join('benchmarks', 'baseline.json')
+_SIZES = (10, 100, 1000)
+_REPEATS = 5
+_MIN_SECONDS = 0.2
+_PASSWORD = 'benchmark-password'
+
+_loop = asyncio.new_event_loop()
+
+# Случай: (название, размер, функция одного прохода по записям размера)
+Case = Tuple[str, int, Callable[[], None]]
+
+
+def make_raw_posts(count: int) -> List[Dict]:
+    """
+    Документы постов без данных автора (id автора), как в коллекции posts
+    """
+    return [dict(post, user=post['user']['_id']) for post in make_posts(count)]
+
+
+def serializer_cases() -> List[Case]:
+    cases = []
+
+    for size in _SIZES:
+        raw_posts = make_raw_posts(size)
+        populated_posts = make_posts(size)
+
+        cases += [
+            ('post_entity', size, lambda posts=raw_posts: [post_entity(post) for post in posts]),
+            ('populated_post_entity', size,
+             lambda posts=populated_posts: [populated_post_entity(post) for post in posts]),
+            ('post_list_all_entity', size, lambda posts=populated_posts: post_list_all_entity(posts)),
+        ]
+
+    return cases
+
+
+def schema_cases() -> List[Case]:
+    cases = []
+    now = datetime.utcnow()
+
+    for size in _SIZES:
+        items = post_list_all_entity(make_posts(size))
+        content = {'status': 'success', 'results': len(items), 'posts': items}
+
+        cases += [
+            ('ListPostWithAuthorsResponse', size, lambda content=content: ListPostWithAuthorsResponse(**content)),
+            ('DatetimeFormatterMixin', size,
+             lambda size=size: [DatetimeFormatterMixin(created_at=now, updated_at=now) for _ in range(size)]),
+        ]
+
+    return cases
+
+
+def token_cases() -> List[Case]:
+    """
+    Создание токенов доступа и обновления с записью в куки ответа (как при входе)
+    """
+    user_id = str(ObjectId())
+    claims = {'verified': True, 'role': 'user'}
+
+    async def login_tokens(count: int) -> None:
+        for _ in range(count):
+            response = Response()
+            authorize = AuthJWT()
+            await SetTokenUtils.access(response=response, user_id=user_id, Authorize=authorize, claims=claims)
+            await SetTokenUtils.refresh(response=response, user_id=user_id, Authorize=authorize)
+            await SetTokenUtils.logged(response=response)
+
+    return [
+        ('SetTokenUtils', size, lambda size=size: _loop.run_until_complete(login_tokens(size)))
+        for size in (1, 100)
+    ]
+
+
+def password_cases() -> List[Case]:
+    """
+    Проверка пароля: одиночная и одновременная (по числу потоков хэширования)
+    """
+    hashed_password = pwd_context.hash(_PASSWORD)
+
+    async def verify(count: int) -> None:
+        await asyncio.gather(*(verify_password(_PASSWORD, hashed_password) for _ in range(count)))
+
+    return [
+        ('verify_password', size, lambda size=size: _loop.run_until_complete(verify(size)))
+        for size in sorted({1, settings.PASSWORD_HASH_WORKERS})
+    ]
+
+
+def per_item_microseconds(func: Callable[[], None], size: int) -> float:
+    """
+    Время обработки одной записи (мкс): медиана _REPEATS замеров длительностью не меньше _MIN_SECONDS
+    """
+    results = []
+
+    for _ in range(_REPEATS):
+        rounds = 0
+        started_at = time.perf_counter()
+
+        while time.perf_counter() - started_at < _MIN_SECONDS:
+            func()
+            rounds += 1
+
+        results.append((time.perf_counter() - started_at) / rounds / size * 1_000_000)
+
+    return statistics.median(results)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Микробенчмарки сериализаторов, схем и токенов')
+    parser.add_argument('--baseline', default=_BASELINE_PATH, help='файл базовых значений')
+    parser.add_argument('--save-baseline', action='store_true', help='записать результаты как базовые значения')
+    parser.add_argument('--threshold', type=float, default=0.25, help='допустимое замедление (доля)')
+    parser.add_argument('--cases', nargs='*', default=None, help='названия случаев (по умолчанию - все)')
+
+    return parser.parse_args()
+
+
+def main(args: argparse.Namespace) -> int:
+    cases = serializer_cases() + schema_cases() + token_cases() + password_cases()
+
+    if args.cases:
+        cases = [case for case in cases if case[0] in args.cases]
+
+    baseline = {}
+
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = {}
+    regressions = []
+
+    print(f'{"случай":<30} {"записей":>8} {"мкс":>12} {"база, мкс":>12} {"изменение":>10}')
+
+    for name, size, func in cases:
+        key = f'{name}[{size}]'
+        cost = per_item_microseconds(func, size)
+        results[key] = round(cost, 3)
+        previous = baseline.get(key)
+
+        if previous:
+            change = cost / previous - 1
+            print(f'{name:<30} {size:>8} {cost:>12.2f} {previous:>12.2f} {change:>+9.0%}')
+
+            if change > args.threshold:
+                regressions.append(f'{key}: {previous:.2f} -> {cost:.2f} мкс')
+
+        else:
+            print(f'{name:<30} {size:>8} {cost:>12.2f} {"-":>12} {"-":>10}')
+
+    if args.save_baseline:
+        # Случаи, не вошедшие в запуск (--cases), сохраняют прежние значения
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                results = {**json.load(baseline_file), **results}
+
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+
+        print(f'Базовые значения сохранены: {args.baseline}')
+        return 0
+
+    if not baseline:
+        print(f'Нет базовых значений ({args.baseline}), сравнение не выполнялось')
+
+    for regression in regressions:
+        print(f'Регрессия {regression}')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(parse_args()))
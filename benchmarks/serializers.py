@@ -0,0 +1,118 @@
+"""
+Сравнение стоимости подготовки ответа со списком постов (на одну запись) для страниц из 10/100/1000 записей:
+    до  - асинхронные сериализаторы по одной записи + валидация схемой ответа + json
+    после - синхронная сериализация страницы за один проход + запись через orjson (FAST_JSON_RESPONSE)
+
+Запуск из корня проекта (нужен .env):
+    python -m benchmarks.serializers
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from src.schemas.post import ListPostWithAuthorsResponse
+from src.serializers.post import populated_post_entity, post_list_all_entity
+from src.utils.response import FastJSONResponse
+
+
+_SIZES = (10, 100, 1000)
+_MIN_SECONDS = 0.5
+
+_loop = asyncio.new_event_loop()
+
+
+def make_posts(count: int) -> List[Dict]:
+    """
+    Документы постов с данными автора в том виде, в котором их возвращает конвейер ленты
+    """
+    now = datetime.utcnow()
+    authors = [
+        {
+            '_id': ObjectId(),
+            'name': f'user {number}',
+            'email': f'user{number}@example.com',
+            'photo': None,
+            'role': 'user',
+            'created_at': now,
+            'updated_at': now,
+        }
+        for number in range(10)
+    ]
+
+    return [
+        {
+            '_id': ObjectId(),
+            'title': f'title {number}',
+            'content': 'content ' * 50,
+            'category': 'category',
+            'image': None,
+            'user': authors[number % len(authors)],
+            'created_at': now,
+            'updated_at': now,
+        }
+        for number in range(count)
+    ]
+
+
+async def _populated_post_entity_async(post) -> Dict:
+    """
+    Асинхронный сериализатор в прежнем виде (по одной записи)
+    """
+    return populated_post_entity(post)
+
+
+def before(posts: List[Dict]) -> bytes:
+    """
+    Прежний путь: await сериализатора для каждой записи, валидация response_model, json
+    """
+
+    async def serialize():
+        return [await _populated_post_entity_async(post) for post in posts]
+
+    items = _loop.run_until_complete(serialize())
+    content = {'status': 'success', 'results': len(items), 'posts': items}
+    response = ListPostWithAuthorsResponse(**content)
+
+    return json.dumps(jsonable_encoder(response)).encode('utf-8')
+
+
+def after(posts: List[Dict]) -> bytes:
+    """
+    Новый путь: синхронная сериализация страницы и запись через orjson без повторной валидации
+    """
+    items = post_list_all_entity(posts)
+    content = {'status': 'success', 'results': len(items), 'posts': items}
+
+    return FastJSONResponse(content=content).body
+
+
+def per_item_microseconds(func: Callable, posts: List[Dict]) -> float:
+    """
+    Среднее время обработки одной записи (мкс)
+    """
+    rounds = 0
+    started_at = time.perf_counter()
+
+    while time.perf_counter() - started_at < _MIN_SECONDS:
+        func(posts)
+        rounds += 1
+
+    elapsed = time.perf_counter() - started_at
+
+    return elapsed / rounds / len(posts) * 1_000_000
+
+
+if __name__ == '__main__':
+    print(f'{"записей":>8} {"до, мкс":>10} {"после, мкс":>11} {"ускорение":>10}')
+
+    for size in _SIZES:
+        page = make_posts(size)
+        before_cost = per_item_microseconds(before, page)
+        after_cost = per_item_microseconds(after, page)
+
+        print(f'{size:>8} {before_cost:>10.2f} {after_cost:>11.2f} {before_cost / after_cost:>9.1f}x')
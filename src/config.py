@@ -7,14 +7,82 @@ class Settings(BaseSettings):
     """
     DATABASE_URL: str
     MONGO_INITDB_DATABASE: str
+    CREATE_INDEXES_ON_STARTUP: bool = True  # False - индексы создаются заранее (python -m src.indexes)
+
+    # Настройки пула соединений с MongoDB (None - значение драйвера по умолчанию)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 10  # Соединения, открываемые при запуске (прогрев пула)
+    MONGO_MAX_IDLE_TIME_MS: int | None = 60000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: int | None = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int | None = None
+    MONGO_COMPRESSORS: str | None = None  # Например: zstd,snappy,zlib
+    MONGO_WRITE_CONCERN_W: str | None = None  # Подтверждение записи: кол-во узлов (1, 2, ...) либо majority
+    MONGO_WRITE_CONCERN_JOURNAL: bool | None = None  # Подтверждение записи после записи в журнал
+    MONGO_WRITE_CONCERN_TIMEOUT_MS: int | None = None  # Макс. время ожидания подтверждения записи
 
     JWT_PUBLIC_KEY: str
     JWT_PRIVATE_KEY: str
     REFRESH_TOKEN_EXPIRES_IN: int
     ACCESS_TOKEN_EXPIRES_IN: int
     JWT_ALGORITHM: str
+    AUTH_STATELESS: bool = False  # Проверка авторизации по данным токена доступа, без запроса пользователя из БД
+    REVOCATION_REFRESH_INTERVAL: int = 30  # Период обновления списка отозванных токенов из БД (сек)
+
+    PASSWORD_HASH_WORKERS: int = 4  # Кол-во потоков для хэширования и проверки паролей
+    PASSWORD_HASH_QUEUE_SIZE: int = 64  # Макс. кол-во ожидающих хэширования запросов (сверх - ответ 503)
+    LOAD_SHEDDING_ENABLED: bool = True  # Ограничение одновременно обрабатываемых запросов (сверх - ответ 503)
+    LIMIT_READ_CONCURRENCY: int = 200  # Макс. кол-во одновременных запросов на чтение (в одном процессе)
+    LIMIT_READ_QUEUE_SIZE: int = 400  # Макс. кол-во ожидающих запросов на чтение
+    LIMIT_WRITE_CONCURRENCY: int = 50  # Макс. кол-во одновременных запросов на запись
+    LIMIT_WRITE_QUEUE_SIZE: int = 100  # Макс. кол-во ожидающих запросов на запись
+    LIMIT_AUTH_CONCURRENCY: int = 20  # Макс. кол-во одновременных запросов авторизации и регистрации
+    LIMIT_AUTH_QUEUE_SIZE: int = 40  # Макс. кол-во ожидающих запросов авторизации и регистрации
+    LIMIT_EXPORT_CONCURRENCY: int = 2  # Макс. кол-во одновременных выгрузок постов (занимают курсор надолго)
+    LIMIT_EXPORT_QUEUE_SIZE: int = 0  # Макс. кол-во ожидающих выгрузок (0 - сверх лимита сразу ответ 503)
+    LIMIT_QUEUE_TIMEOUT_MS: int = 1000  # Макс. время ожидания запроса в очереди
+    LIMIT_RETRY_AFTER: int = 1  # Значение заголовка Retry-After при отказе (сек)
+    AUTH_THROTTLE_ENABLED: bool = True  # Ограничение частоты попыток входа и регистрации (сверх - ответ 429)
+    AUTH_THROTTLE_IP_CAPACITY: int = 20  # Допустимый всплеск попыток с одного IP-адреса
+    AUTH_THROTTLE_IP_PER_MINUTE: float = 10  # Восполнение попыток с одного IP-адреса в минуту
+    AUTH_THROTTLE_EMAIL_CAPACITY: int = 5  # Допустимый всплеск попыток для одного email с одного IP-адреса
+    AUTH_THROTTLE_EMAIL_PER_MINUTE: float = 2  # Восполнение попыток для одного email с одного IP-адреса в минуту
+    AUTH_THROTTLE_STORE: str | None = None  # Путь к классу общего хранилища счетчиков (None - в памяти процесса)
+    AUTH_THROTTLE_STORE_SIZE: int = 100000  # Макс. кол-во счетчиков в памяти процесса
 
     CLIENT_ORIGIN: str
+    FAST_JSON_RESPONSE: bool = False  # Вывод постов через orjson без повторной валидации схемой ответа
+
+    USER_CACHE_SIZE: int = 10000  # Макс. кол-во пользователей в кэше проверки авторизации
+    USER_CACHE_TTL: int = 60  # Срок жизни записи в кэше пользователей (сек)
+    POST_COUNT_CACHE_SIZE: int = 10000  # Макс. кол-во кэшированных счетчиков постов (общий и по авторам)
+    POST_COUNT_CACHE_TTL: int = 300  # Срок жизни кэшированного счетчика постов (сек)
+    FEED_CACHE_ENABLED: bool = True  # Кэширование ответов общей ленты постов
+    FEED_CACHE_SIZE: int = 1000  # Макс. кол-во страниц ленты в кэше (для хранилища в памяти)
+    FEED_CACHE_TTL: int = 5  # Срок, в течение которого страница ленты в кэше актуальна (сек)
+    FEED_CACHE_STALE_TTL: int = 30  # Срок, в течение которого устаревшая страница отдается с обновлением в фоне (сек)
+    FEED_CACHE_BACKEND: str | None = None  # Путь к классу общего хранилища кэша (None - в памяти процесса)
+    AUTHOR_BULK_MAX_SIZE: int = 100  # Макс. кол-во записей в одном пакетном запросе автора
+    SINGLE_FLIGHT_ENABLED: bool = True  # Объединение одинаковых одновременных запросов на чтение к БД
+    POST_AUTHOR_SNAPSHOT: bool = False  # Хранение копии данных автора в постах (чтение без $lookup в users)
+    AUTHOR_SNAPSHOT_REFRESH_INTERVAL: int = 60  # Периодичность проверки копий данных авторов, измененных в БД (сек)
+    POST_AUTHOR_LOADER: bool = False  # Данные авторов запрашиваются отдельно пачкой по $in вместо $lookup в users
+    METRICS_ENABLED: bool = True  # Сбор метрик времени обработки запросов (вывод - /metrics)
+    METRICS_MULTIPROC_DIR: str | None = None  # Общий каталог метрик нескольких workers (None - метрики процесса)
+    METRICS_FLUSH_INTERVAL: int = 5  # Периодичность записи метрик процесса в общий каталог (сек)
+    SLOW_QUERY_MS: int | None = 100  # Запросы из репозиториев дольше этого времени записываются в лог (None - выкл.)
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1  # Доля медленных запросов, для которых запрашивается план
+    SLOW_QUERY_EXPLAIN_INTERVAL: int = 60  # План запроса одной формы запрашивается не чаще раза в интервал (сек)
+    TRACE_SAMPLE_RATE: float = 0.0  # Доля запросов, трассы которых записываются (0 - трассировка выключена)
+    TRACE_EXPORT_PATH: str = 'traces.jsonl'  # Файл трасс (одна строка - одна трасса в формате OTLP/JSON)
+    TRACE_SERVICE_NAME: str = 'fastapi_mongodb'  # Название сервиса в трассах
+    # IP-адреса внутренних сервисов через запятую: запросы от них с флагом sampled в traceparent записываются
+    # всегда (для остальных запросов traceparent задает только родительский спан)
+    TRACE_TRUSTED_SOURCES: str | None = None
+    EXPORT_THROTTLE_CAPACITY: int = 3  # Допустимый всплеск выгрузок постов одним пользователем
+    EXPORT_THROTTLE_PER_MINUTE: float = 1  # Восполнение выгрузок одного пользователя в минуту
+    EXPORT_BATCH_SIZE: int = 1000  # Кол-во постов, читаемых из курсора за один раз при выгрузке
 
     class Config:
         env_file = './.env'
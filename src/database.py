@@ -1,22 +1,124 @@
-import pymongo
+import asyncio
+import time
+
 from motor import motor_asyncio
 
 from loguru import logger
 
 from src.config import settings
+from src.utils.monitoring import CommandMonitor, PoolMonitor
+from src.utils.slow_query import TRACKED_OPERATIONS, track
+
+
+class MongoDB:
+    """
+    Подключение к MongoDB: клиент создается при запуске приложения (lifespan) и закрывается при остановке
+    """
+
+    def __init__(self):
+        self.client: motor_asyncio.AsyncIOMotorClient | None = None
+        self.db: motor_asyncio.AsyncIOMotorDatabase | None = None
+        self.pool_monitor = PoolMonitor()
+        self.command_monitor = CommandMonitor()
+
+    async def connect(self) -> None:
+        """
+        Создание клиента с настройками пула из Settings и прогрев пула до приема запросов
+        """
+        options = {
+            'maxPoolSize': settings.MONGO_MAX_POOL_SIZE,
+            'minPoolSize': settings.MONGO_MIN_POOL_SIZE,
+            'maxIdleTimeMS': settings.MONGO_MAX_IDLE_TIME_MS,
+            'connectTimeoutMS': settings.MONGO_CONNECT_TIMEOUT_MS,
+            'serverSelectionTimeoutMS': settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            'socketTimeoutMS': settings.MONGO_SOCKET_TIMEOUT_MS,
+            'waitQueueTimeoutMS': settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            'compressors': settings.MONGO_COMPRESSORS,
+            'w': self.__write_concern_w(settings.MONGO_WRITE_CONCERN_W),
+            'journal': settings.MONGO_WRITE_CONCERN_JOURNAL,
+            'wTimeoutMS': settings.MONGO_WRITE_CONCERN_TIMEOUT_MS,
+        }
+
+        self.client = motor_asyncio.AsyncIOMotorClient(
+            settings.DATABASE_URL,
+            event_listeners=[self.pool_monitor, self.command_monitor],
+            **{name: value for name, value in options.items() if value is not None}
+        )
+        self.db = self.client[settings.MONGO_INITDB_DATABASE]
+
+        try:
+            await self.warmup()
+
+        except Exception:
+            logger.error('Не удается подключиться к MongoDB')
+            raise
+
+        logger.debug(f'Подключение к MongoDB, соединений в пуле: {self.pool_monitor.open}')
+
+    @staticmethod
+    def __write_concern_w(value: str | None) -> int | str | None:
+        """
+        Значение w для write concern: число узлов либо название режима (majority)
+        """
+        if value and value.isdigit():
+            return int(value)
+
+        return value
+
+    async def warmup(self) -> None:
+        """
+        Открытие соединений пула заранее: одновременные ping занимают minPoolSize соединений,
+        поэтому первые запросы не тратят время на установку соединения
+        """
+        connections = max(settings.MONGO_MIN_POOL_SIZE, 1)
+        await asyncio.gather(*(self.client.admin.command('ping') for _ in range(connections)))
+
+    async def ping(self) -> float:
+        """
+        Проверка доступности сервера
+        :return: время ответа (мс)
+        """
+        started_at = time.perf_counter()
+        await self.client.admin.command('ping')
+
+        return (time.perf_counter() - started_at) * 1000
+
+    def close(self) -> None:
+        """
+        Закрытие соединений пула
+        """
+        if self.client:
+            self.client.close()
+            self.client = None
+            self.db = None
+
+
+class Collection:
+    """
+    Коллекция подключенной БД: обращения перенаправляются в коллекцию клиента, созданного при запуске
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr: str):
+        if mongo.db is None:
+            raise RuntimeError('Нет подключения к MongoDB')
+
+        collection = mongo.db[self.name]
+        value = getattr(collection, attr)
+
+        # Операции с измерением времени: спаны трассировки, медленные запросы на чтение записываются в лог
+        if callable(value) and (
+                settings.TRACE_SAMPLE_RATE or (attr in TRACKED_OPERATIONS and settings.SLOW_QUERY_MS is not None)
+        ):
+            return track(collection=collection, operation=attr, method=value)
 
-# Асинхронное подключение к БД
-client = motor_asyncio.AsyncIOMotorClient(settings.DATABASE_URL)
+        return value
 
-try:
-    conn = client.server_info()
-    logger.debug('Подключение к MongoDB')
 
-except Exception:
-    logger.error('Не удается подключиться к MongoDB')
+mongo = MongoDB()
 
-db = client[settings.MONGO_INITDB_DATABASE]  # Создаем БД`
-User = db.users  #  Сздаем коллекцию (таблицу) users
-Post = db.posts  #  Сздаем коллекцию (таблицу) posts
-User.create_index([('email', pymongo.ASCENDING)])  # Индексируем поле email
-User.create_index([('title', pymongo.ASCENDING)])  # Индексируем поле email
+User = Collection('users')  # Коллекция (таблица) users
+Post = Collection('posts')  # Коллекция (таблица) posts
+RevokedToken = Collection('revoked_tokens')  # Коллекция отозванных токенов доступа (удаляются по TTL-индексу)
@@ -0,0 +1,154 @@
+"""
+Выгрузка постов в файл NDJSON (одна запись - одна строка JSON), при необходимости со сжатием gzip.
+
+Запуск (нужен доступный MongoDB из DATABASE_URL):
+    python -m src.export posts.ndjson
+    python -m src.export posts.ndjson.gz --user <id автора>
+
+После записи каждой пачки рядом с файлом сохраняется состояние (<файл>.state): токен продолжения
+(id последнего выгруженного поста) и размер файла. Прерванная выгрузка продолжается с флагом --resume:
+недописанный хвост файла отбрасывается, запись продолжается со следующего поста
+(если файл выгрузки удален или короче сохраненного размера, выгрузка завершается с ошибкой).
+Сжатый файл состоит из отдельного gzip-блока на каждую пачку (читается gzip/zcat как единый файл).
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+from typing import Dict, Optional
+
+from loguru import logger
+
+from src.database import mongo
+from src.services.export import ExportService
+from src.utils.exeptions import InvalidExportToken
+
+
+def _state_path(path: str) -> str:
+    return f'{path}.state'
+
+
+def _load_state(path: str) -> Optional[Dict]:
+    """
+    Состояние прерванной выгрузки (None, если выгрузка не начиналась)
+    """
+
+    if not os.path.exists(_state_path(path)):
+        return None
+
+    with open(_state_path(path)) as state_file:
+        return json.load(state_file)
+
+
+def _save_state(path: str, state: Dict) -> None:
+    """
+    Атомарная запись состояния выгрузки (через временный файл)
+    """
+
+    tmp_path = f'{_state_path(path)}.tmp'
+
+    with open(tmp_path, 'w') as state_file:
+        json.dump(state, state_file)
+
+    os.replace(tmp_path, _state_path(path))
+
+
+async def export_posts(
+        path: str,
+        user: Optional[str] = None,
+        resume: bool = False,
+        compress: bool = False,
+        batch_size: Optional[int] = None
+) -> int:
+    """
+    Выгрузка постов в файл
+    :param path: путь к файлу
+    :param user: id автора (None - посты всех авторов)
+    :param resume: продолжить прерванную выгрузку
+    :param compress: сжимать файл gzip
+    :param batch_size: кол-во постов в пачке
+    :return: кол-во выгруженных в этом запуске постов
+    """
+
+    state = _load_state(path) if resume else None
+
+    if state and state.get('user') != user:
+        raise InvalidExportToken('Прерванная выгрузка выполнялась для другого автора')
+
+    after = state['after'] if state else None
+    offset = state['offset'] if state else 0
+
+    user_id = ExportService.parse_id(value=user, name='user')
+    after_id = ExportService.parse_id(value=after, name='after')
+
+    # Файл короче сохраненного размера (удален или заменен) нельзя продолжить: дополнение до offset
+    # заполнило бы его нулевыми байтами перед продолжением выгрузки
+    if state and (not os.path.exists(path) or os.path.getsize(path) < offset):
+        raise InvalidExportToken(
+            f'Файл {path} отсутствует или короче сохраненного состояния выгрузки: '
+            f'удалите {_state_path(path)} и запустите выгрузку заново'
+        )
+
+    exported = 0
+    mode = 'r+b' if state else 'wb'
+
+    with open(path, mode) as export_file:
+        # Отбрасываем часть пачки, записанную после последнего сохранения состояния
+        export_file.truncate(offset)
+        export_file.seek(offset)
+
+        async for lines, token in ExportService.batches(user_id=user_id, after=after_id, batch_size=batch_size):
+            export_file.write(gzip.compress(lines) if compress else lines)
+            export_file.flush()
+            os.fsync(export_file.fileno())
+
+            exported += lines.count(b'\n')
+            _save_state(path, {'user': user, 'after': token, 'offset': export_file.tell()})
+
+    return exported
+
+
+async def _main(args: argparse.Namespace) -> int:
+    """
+    Выгрузка постов с подключением к БД
+    :return: код завершения
+    """
+
+    await mongo.connect()
+
+    try:
+        exported = await export_posts(
+            path=args.path,
+            user=args.user,
+            resume=args.resume,
+            compress=args.gzip or args.path.endswith('.gz'),
+            batch_size=args.batch_size
+        )
+
+    except InvalidExportToken as exc:
+        logger.error(exc)
+        return 1
+
+    finally:
+        mongo.close()
+
+    # Выгрузка завершена полностью - состояние для продолжения больше не нужно
+    if os.path.exists(_state_path(args.path)):
+        os.remove(_state_path(args.path))
+
+    logger.info(f'Выгружено постов: {exported}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Выгрузка постов в файл NDJSON')
+    parser.add_argument('path', help='путь к файлу выгрузки (.gz - со сжатием)')
+    parser.add_argument('--user', help='id автора (по умолчанию - посты всех авторов)')
+    parser.add_argument('--resume', action='store_true', help='продолжить прерванную выгрузку')
+    parser.add_argument('--gzip', action='store_true', help='сжимать файл gzip')
+    parser.add_argument('--batch-size', type=int, default=None, help='кол-во постов в пачке')
+
+    sys.exit(asyncio.run(_main(parser.parse_args())))
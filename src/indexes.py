@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import sys
+from typing import Dict, List
+
+import pymongo
+from loguru import logger
+from pymongo import IndexModel
+
+from src.database import mongo
+from src.utils.exeptions import MissingIndexes
+
+
+# Индексы, которые должны существовать в каждой коллекции
+INDEXES: Dict[str, List[IndexModel]] = {
+    'users': [
+        # Поиск пользователя по email при входе и уникальность email при регистрации
+        IndexModel([('email', pymongo.ASCENDING)], unique=True),
+        # Поиск пользователей, измененных после предыдущей проверки копий данных авторов в постах
+        IndexModel([('updated_at', pymongo.ASCENDING)]),
+    ],
+    'posts': [
+        # Общая лента: сортировка и пагинация по курсору (updated_at, _id)
+        IndexModel([('updated_at', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)]),
+        # Лента автора: фильтрация по автору, сортировка и пагинация по курсору
+        IndexModel([('user', pymongo.ASCENDING), ('updated_at', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)]),
+        # Выгрузка постов автора по порядку _id (продолжение с последнего выгруженного поста)
+        IndexModel([('user', pymongo.ASCENDING), ('_id', pymongo.ASCENDING)]),
+        # Полнотекстовый поиск по title и content (совпадения в заголовке весомее)
+        IndexModel([('title', pymongo.TEXT), ('content', pymongo.TEXT)], weights={'title': 2, 'content': 1}),
+    ],
+    'revoked_tokens': [
+        # Автоматическое удаление отозванных токенов после истечения срока их действия
+        IndexModel([('expires_at', pymongo.ASCENDING)], expireAfterSeconds=0),
+        # Догрузка отозванных токенов, добавленных после предыдущего обновления списка
+        IndexModel([('revoked_at', pymongo.ASCENDING)]),
+    ],
+}
+
+
+async def _make_unique(collection, document: Dict) -> None:
+    """
+    Замена существующего неуникального индекса уникальным с тем же названием и ключами
+    (MongoDB не изменяет параметры индекса при повторном создании и завершает его ошибкой)
+    :param collection: коллекция
+    :param document: описание объявленного индекса
+    :raise MissingIndexes: если в коллекции есть дубликаты значений (индекс не изменяется)
+    """
+    fields = list(document['key'])
+    duplicates = await collection.aggregate(
+        [
+            {'$group': {'_id': {field: f'${field}' for field in fields}, 'count': {'$sum': 1}}},
+            {'$match': {'count': {'$gt': 1}}},
+            {'$limit': 1},
+        ],
+        allowDiskUse=True
+    ).to_list(length=1)
+
+    if duplicates:
+        raise MissingIndexes(
+            f'Индекс {collection.name}.{document["name"]} не может быть уникальным: '
+            f'есть повторяющиеся значения {duplicates[0]["_id"]}'
+        )
+
+    logger.warning(f'Индекс {collection.name}.{document["name"]} пересоздается уникальным')
+    await collection.drop_index(document['name'])
+
+
+async def ensure_indexes(db) -> None:
+    """
+    Создание объявленных индексов (повторное создание существующего индекса ничего не меняет).
+    Существующие неуникальные индексы, объявленные уникальными, пересоздаются
+    :param db: база данных
+    """
+
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+
+        for index in indexes:
+            document = index.document
+            current = existing.get(document['name'])
+
+            if current and document.get('unique') and not current.get('unique'):
+                await _make_unique(db[collection], document)
+
+        names = await db[collection].create_indexes(indexes)
+        logger.debug(f'Индексы коллекции {collection}: {", ".join(names)}')
+
+
+async def index_drift(db) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Сравнение объявленных индексов с существующими в БД
+    :param db: база данных
+    :return: словарь {коллекция: {'missing': [...], 'unexpected': [...], 'mismatched': [...]}}
+    с коллекциями, в которых есть расхождения
+    """
+    drift = {}
+
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        declared = {index.document['name']: index.document for index in indexes}
+
+        missing = [name for name in declared if name not in existing]
+        unexpected = [name for name in existing if name != '_id_' and name not in declared]
+        mismatched = [
+            name for name, document in declared.items()
+            if name in existing and bool(document.get('unique')) != bool(existing[name].get('unique'))
+        ]
+
+        if missing or unexpected or mismatched:
+            drift[collection] = {'missing': missing, 'unexpected': unexpected, 'mismatched': mismatched}
+
+    return drift
+
+
+async def check_indexes(db) -> None:
+    """
+    Проверка наличия всех объявленных индексов, расхождения выводятся в лог
+    :param db: база данных
+    :raise MissingIndexes: если объявленный индекс отсутствует или создан с другими параметрами
+    """
+    drift = await index_drift(db)
+    required = []
+
+    for collection, report in drift.items():
+        for kind, names in report.items():
+            if names:
+                logger.warning(f'Индексы коллекции {collection} ({kind}): {", ".join(names)}')
+
+        required += [f'{collection}.{name}' for name in report['missing'] + report['mismatched']]
+
+    if required:
+        raise MissingIndexes(f'Отсутствуют обязательные индексы: {", ".join(required)}')
+
+
+async def setup_indexes(db, create: bool = True) -> None:
+    """
+    Подготовка индексов при запуске приложения
+    :param db: база данных
+    :param create: создавать индексы (False - только проверить, что они созданы заранее)
+    """
+
+    if create:
+        await ensure_indexes(db)
+
+    await check_indexes(db)
+
+
+async def _main(check_only: bool) -> int:
+    """
+    Создание индексов перед развертыванием либо только проверка расхождений
+    :return: код завершения
+    """
+
+    await mongo.connect()
+
+    try:
+        await setup_indexes(mongo.db, create=not check_only)
+
+    except MissingIndexes as exc:
+        logger.error(exc)
+        return 1
+
+    finally:
+        mongo.close()
+
+    logger.info('Индексы в актуальном состоянии')
+
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Управление индексами MongoDB')
+    parser.add_argument('--check', action='store_true', help='только проверить индексы, не создавая их')
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(_main(check_only=args.check)))
@@ -1,16 +1,75 @@
-from fastapi import FastAPI
+import asyncio
+import math
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from src.config import settings
+from src.database import mongo
+from src.indexes import setup_indexes
+from src.services.metrics import MetricsService
+from src.services.snapshot import AuthorSnapshotService
+from src.services.token import TokenService
 from src.urls import register_routers
+from src.utils.exeptions import ExecutorOverloaded, TooManyAttempts
+from src.utils.limiter import LoadSheddingMiddleware
+from src.utils.metrics import MetricsMiddleware
+from src.utils.tracing import TracingMiddleware, instrument_app
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Подготовка приложения к запуску и освобождение ресурсов при остановке
+    """
+    # Подключение к БД и прогрев пула соединений до приема запросов
+    await mongo.connect()
+
+    # Создание и проверка индексов до приема запросов (при отсутствии обязательных индексов запуск прерывается)
+    await setup_indexes(mongo.db, create=settings.CREATE_INDEXES_ON_STARTUP)
+
+    # Загрузка отозванных токенов и их периодическое обновление
+    await TokenService.load_revoked()
+    revoked_refresher = asyncio.create_task(TokenService.refresh_revoked_periodically())
+
+    # Периодическая запись метрик процесса для объединения с метриками других workers
+    metrics_flusher = asyncio.create_task(MetricsService.flush_periodically())
+
+    # Периодическое обновление копий данных авторов в постах после изменения пользователей в БД
+    snapshot_refresher = asyncio.create_task(AuthorSnapshotService.refresh_stale_periodically())
+
+    yield
+
+    for task in (revoked_refresher, metrics_flusher, snapshot_refresher):
+        task.cancel()
+
+        with suppress(asyncio.CancelledError):
+            await task
+
+    await MetricsService.flush()
 
+    mongo.close()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     settings.CLIENT_ORIGIN,
 ]
 
+# Ограничение нагрузки подключается до CORS, чтобы ответы 503 тоже содержали заголовки CORS
+app.add_middleware(LoadSheddingMiddleware)
+
+# Метрики подключаются после ограничения нагрузки, чтобы учитывать и отклоненные запросы (503)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Корневой спан запроса охватывает и ожидание в очереди ограничения нагрузки
+if settings.TRACE_SAMPLE_RATE:
+    app.add_middleware(TracingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -19,4 +78,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(ExecutorOverloaded)
+async def executor_overloaded_handler(request: Request, exc: ExecutorOverloaded):
+    """
+    Быстрый отказ, если пул для ресурсоемких операций (хэширование паролей) перегружен
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={'detail': 'Сервер перегружен, повторите попытку позже'},
+        headers={'Retry-After': '1'}
+    )
+
+
+@app.exception_handler(TooManyAttempts)
+async def too_many_attempts_handler(request: Request, exc: TooManyAttempts):
+    """
+    Быстрый отказ при превышении частоты попыток входа или регистрации (до проверки пароля)
+    """
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={'detail': str(exc)},
+        headers={'Retry-After': str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+
 register_routers(app)  # Регистрация URL
+
+# Спаны обработчиков маршрутов, сервисов и репозиториев (после регистрации маршрутов)
+if settings.TRACE_SAMPLE_RATE:
+    instrument_app(app)
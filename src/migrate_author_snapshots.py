@@ -0,0 +1,51 @@
+"""
+Заполнение копий данных авторов в существующих постах (перед включением POST_AUTHOR_SNAPSHOT).
+
+Запуск (нужен доступный MongoDB из DATABASE_URL):
+    python -m src.migrate_author_snapshots
+    python -m src.migrate_author_snapshots --all
+
+По умолчанию заполняются только посты без копии, поэтому повторный запуск безопасен.
+С флагом --all копии обновляются во всех постах (например, если профили менялись при выключенном режиме).
+"""
+import argparse
+import asyncio
+import sys
+
+from loguru import logger
+
+from src.database import mongo
+from src.repositories.post import PostRepository
+
+
+async def _main(refresh_all: bool) -> int:
+    """
+    Заполнение копий данных авторов
+    :return: код завершения
+    """
+
+    await mongo.connect()
+
+    try:
+        before = await PostRepository.count_without_author_snapshot()
+        await PostRepository.backfill_author_snapshots(only_missing=not refresh_all)
+        after = await PostRepository.count_without_author_snapshot()
+
+    finally:
+        mongo.close()
+
+    logger.info(f'Заполнено копий данных авторов: {before - after}')
+
+    # Оставшиеся посты без копии принадлежат удаленным пользователям
+    if after:
+        logger.warning(f'Постов без данных автора: {after}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Заполнение копий данных авторов в постах')
+    parser.add_argument('--all', action='store_true', help='обновить копии во всех постах')
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(_main(refresh_all=args.all)))
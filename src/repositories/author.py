@@ -1,10 +1,13 @@
-from typing import List, Dict, Optional
+from datetime import datetime
+from typing import List, Dict, Optional, Set, Tuple
 
 from bson import ObjectId
 from pymongo import ReturnDocument
+from pymongo.results import BulkWriteResult
 
 from src.database import Post
 from src.schemas.post import PostInOptionalSchema
+from src.utils.search import list_filter, page_with_total, page_with_total_pipeline, search_sort
 
 
 class AuthorRepository:
@@ -18,34 +21,107 @@ class AuthorRepository:
             limit: int,
             page: int,
             search: str,
-            user_id: str
+            user_id: str,
+            cursor: Optional[str] = None,
+            category: Optional[str] = None,
+            substring: bool = False
     ) -> List[Post]:
         """
         Возврат из БД списка постов автора
         :param limit: кол-во записей на странице
-        :param page: номер страницы
+        :param page: номер страницы (используется, если не передан курсор)
         :param search: фраза для фильтрации
         :param user_id: id автора
+        :param cursor: курсор последнего поста предыдущей страницы
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
         :return: список с постами
         """
 
-        # Фильтрация по автору и частичному совпадению в title или content (без учета регистра)
-        filter_criteria = {
-            "$and": [
-                {'user': ObjectId(user_id)},
-                {"$or": [
-                    {"title": {"$regex": f'.*{search}.*', "$options": "i"}},
-                    {"content": {"$regex": f'.*{search}.*', "$options": "i"}},
-                ]}
-            ]
-        }
+        # Фильтрация по автору, фразе и категории
+        filter_criteria = list_filter(
+            search=search,
+            category=category,
+            substring=substring,
+            cursor=cursor,
+            conditions=[{'user': ObjectId(user_id)}]
+        )
+
+        # Сортировка по релевантности (при полнотекстовом поиске) и дате (сначала новые)
+        results = Post.find(filter_criteria).sort(search_sort(search=search, substring=substring))
 
-        # Пагинация и сортировка по дате (сначала новые)
-        results = Post.find(filter_criteria).sort([("updated_at", -1)]).skip((page - 1) * limit).limit(limit)
+        # Пагинация по номеру страницы (для совместимости, если курсор не передан)
+        if not cursor:
+            results = results.skip((page - 1) * limit)
+
+        results = results.limit(limit)
         posts_list = await results.to_list(length=None)
 
         return posts_list
 
+    @classmethod
+    async def get_list_with_total(
+            cls,
+            limit: int,
+            page: int,
+            search: str,
+            user_id: str,
+            cursor: Optional[str] = None,
+            category: Optional[str] = None,
+            substring: bool = False
+    ) -> Tuple[List[Post], int]:
+        """
+        Возврат из БД списка постов автора и точного общего кол-ва его постов по фильтру одним запросом ($facet)
+        :param limit: кол-во записей на странице
+        :param page: номер страницы (используется, если не передан курсор)
+        :param search: фраза для фильтрации
+        :param user_id: id автора
+        :param cursor: курсор последнего поста предыдущей страницы
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :return: список с постами и общее кол-во постов
+        """
+
+        pipeline = page_with_total_pipeline(
+            search=search,
+            limit=limit,
+            page=page,
+            category=category,
+            substring=substring,
+            cursor=cursor,
+            conditions=[{'user': ObjectId(user_id)}]
+        )
+        result = await Post.aggregate(pipeline, allowDiskUse=True).to_list(length=1)
+
+        return page_with_total(result)
+
+    @classmethod
+    async def count(
+            cls,
+            search: str,
+            user_id: str,
+            category: Optional[str] = None,
+            substring: bool = False
+    ) -> int:
+        """
+        Точное кол-во постов автора, подходящих под фильтр (без учета пагинации)
+        :param search: фраза для фильтрации
+        :param user_id: id автора
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :return: кол-во постов
+        """
+
+        filter_criteria = list_filter(
+            search=search,
+            category=category,
+            substring=substring,
+            conditions=[{'user': ObjectId(user_id)}]
+        )
+        total = await Post.count_documents(filter_criteria)
+
+        return total
+
     @classmethod
     async def get(cls, post_id: str, user_id: str) -> Post:
         """
@@ -67,6 +143,26 @@ class AuthorRepository:
 
         return post
 
+    @classmethod
+    async def get_version(cls, post_id: str, user_id: str) -> Post:
+        """
+        Возврат из БД только даты обновления записи по id поста и автора (для условных запросов)
+        :param post_id: id записи
+        :param user_id: id автора
+        :return: объект записи с полями _id, updated_at
+        """
+
+        query = {
+            '$and': [
+                {'_id': ObjectId(post_id)},
+                {'user': ObjectId(user_id)}
+            ]
+        }
+
+        post = await Post.find_one(query, {'updated_at': 1})
+
+        return post
+
     @classmethod
     async def create(cls, post_data: Dict):
         """
@@ -102,12 +198,16 @@ class AuthorRepository:
             ]
         }
 
+        # Дата обновления меняется при каждом изменении: по ней формируются ETag и Last-Modified записи,
+        # иначе клиенты с сохраненной версией продолжат получать 304 после изменения
+        fields = {**post.dict(exclude_none=True), 'updated_at': datetime.utcnow()}
+
         # Поиск и обновление записи
         # ReturnDocument.AFTER - возврат обновленной записи
         # Если записи нет - вернет None
         updated_post = await Post.find_one_and_update(
             filter_criteria,
-            {'$set': post.dict(exclude_none=True)},
+            {'$set': fields},
             return_document=ReturnDocument.AFTER
         )
 
@@ -138,3 +238,29 @@ class AuthorRepository:
         post = await Post.find_one_and_delete(filter_criteria)
 
         return post
+
+    @classmethod
+    async def get_owned_ids(cls, post_ids: List[ObjectId], user_id: str) -> Set[ObjectId]:
+        """
+        Возврат id записей автора из переданного списка (для пакетных операций)
+        :param post_ids: список id записей
+        :param user_id: id автора
+        :return: множество id записей, принадлежащих автору
+        """
+
+        posts = Post.find({'_id': {'$in': post_ids}, 'user': ObjectId(user_id)}, {'_id': 1})
+
+        return {post['_id'] async for post in posts}
+
+    @classmethod
+    async def bulk_write(cls, operations: List, ordered: bool) -> BulkWriteResult:
+        """
+        Выполнение пакета операций одним запросом
+        :param operations: список операций (InsertOne, UpdateOne, DeleteOne), ограниченных записями автора
+        :param ordered: True - остановка на первой ошибке, False - выполнение всех операций
+        :return: результат пакетной операции
+        """
+
+        result = await Post.bulk_write(operations, ordered=ordered)
+
+        return result
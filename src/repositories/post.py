@@ -1,7 +1,21 @@
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from bson.objectid import ObjectId
 
-from src.database import Post
+from src.config import settings
+from src.database import Post, User
+from src.utils.search import list_filter, page_with_total, page_with_total_pipeline, search_sort
+from src.utils.single_flight import coalesce
+
+
+# Поля автора, необходимые для вывода по схеме UserOutSchema
+_AUTHOR_PROJECTION = {
+    'name': 1,
+    'email': 1,
+    'photo': 1,
+    'role': 1,
+    'created_at': 1,
+    'updated_at': 1,
+}
 
 
 class PostRepository:
@@ -10,48 +24,258 @@ class PostRepository:
     """
 
     @classmethod
-    async def get_list(
+    def __author_stages(cls, keep_missing: bool = False) -> List[Dict]:
+        """
+        Стадии конвейера для запроса связанных данных автора (только нужные для вывода поля)
+        :param keep_missing: сохранить посты удаленных авторов (без поля user), чтобы размер страницы
+        после объединения не уменьшался и по ней можно было определить курсор следующей страницы
+        """
+
+        return [
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'user',
+                'foreignField': '_id',
+                'pipeline': [{'$project': _AUTHOR_PROJECTION}],
+                'as': 'user'}
+            },
+            {'$unwind': {'path': '$user', 'preserveNullAndEmptyArrays': keep_missing}},
+        ]
+
+    @classmethod
+    def author_snapshot(cls, user: Dict) -> Dict:
+        """
+        Копия данных автора для хранения в документе поста (режим POST_AUTHOR_SNAPSHOT)
+        :param user: документ пользователя
+        :return: словарь с _id и полями автора, необходимыми для вывода
+        """
+
+        return {'_id': user['_id'], **{field: user.get(field) for field in _AUTHOR_PROJECTION}}
+
+    @classmethod
+    async def __with_authors(cls, posts: List[Post], keep_missing: bool = False) -> List[Post]:
+        """
+        Подстановка сохраненных в постах данных авторов вместо id автора (как после $lookup).
+        Данные авторов постов без копии (созданных до ее заполнения) запрашиваются одним запросом
+        :param posts: список постов
+        :param keep_missing: сохранить посты удаленных авторов (с user = None)
+        :return: список постов с данными авторов (посты удаленных авторов исключаются, как при $unwind)
+        """
+
+        missing = {post['user'] for post in posts if 'author' not in post}
+        authors = {}
+
+        if missing:
+            users = await User.find({'_id': {'$in': list(missing)}}, _AUTHOR_PROJECTION).to_list(length=None)
+            authors = {user['_id']: user for user in users}
+
+        posts_list = []
+
+        # Посты не изменяются на месте: результат объединенного запроса (coalesce) общий для всех вызовов
+        for post in posts:
+            author = post.get('author') or authors.get(post['user'])
+
+            if author or keep_missing:
+                posts_list.append({**post, 'user': author})
+
+        return posts_list
+
+    @classmethod
+    def build_list_pipeline(
             cls,
             limit: int,
             page: int,
-            search: str
-    ) -> List[Post]:
+            search: str,
+            cursor: Optional[str] = None,
+            category: Optional[str] = None,
+            substring: bool = False
+    ) -> List[Dict]:
         """
-        Вывод из БД всех постов (с данными автора)
+        Формирование конвейера агрегации для вывода всех постов (с данными автора).
+        Сортировка и пагинация выполняются по индексу до объединения с users,
+        данные автора запрашиваются только для записей итоговой страницы.
+        Посты удаленных авторов остаются на странице без поля user (исключаются при выводе)
         :param limit: кол-во выводимых записей на странице
-        :param page: номер текущей страницы
+        :param page: номер текущей страницы (используется, если не передан курсор)
         :param search: фраза для фильтрации записей
-        :return: список с записями
+        :param cursor: курсор последнего поста предыдущей страницы
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :return: список стадий конвейера
         """
 
+        # Фильтрация по фразе и категории
+        filter_criteria = list_filter(search=search, category=category, substring=substring, cursor=cursor)
+
         pipeline = [
             # Фильтрация
-            {'$match': {
-                # по частичному совпадению в title или content (без учета регистра)
-                "$or": [
-                    {"title": {"$regex": f'.*{search}.*', "$options": "i"}},
-                    {"content": {"$regex": f'.*{search}.*', "$options": "i"}},
-                ]
-            }},
-            # Запрос связанных данных автора (можно вывести данные автора в ответе)
-            {'$lookup': {
-                'from': 'users',
-                'localField': 'user',
-                'foreignField': '_id',
-                'as': 'user'}
-            },
-            {'$unwind': '$user'},
-            # Сортировка по дате (сначала новые)
-            {"$sort": {"updated_at": -1}},
-            # Пагинация
-            {"$skip": (page - 1) * limit},
-            {"$limit": limit}
+            {'$match': filter_criteria},
+            # Сортировка по релевантности (при полнотекстовом поиске) и дате (сначала новые)
+            {"$sort": dict(search_sort(search=search, substring=substring))},
+        ]
+
+        # Пагинация по номеру страницы (для совместимости, если курсор не передан)
+        if not cursor:
+            pipeline.append({"$skip": (page - 1) * limit})
+
+        pipeline += [
+            {"$limit": limit},
+            # Запрос связанных данных автора только для записей текущей страницы
+            *cls.__author_stages(keep_missing=True),
         ]
 
+        return pipeline
+
+    @classmethod
+    @coalesce
+    async def find_list(
+            cls,
+            limit: int,
+            page: int,
+            search: str,
+            cursor: Optional[str] = None,
+            category: Optional[str] = None,
+            substring: bool = False
+    ) -> List[Post]:
+        """
+        Вывод из БД всех постов выборкой по индексу, без объединения с users (в поле user - id автора)
+        :param limit: кол-во выводимых записей на странице
+        :param page: номер текущей страницы (используется, если не передан курсор)
+        :param search: фраза для фильтрации записей
+        :param cursor: курсор последнего поста предыдущей страницы
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :return: список с записями
+        """
+
+        filter_criteria = list_filter(search=search, category=category, substring=substring, cursor=cursor)
+        results = Post.find(filter_criteria).sort(search_sort(search=search, substring=substring))
+
+        # Пагинация по номеру страницы (для совместимости, если курсор не передан)
+        if not cursor:
+            results = results.skip((page - 1) * limit)
+
+        posts_list = await results.limit(limit).to_list(length=None)
+
+        return posts_list
+
+    @classmethod
+    @coalesce
+    async def get_list(
+            cls,
+            limit: int,
+            page: int,
+            search: str,
+            cursor: Optional[str] = None,
+            category: Optional[str] = None,
+            substring: bool = False
+    ) -> List[Post]:
+        """
+        Вывод из БД всех постов (с данными автора). Посты удаленных авторов не исключаются (пустое поле user),
+        чтобы по размеру страницы можно было определить, есть ли следующая
+        :param limit: кол-во выводимых записей на странице
+        :param page: номер текущей страницы (используется, если не передан курсор)
+        :param search: фраза для фильтрации записей
+        :param cursor: курсор последнего поста предыдущей страницы
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :return: список с записями
+        """
+
+        # Данные авторов хранятся в постах - достаточно выборки по индексу без объединения с users
+        if settings.POST_AUTHOR_SNAPSHOT:
+            posts_list = await cls.find_list(
+                limit=limit, page=page, search=search, cursor=cursor, category=category, substring=substring
+            )
+
+            return await cls.__with_authors(posts_list, keep_missing=True)
+
+        pipeline = cls.build_list_pipeline(
+            limit=limit, page=page, search=search, cursor=cursor, category=category, substring=substring
+        )
         posts_list = await Post.aggregate(pipeline).to_list(length=None)
 
         return posts_list
 
+    @classmethod
+    @coalesce
+    async def get_list_with_total(
+            cls,
+            limit: int,
+            page: int,
+            search: str,
+            cursor: Optional[str] = None,
+            category: Optional[str] = None,
+            substring: bool = False,
+            with_authors: bool = True
+    ) -> Tuple[List[Post], int]:
+        """
+        Вывод из БД всех постов и точного общего кол-ва постов по фильтру одним запросом ($facet).
+        Посты удаленных авторов не исключаются (пустое поле user), как в get_list
+        :param limit: кол-во выводимых записей на странице
+        :param page: номер текущей страницы (используется, если не передан курсор)
+        :param search: фраза для фильтрации записей
+        :param cursor: курсор последнего поста предыдущей страницы
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :param with_authors: подставить данные авторов (False - в поле user id автора, как в find_list)
+        :return: список с записями и общее кол-во постов
+        """
+
+        # Данные авторов подставляются из постов (POST_AUTHOR_SNAPSHOT) либо объединением с users только
+        # для записей страницы
+        join_authors = with_authors and not settings.POST_AUTHOR_SNAPSHOT
+        pipeline = page_with_total_pipeline(
+            search=search,
+            limit=limit,
+            page=page,
+            category=category,
+            substring=substring,
+            cursor=cursor,
+            page_stages=cls.__author_stages(keep_missing=True) if join_authors else None
+        )
+
+        # Без индекса (сортировка по релевантности) сортируются все подходящие записи, а не только страница
+        result = await Post.aggregate(pipeline, allowDiskUse=True).to_list(length=1)
+        posts_list, total = page_with_total(result)
+
+        if with_authors and settings.POST_AUTHOR_SNAPSHOT:
+            posts_list = await cls.__with_authors(posts_list, keep_missing=True)
+
+        return posts_list, total
+
+    @classmethod
+    @coalesce
+    async def count(
+            cls,
+            search: str,
+            category: Optional[str] = None,
+            substring: bool = False
+    ) -> int:
+        """
+        Точное кол-во постов, подходящих под фильтр (без учета пагинации)
+        :param search: фраза для фильтрации записей
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :return: кол-во постов
+        """
+
+        filter_criteria = list_filter(search=search, category=category, substring=substring)
+        total = await Post.count_documents(filter_criteria)
+
+        return total
+
+    @classmethod
+    async def estimated_count(cls) -> int:
+        """
+        Приблизительное кол-во всех постов по метаданным коллекции (без сканирования)
+        :return: кол-во постов
+        """
+
+        total = await Post.estimated_document_count()
+
+        return total
+
     @classmethod
     async def get_for_id(cls, post_id: str) -> Post:
         """
@@ -65,6 +289,33 @@ class PostRepository:
         return post
 
     @classmethod
+    @coalesce
+    async def find_one(cls, post_id: str) -> Post:
+        """
+        Возврат записи из БД по id без объединения с users (в поле user - id автора)
+        :param post_id: id записи
+        :return: объект записи
+        """
+
+        post = await Post.find_one({'_id': ObjectId(post_id)})
+
+        return post
+
+    @classmethod
+    @coalesce
+    async def get_version(cls, post_id: str) -> Post:
+        """
+        Возврат из БД только даты обновления и id автора записи (для условных запросов)
+        :param post_id: id записи
+        :return: объект записи с полями _id, updated_at, user
+        """
+
+        post = await Post.find_one({'_id': ObjectId(post_id)}, {'updated_at': 1, 'user': 1})
+
+        return post
+
+    @classmethod
+    @coalesce
     async def get_with_author_data(cls, post_id: str) -> List[Post]:
         """
         Возврат записи из БД по id (с данными автора)
@@ -72,6 +323,11 @@ class PostRepository:
         :return: список с результатом
         """
 
+        if settings.POST_AUTHOR_SNAPSHOT:
+            post = await cls.find_one(post_id=post_id)
+
+            return await cls.__with_authors([post]) if post else []
+
         pipeline = [
             # Фильтрация
             {'$match': {
@@ -81,15 +337,87 @@ class PostRepository:
                 ]
             }},
             # Запрос связанных данных автора (можно вывести данные автора в ответе)
-            {'$lookup': {
-                'from': 'users',
-                'localField': 'user',
-                'foreignField': '_id',
-                'as': 'user'}
-            },
-            {'$unwind': '$user'},
+            *cls.__author_stages(),
         ]
 
         post = await Post.aggregate(pipeline).to_list(length=None)
 
         return post
+
+    @classmethod
+    async def iter_batches(
+            cls,
+            batch_size: int,
+            user_id: Optional[ObjectId] = None,
+            after: Optional[ObjectId] = None
+    ) -> AsyncIterator[List[Post]]:
+        """
+        Последовательное чтение постов из курсора пачками по порядку _id (для выгрузки),
+        в памяти одновременно находится не более одной пачки
+        :param batch_size: кол-во постов в пачке
+        :param user_id: id автора (None - посты всех авторов)
+        :param after: _id последнего выгруженного поста (выгрузка продолжается со следующего)
+        :return: асинхронный итератор по пачкам постов
+        """
+
+        filter_criteria = {}
+
+        if user_id:
+            filter_criteria['user'] = user_id
+
+        if after:
+            filter_criteria['_id'] = {'$gt': after}
+
+        cursor = Post.find(filter_criteria).sort('_id', 1).batch_size(batch_size)
+
+        try:
+            while True:
+                posts = await cursor.to_list(length=batch_size)
+
+                if not posts:
+                    break
+
+                yield posts
+
+        finally:
+            await cursor.close()
+
+    @classmethod
+    async def set_author_snapshot(cls, user: Dict) -> int:
+        """
+        Обновление копии данных автора в его постах, где копия устарела (изменена раньше пользователя)
+        :param user: документ пользователя
+        :return: кол-во измененных постов
+        """
+
+        result = await Post.update_many(
+            {'user': user['_id'], 'author.updated_at': {'$ne': user.get('updated_at')}},
+            {'$set': {'author': cls.author_snapshot(user)}}
+        )
+
+        return result.modified_count
+
+    @classmethod
+    async def backfill_author_snapshots(cls, only_missing: bool = True) -> None:
+        """
+        Заполнение копий данных авторов в существующих постах одним конвейером на стороне сервера
+        :param only_missing: только посты без копии (False - обновить копии во всех постах)
+        """
+
+        pipeline = [
+            {'$match': {'author': {'$exists': False}} if only_missing else {}},
+            {'$project': {'user': 1}},
+            *cls.__author_stages(),
+            {'$project': {'author': '$user'}},
+            {'$merge': {'into': 'posts', 'on': '_id', 'whenMatched': 'merge', 'whenNotMatched': 'discard'}},
+        ]
+
+        await Post.aggregate(pipeline).to_list(length=None)
+
+    @classmethod
+    async def count_without_author_snapshot(cls) -> int:
+        """
+        Кол-во постов без копии данных автора
+        """
+
+        return await Post.count_documents({'author': {'$exists': False}})
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import List
+
+from src.database import RevokedToken
+
+
+class RevokedTokenRepository:
+    """
+    Сохранение и вывод отозванных токенов (доступа и обновления)
+    """
+
+    @classmethod
+    async def create(cls, jti: str, expires_at: datetime) -> None:
+        """
+        Сохранение отозванного токена (удаляется из БД по TTL-индексу после истечения срока действия)
+        :param jti: идентификатор токена
+        :param expires_at: дата истечения срока действия токена
+        """
+
+        await RevokedToken.update_one(
+            {'_id': jti},
+            {'$set': {'expires_at': expires_at, 'revoked_at': datetime.utcnow()}},
+            upsert=True
+        )
+
+    @classmethod
+    async def get_list(cls, revoked_after: datetime | None = None) -> List[RevokedToken]:
+        """
+        Вывод не истекших отозванных токенов
+        :param revoked_after: вывести только токены, отозванные после этой даты (None - все)
+        :return: список с документами {_id: jti, expires_at}
+        """
+
+        filter_criteria = {'expires_at': {'$gt': datetime.utcnow()}}
+
+        if revoked_after:
+            filter_criteria['revoked_at'] = {'$gte': revoked_after}
+
+        tokens = await RevokedToken.find(filter_criteria, {'expires_at': 1}).to_list(length=None)
+
+        return tokens
@@ -1,7 +1,11 @@
+from datetime import datetime
+from typing import List
+
 from bson.objectid import ObjectId
 
 from src.database import User
 from src.schemas.user import CreateUserSchema
+from src.utils.single_flight import coalesce
 
 
 class UserRepository:
@@ -10,17 +14,21 @@ class UserRepository:
     """
 
     @classmethod
-    async def create(cls, user_data: CreateUserSchema) -> str:
+    async def create(cls, user_data: CreateUserSchema) -> User:
         """
-        Создание пользователя
+        Создание пользователя (уникальность email обеспечивает уникальный индекс)
         :param user_data: данные нового пользователя
-        :return: id нового пользователя
+        :return: объект нового пользователя в том виде, в котором он сохранен в БД
+        :raise DuplicateKeyError: если пользователь с таким email уже существует
         """
-        result = await User.insert_one(user_data.dict())
+        user = user_data.dict()
+        result = await User.insert_one(user)
+        user['_id'] = result.inserted_id
 
-        return result.inserted_id
+        return user
 
     @classmethod
+    @coalesce
     async def get_for_id(cls, user_id: str) -> User:
         """
         Поиск пользователя в БД по id
@@ -31,6 +39,33 @@ class UserRepository:
 
         return user
 
+    @classmethod
+    async def get_many(cls, user_ids: List[str]) -> List[User]:
+        """
+        Поиск пользователей в БД по списку id одним запросом (без хэша пароля)
+        :param user_ids: список id пользователей
+        :return: список найденных пользователей
+        """
+
+        users = await User.find(
+            {'_id': {'$in': [ObjectId(str(user_id)) for user_id in user_ids]}},
+            {'password': 0}
+        ).to_list(length=None)
+
+        return users
+
+    @classmethod
+    async def get_updated_since(cls, since: datetime) -> List[User]:
+        """
+        Поиск пользователей, измененных после указанного времени (без хэша пароля)
+        :param since: время предыдущей проверки
+        :return: список измененных пользователей
+        """
+
+        users = await User.find({'updated_at': {'$gt': since}}, {'password': 0}).to_list(length=None)
+
+        return users
+
     @classmethod
     async def get_for_email(cls, email: str) -> User:
         """
@@ -41,3 +76,14 @@ class UserRepository:
         user = await User.find_one({'email': email})
 
         return user
+
+    @classmethod
+    async def email_exists(cls, email: str) -> bool:
+        """
+        Проверка, занят ли email (запрос покрывается индексом, документ пользователя не читается)
+        :param email: email для поиска
+        :return: True - пользователь с таким email существует
+        """
+        user = await User.find_one({'email': email}, {'_id': 0, 'email': 1})
+
+        return user is not None
@@ -1,4 +1,4 @@
-from fastapi import Response, status, Depends, HTTPException
+from fastapi import Request, Response, status, Depends, HTTPException
 
 from src.repositories.user import UserRepository
 from src.routes.base import APIBaseRouter
@@ -7,7 +7,10 @@ from src.schemas.user import CreateUserSchema, UserResponseSchema, LoginUserSche
 from src.services.token import TokenService
 from src.services.user import UserService
 from src.utils.check_authorization import require_user
+from src.utils.exeptions import UserAlreadyExists
 from src.utils.password import verify_password
+from src.utils.revocation import revocation_list
+from src.utils.throttle import auth_throttle
 from src.oauth2 import AuthJWT
 from src.config import settings
 
@@ -22,18 +25,17 @@ router = APIBaseRouter(tags=['Auth'])
     status_code=status.HTTP_201_CREATED,
     response_model=UserResponseSchema,
 )
-async def create_user(user_data: CreateUserSchema):
+async def create_user(user_data: CreateUserSchema, request: Request):
     """
     Регистрация пользователя
     """
 
-    user = await UserRepository.get_for_email(email=user_data.email.lower())
-
-    if user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail='Пользователь с таким email уже зарегистрирован'
-        )
+    # Ограничение частоты попыток до хэширования пароля (сверх лимита - ответ 429)
+    await auth_throttle.admit(
+        action='register',
+        ip=request.client.host if request.client else None,
+        email=user_data.email
+    )
 
     # Проверка введенных паролей
     if user_data.password != user_data.password_confirm:
@@ -42,7 +44,14 @@ async def create_user(user_data: CreateUserSchema):
             detail='Пароли не совпадают'
         )
 
-    new_user = await UserService.create(user_data=user_data)
+    try:
+        new_user = await UserService.create(user_data=user_data)
+
+    except UserAlreadyExists as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc)
+        )
 
     return {'status': 'success', 'user': new_user}
 
@@ -50,6 +59,7 @@ async def create_user(user_data: CreateUserSchema):
 @router.post('/auth/login')
 async def login(
         user_data: LoginUserSchema,
+        request: Request,
         response: Response,
         Authorize: AuthJWT = Depends(),
 ):
@@ -57,6 +67,13 @@ async def login(
     Авторизация пользователя
     """
 
+    # Ограничение частоты попыток до запроса пользователя и проверки пароля (сверх лимита - ответ 429)
+    await auth_throttle.admit(
+        action='login',
+        ip=request.client.host if request.client else None,
+        email=user_data.email
+    )
+
     db_user = await UserRepository.get_for_email(email=user_data.email.lower())
 
     if not db_user:
@@ -65,7 +82,7 @@ async def login(
             detail='Пользователь с таким email не зарегистрирован'
         )
 
-    user = await user_entity(db_user)  # Сериализуем данные пользователя в словарь
+    user = user_entity(db_user)  # Сериализуем данные пользователя в словарь
 
     # Проверяем введенный пароль с хэшированным из БД
     # if not verify_password(user_data.password, user['password']):
@@ -75,7 +92,12 @@ async def login(
             detail='Пароль не верен'
         )
 
-    await TokenService.set_cookies(response=response, user_id=user['id'], Authorize=Authorize)
+    await TokenService.set_cookies(
+        response=response,
+        user_id=user['id'],
+        Authorize=Authorize,
+        claims=TokenService.user_claims(user)
+    )
 
     return {'status': 'success'}
 
@@ -108,13 +130,20 @@ async def refresh_token(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=error)
 
+    # Токен обновления отозван при выходе из учетной записи
+    if revocation_list.is_revoked(Authorize.get_raw_jwt().get('jti')):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Токен недействителен или срок его действия истек'
+        )
+
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Не удалось обновить токен доступа'
         )
 
-    user = await UserService.get(user_id=user_id)
+    user = await UserService.get_cached(user_id=user_id)
 
     if not user:
         raise HTTPException(
@@ -122,7 +151,12 @@ async def refresh_token(
             detail='Пользователь, принадлежащий к этому токену, больше не существует'
         )
 
-    await TokenService.refresh(response=response, user_id=user['id'], Authorize=Authorize)
+    await TokenService.refresh(
+        response=response,
+        user_id=str(user['_id']),
+        Authorize=Authorize,
+        claims=TokenService.user_claims(user)
+    )
 
     return {'message': 'OK'}
 
@@ -132,6 +166,7 @@ async def refresh_token(
     status_code=status.HTTP_200_OK
 )
 async def logout(
+        request: Request,
         response: Response,
         Authorize: AuthJWT = Depends(),
         user_id: str = Depends(require_user)):
@@ -139,6 +174,8 @@ async def logout(
     Выход пользователя из учетной записи
     """
 
+    # Отзыв токенов доступа и обновления до истечения срока их действия
+    await TokenService.revoke(Authorize=Authorize, refresh_token=request.cookies.get('refresh_token'))
     Authorize.unset_jwt_cookies()  # Удаление файлов cookie из браузера (клиента)
     response.set_cookie('logged_in', '', -1)
 
@@ -1,10 +1,16 @@
 from bson import ObjectId
-from fastapi import Depends, status, HTTPException, Response
+from fastapi import Depends, status, HTTPException, Request, Response
 
 from src.routes.base import APIBaseRouter
-from src.schemas.post import ListPostResponse, PostOutSchema, PostSchema, PostInOptionalSchema
+from src.schemas.post import (
+    CountMode, ListPostResponse, PostOutSchema, PostSchema, PostInOptionalSchema,
+    BulkCreatePostRequest, BulkUpdatePostRequest, BulkDeletePostRequest, BulkResponse
+)
 from src.services.author import AuthorService
 from src.utils.check_authorization import require_user
+from src.utils.conditional import content_etag, is_not_modified, not_modified, validator_headers
+from src.utils.exeptions import InvalidCursor
+from src.utils.response import fast_response
 
 
 router = APIBaseRouter(tags=['Post author'])
@@ -14,23 +20,55 @@ router = APIBaseRouter(tags=['Post author'])
     response_model=ListPostResponse,
 )
 async def get_posts(
+        request: Request,
+        response: Response,
         limit: int = 10,
         page: int = 1,
         search: str = '',
+        cursor: str | None = None,
+        category: str | None = None,
+        substring: bool = False,
+        count: CountMode = CountMode.exact,
         user_id: str = Depends(require_user)
 ):
     """
     Вывод постов текущего пользователя
     """
 
-    posts = await AuthorService.get_list(limit=limit, page=page, search=search, user_id=user_id)
+    try:
+        posts_page = await AuthorService.get_list(
+            limit=limit,
+            page=page,
+            search=search,
+            user_id=user_id,
+            cursor=cursor,
+            category=category,
+            substring=substring,
+            count=count
+        )
 
-    return {
+    except InvalidCursor as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+    content = {
         'status': 'success',
-        'results': len(posts),
-        'posts': posts
+        'results': len(posts_page['posts']),
+        **posts_page
     }
 
+    # Клиенту с актуальной версией страницы тело не передается
+    headers = validator_headers(etag=content_etag(content))
+
+    if is_not_modified(request=request, etag=headers['ETag']):
+        return not_modified(headers=headers)
+
+    response.headers.update(headers)
+
+    return fast_response(content, headers=headers)
+
 @router.post(
     '/author/posts',
     status_code=status.HTTP_201_CREATED,
@@ -47,6 +85,60 @@ async def create_post(
 
     return new_post
 
+# Пакетные маршруты объявлены до маршрутов с {post_id}, чтобы путь /bulk не принимался за id записи.
+# Размер пакета (от 1 до AUTHOR_BULK_MAX_SIZE записей) проверяется схемой запроса (ответ 422)
+
+@router.post(
+    '/author/posts/bulk',
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResponse
+)
+async def bulk_create_posts(
+        data: BulkCreatePostRequest,
+        user_id: str = Depends(require_user)
+):
+    """
+    Пакетное добавление записей (результат по каждой записи)
+    """
+
+    results = await AuthorService.bulk_create(posts=data.posts, user_id=user_id, ordered=data.ordered)
+
+    return {'status': 'success', 'results': results}
+
+@router.patch(
+    '/author/posts/bulk',
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResponse
+)
+async def bulk_update_posts(
+        data: BulkUpdatePostRequest,
+        user_id: str = Depends(require_user)
+):
+    """
+    Пакетное обновление записей автором (результат по каждой записи)
+    """
+
+    results = await AuthorService.bulk_update(posts=data.posts, user_id=user_id, ordered=data.ordered)
+
+    return {'status': 'success', 'results': results}
+
+@router.delete(
+    '/author/posts/bulk',
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResponse
+)
+async def bulk_delete_posts(
+        data: BulkDeletePostRequest,
+        user_id: str = Depends(require_user)
+):
+    """
+    Пакетное удаление записей автором (результат по каждой записи)
+    """
+
+    results = await AuthorService.bulk_delete(post_ids=data.ids, user_id=user_id, ordered=data.ordered)
+
+    return {'status': 'success', 'results': results}
+
 @router.get(
     '/author/posts/{post_id}',
     status_code=status.HTTP_200_OK,
@@ -54,6 +146,8 @@ async def create_post(
 )
 async def get_post(
         post_id: str,
+        request: Request,
+        response: Response,
         user_id: str = Depends(require_user)
 ):
     """
@@ -67,6 +161,21 @@ async def get_post(
             detail=f"Невалидный номер записи: {post_id}"
         )
 
+    # Версия записи по легкому запросу (только дата обновления)
+    version = await AuthorService.get_version(post_id=post_id, user_id=user_id)
+
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Запись №{post_id} не найдена"
+        )
+
+    headers = validator_headers(etag=version['etag'], last_modified=version['last_modified'])
+
+    # У клиента актуальная версия записи - полные данные не запрашиваются
+    if is_not_modified(request=request, etag=version['etag'], last_modified=version['last_modified']):
+        return not_modified(headers=headers)
+
     post = await AuthorService.get(post_id=post_id, user_id=user_id)
 
     if not post:
@@ -75,7 +184,9 @@ async def get_post(
             detail=f"Запись №{post_id} не найдена"
         )
 
-    return post
+    response.headers.update(headers)
+
+    return fast_response(post, headers=headers)
 
 @router.patch(
     '/author/posts/{post_id}',
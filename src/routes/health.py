@@ -0,0 +1,41 @@
+import asyncio
+
+from fastapi import APIRouter, Response, status
+from loguru import logger
+
+from src.database import mongo
+
+
+# Проверки состояния для оркестратора (без префикса API)
+router = APIRouter(tags=['Health'])
+
+_PING_TIMEOUT = 2  # Макс. время ожидания ответа MongoDB при проверке готовности (сек)
+
+@router.get('/healthz')
+async def healthz():
+    """
+    Проверка, что процесс приложения работает (без обращения к БД), и состояние пула соединений
+    """
+
+    return {'status': 'ok', 'pool': mongo.pool_monitor.stats()}
+
+@router.get('/readyz')
+async def readyz(response: Response):
+    """
+    Проверка готовности к приему запросов: доступность MongoDB, время ответа и состояние пула соединений
+    """
+
+    try:
+        latency = await asyncio.wait_for(mongo.ping(), timeout=_PING_TIMEOUT)
+
+    except Exception as exc:
+        logger.error(f'MongoDB недоступна: {exc.__class__.__name__}')
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+        return {'status': 'unavailable', 'pool': mongo.pool_monitor.stats()}
+
+    return {
+        'status': 'ok',
+        'ping_ms': round(latency, 2),
+        'pool': mongo.pool_monitor.stats()
+    }
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.services.metrics import MetricsService
+
+
+# Метрики для Prometheus (без префикса API)
+router = APIRouter(tags=['Metrics'])
+
+@router.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Метрики приложения в текстовом формате Prometheus
+    """
+
+    return PlainTextResponse(await MetricsService.render(), media_type='text/plain; version=0.0.4')
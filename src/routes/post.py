@@ -1,11 +1,18 @@
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from bson.objectid import ObjectId
 
 from src.routes.base import APIBaseRouter
 from src.schemas.post import (
-    PostOutWithAuthorSchema, ListPostWithAuthorsResponse
+    CountMode, PostOutWithAuthorSchema, ListPostWithAuthorsResponse
 )
+from src.services.export import ExportService
 from src.services.post import PostService
+from src.utils.check_authorization import require_user
+from src.utils.conditional import content_etag, is_not_modified, not_modified, validator_headers
+from src.utils.exeptions import InvalidCursor, InvalidExportToken
+from src.utils.response import fast_response
+from src.utils.throttle import export_throttle
 
 
 router = APIBaseRouter(tags=['Post guest'])
@@ -15,22 +22,98 @@ router = APIBaseRouter(tags=['Post guest'])
     response_model=ListPostWithAuthorsResponse,
 )
 async def get_posts(
+        request: Request,
+        response: Response,
         limit: int = 10,
         page: int = 1,
         search: str = '',
+        cursor: str | None = None,
+        category: str | None = None,
+        substring: bool = False,
+        count: CountMode = CountMode.exact,
 ):
     """
     Вывод всех постов (с данными авторов)
     """
 
-    posts = await PostService.get_list(search=search, page=page, limit=limit)
+    try:
+        posts_page = await PostService.get_list(
+            search=search,
+            page=page,
+            limit=limit,
+            cursor=cursor,
+            category=category,
+            substring=substring,
+            count=count
+        )
+
+    except InvalidCursor as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
 
-    return {
+    content = {
         'status': 'success',
-        'results': len(posts),
-        'posts': posts
+        'results': len(posts_page['posts']),
+        **posts_page
     }
 
+    # Клиенту с актуальной версией страницы тело не передается
+    headers = validator_headers(etag=content_etag(content))
+
+    if is_not_modified(request=request, etag=headers['ETag']):
+        return not_modified(headers=headers)
+
+    response.headers.update(headers)
+
+    return fast_response(content, headers=headers)
+
+@router.get(
+    '/posts/export',
+    response_class=StreamingResponse,
+)
+async def export_posts(
+        user: str | None = None,
+        after: str | None = None,
+        gzip: bool = False,
+        current_user_id: str = Depends(require_user)
+):
+    """
+    Потоковая выгрузка постов автора в формате NDJSON (по умолчанию - постов текущего пользователя,
+    все посты и посты других авторов выгружает только администратор: user=all либо user=<id автора>).
+    Записи выгружаются по порядку id: для продолжения прерванной выгрузки
+    id последней полученной записи передается в параметре after
+    """
+
+    # Параметры проверяются до начала передачи ответа
+    try:
+        user_id = None if user == 'all' else ExportService.parse_id(value=user or current_user_id, name='user')
+        after_id = ExportService.parse_id(value=after, name='after')
+
+    except InvalidExportToken as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+    if not await ExportService.allowed(current_user_id=current_user_id, user_id=user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='Выгрузка всех постов и постов других авторов доступна только администратору'
+        )
+
+    # Частота выгрузок одного пользователя ограничена (сверх лимита - ответ 429)
+    await export_throttle.admit(user_id=current_user_id)
+
+    headers = {'Content-Encoding': 'gzip'} if gzip else None
+
+    return StreamingResponse(
+        ExportService.stream(user_id=user_id, after=after_id, compress=gzip),
+        media_type='application/x-ndjson',
+        headers=headers
+    )
+
 @router.get(
     '/posts/{post_id}',
     status_code=status.HTTP_200_OK,
@@ -38,6 +121,8 @@ async def get_posts(
 )
 async def get_post(
         post_id: str,
+        request: Request,
+        response: Response,
 ):
     """
     Вывод записи по id (с данными автора)
@@ -50,6 +135,21 @@ async def get_post(
             detail=f"Невалидный номер записи: {post_id}"
         )
 
+    # Версия записи по легкому запросу (без объединения с данными автора)
+    version = await PostService.get_version(post_id=post_id)
+
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Запись №{post_id} не найдена"
+        )
+
+    headers = validator_headers(etag=version['etag'], last_modified=version['last_modified'])
+
+    # У клиента актуальная версия записи - полные данные не запрашиваются
+    if is_not_modified(request=request, etag=version['etag'], last_modified=version['last_modified']):
+        return not_modified(headers=headers)
+
     posts = await PostService.get(post_id=post_id)
 
     if len(posts) == 0:
@@ -58,4 +158,6 @@ async def get_post(
             detail=f"Запись №{post_id} не найдена"
         )
 
-    return posts[0]
+    response.headers.update(headers)
+
+    return fast_response(posts[0], headers=headers)
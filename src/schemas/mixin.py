@@ -3,6 +3,9 @@ from datetime import datetime
 from pydantic import BaseModel, validator
 
 
+DATETIME_FORMAT = "%d-%m-%Y %H:%M:%S"  # Формат вывода даты и времени в ответах API
+
+
 class DatetimeFormatterMixin(BaseModel):
     """
     Схема для преобразования даты создания и обновления в нужном формате
@@ -16,7 +19,7 @@ class DatetimeFormatterMixin(BaseModel):
         """
         Возвращаем дату и время создания поста в нужном формате
         """
-        formatted_datetime = post_datetime.strftime("%d-%m-%Y %H:%M:%S")
+        formatted_datetime = post_datetime.strftime(DATETIME_FORMAT)
 
         return formatted_datetime
 
@@ -25,6 +28,6 @@ class DatetimeFormatterMixin(BaseModel):
         """
         Возвращаем дату и время обновления поста в нужном формате
         """
-        formatted_datetime = post_datetime.strftime("%d-%m-%Y %H:%M:%S")
+        formatted_datetime = post_datetime.strftime(DATETIME_FORMAT)
 
         return formatted_datetime
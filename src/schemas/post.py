@@ -1,8 +1,10 @@
-from typing import List
+from enum import Enum
+from typing import List, Optional
 
-from pydantic import BaseModel, create_model
+from pydantic import BaseModel, conlist, create_model
 from bson import ObjectId
 
+from src.config import settings
 from src.schemas.base import BaseOutSchema
 from src.schemas.mixin import DatetimeFormatterMixin
 from src.schemas.user import UserOutSchema
@@ -57,6 +59,14 @@ class PostOutWithAuthorSchema(PostOutSchema):
     """
     user: UserOutSchema  # Вывод вложенной модели со всеми полями пользователя
 
+class CountMode(str, Enum):
+    """
+    Способ подсчета общего кол-ва постов в списке
+    """
+    none = 'none'  # Без подсчета (total = None)
+    exact = 'exact'  # Точный подсчет по фильтру в том же запросе, что и страница (по умолчанию)
+    estimated = 'estimated'  # Приблизительный / кэшированный подсчет (для списков без фильтрации)
+
 class ListPostResponse(BaseModel):
     """
     Схема для вывода списка постов
@@ -64,6 +74,8 @@ class ListPostResponse(BaseModel):
     status: str
     results: int
     posts: List[PostOutSchema]
+    next_cursor: Optional[str] = None  # Курсор для запроса следующей страницы
+    total: Optional[int] = None  # Общее кол-во постов, подходящих под фильтр
 
 class ListPostWithAuthorsResponse(BaseModel):
     """
@@ -72,3 +84,48 @@ class ListPostWithAuthorsResponse(BaseModel):
     status: str
     results: int
     posts: List[PostOutWithAuthorSchema]
+    next_cursor: Optional[str] = None  # Курсор для запроса следующей страницы
+    total: Optional[int] = None  # Общее кол-во постов, подходящих под фильтр
+
+class PostBulkUpdateSchema(PostInOptionalSchema):
+    """
+    Схема для обновления записи в пакете (id записи и необязательные поля)
+    """
+    id: str
+
+class BulkCreatePostRequest(BaseModel):
+    """
+    Схема для пакетного добавления записей (от 1 до AUTHOR_BULK_MAX_SIZE записей)
+    """
+    posts: conlist(PostSchema, min_items=1, max_items=settings.AUTHOR_BULK_MAX_SIZE)
+    ordered: bool = True  # True - остановка на первой ошибке, False - выполнение всех операций
+
+class BulkUpdatePostRequest(BaseModel):
+    """
+    Схема для пакетного обновления записей (от 1 до AUTHOR_BULK_MAX_SIZE записей)
+    """
+    posts: conlist(PostBulkUpdateSchema, min_items=1, max_items=settings.AUTHOR_BULK_MAX_SIZE)
+    ordered: bool = True
+
+class BulkDeletePostRequest(BaseModel):
+    """
+    Схема для пакетного удаления записей (от 1 до AUTHOR_BULK_MAX_SIZE записей)
+    """
+    ids: conlist(str, min_items=1, max_items=settings.AUTHOR_BULK_MAX_SIZE)
+    ordered: bool = True
+
+class BulkItemResult(BaseModel):
+    """
+    Схема для вывода результата операции над одной записью пакета
+    """
+    index: int  # Номер записи в запросе
+    id: Optional[str] = None
+    status: str  # created | updated | deleted | not_found | invalid | error | skipped
+    detail: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    """
+    Схема для вывода результатов пакетной операции
+    """
+    status: str
+    results: List[BulkItemResult]
@@ -3,7 +3,10 @@ from typing import Dict, List
 from src.serializers.user import user_response_entity
 
 
-async def post_entity(post) -> Dict:
+# Сериализаторы синхронные: преобразование не выполняет ввод-вывод,
+# поэтому вся страница курсора обрабатывается за один проход без переключений цикла событий
+
+def post_entity(post) -> Dict:
     """
     Сериализуем объект поста из БД в словарь
     """
@@ -19,30 +22,30 @@ async def post_entity(post) -> Dict:
     }
 
 
-async def populated_post_entity(post) -> Dict:
+def populated_post_entity(post) -> Dict:
     """
     Сериализуем объект поста из БД в словарь с вложенными данными о пользователе
     """
-    post_dict = await post_entity(post=post)
-    post_dict['user'] = await user_response_entity(user=post['user'])
+    post_dict = post_entity(post=post)
+    post_dict['user'] = user_response_entity(user=post['user'])
 
     return post_dict
 
 
-async def post_list_entity(posts) -> List:
+def post_list_entity(posts) -> List:
     """
     Сериализуем и возвращаем список постов
     """
 
-    posts_list = [await post_entity(post) for post in posts]
+    posts_list = [post_entity(post) for post in posts]
 
     return posts_list
 
-async def post_list_all_entity(posts) -> List:
+def post_list_all_entity(posts) -> List:
     """
     Сериализуем и возвращаем список постов
     """
 
-    posts_list = [await populated_post_entity(post) for post in posts]
+    posts_list = [populated_post_entity(post) for post in posts]
 
     return posts_list
@@ -2,7 +2,7 @@
 # Поскольку MongoDB использует документы BSON, создадим несколько сериализаторов,
 # чтобы преобразовать их в словари Python.
 
-async def user_entity(user) -> dict:
+def user_entity(user) -> dict:
     """
     Преобразовываем объект пользователя из БД в словарь
     :param user: объект пользователя
@@ -20,7 +20,7 @@ async def user_entity(user) -> dict:
         "updated_at": user["updated_at"]
     }
 
-async def user_response_entity(user) -> dict:
+def user_response_entity(user) -> dict:
     """
     Преобразовываем ответ с данными пользователя в словарь
     """
@@ -34,7 +34,7 @@ async def user_response_entity(user) -> dict:
         "updated_at": user["updated_at"]
     }
 
-async def embedded_user_response(user) -> dict:
+def embedded_user_response(user) -> dict:
     """
     Возвращаем словарь с основными данными пользователя
     """
@@ -45,8 +45,8 @@ async def embedded_user_response(user) -> dict:
         "photo": user["photo"]
     }
 
-async def user_list_entity(users) -> list:
+def user_list_entity(users) -> list:
     """
     Возвращаем список с данными пользователей
     """
-    return [await user_entity(user) for user in users]
+    return [user_entity(user) for user in users]
@@ -1,12 +1,20 @@
+import asyncio
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
 
 from src.database import Post
 from src.repositories.author import AuthorRepository
-from src.repositories.post import PostRepository
-from src.schemas.post import PostSchema, PostInOptionalSchema
+from src.schemas.post import CountMode, PostSchema, PostInOptionalSchema, PostBulkUpdateSchema
+from src.services.count import PostCountService
+from src.services.post import feed_cache
+from src.services.snapshot import AuthorSnapshotService
 from src.serializers.post import post_list_entity, post_entity
+from src.utils.conditional import make_etag
+from src.utils.cursor import next_page_cursor
+from src.utils.search import is_text_search
 
 
 class AuthorService:
@@ -20,21 +28,52 @@ class AuthorService:
             limit: int,
             page: int,
             search: str,
-            user_id: str
-    ) -> List[Post]:
+            user_id: str,
+            cursor: Optional[str] = None,
+            category: Optional[str] = None,
+            substring: bool = False,
+            count: CountMode = CountMode.exact
+    ) -> Dict:
         """
         Возврат списка постов автора
         :param limit: кол-во записей на странице
         :param page: номер страницы
         :param search: фраза для фильтрации
         :param user_id: id автора
-        :return: список с постами
+        :param cursor: курсор последнего поста предыдущей страницы
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :param count: способ подсчета общего кол-ва постов
+        :return: словарь со списком постов (posts), курсором следующей страницы (next_cursor,
+        None - если страница последняя) и общим кол-вом постов (total)
         """
 
-        posts_list = await AuthorRepository.get_list(limit=limit, page=page, search=search, user_id=user_id)
-        posts = await post_list_entity(posts_list)
+        params = {
+            'limit': limit, 'page': page, 'search': search, 'user_id': user_id, 'cursor': cursor,
+            'category': category, 'substring': substring,
+        }
+
+        # Точное общее кол-во подсчитывается в том же запросе, что и страница
+        if PostCountService.is_exact(mode=count, search=search, category=category):
+            posts_list, total = await AuthorRepository.get_list_with_total(**params)
+
+        else:
+            # Запрос страницы и кэшированного кол-ва выполняются одновременно
+            posts_list, total = await asyncio.gather(
+                AuthorRepository.get_list(**params),
+                PostCountService.author_total(
+                    mode=count, search=search, user_id=user_id, category=category, substring=substring
+                )
+            )
+        posts = post_list_entity(posts_list)
 
-        return posts
+        # При полнотекстовом поиске записи упорядочены по релевантности, курсор по дате к ним не применим
+        if is_text_search(search=search, substring=substring):
+            next_cursor = None
+        else:
+            next_cursor = next_page_cursor(posts=posts_list, limit=limit)
+
+        return {'posts': posts, 'next_cursor': next_cursor, 'total': total}
 
     @classmethod
     async def get(
@@ -52,10 +91,33 @@ class AuthorService:
         post_db = await AuthorRepository.get(post_id=post_id, user_id=user_id)
 
         if post_db:
-            return await post_entity(post_db)
+            return post_entity(post_db)
 
         return None
 
+    @classmethod
+    async def get_version(
+            cls,
+            post_id: str,
+            user_id: str
+    ) -> Optional[Dict]:
+        """
+        Версия записи автора для условных запросов без запроса полных данных записи
+        :param post_id: id записи
+        :param user_id: id автора
+        :return: словарь с ETag (etag) и датой последнего изменения (last_modified) либо None, если записи нет
+        """
+
+        post = await AuthorRepository.get_version(post_id=post_id, user_id=user_id)
+
+        if not post:
+            return None
+
+        return {
+            'etag': make_etag(post_id, post['updated_at']),
+            'last_modified': post['updated_at'],
+        }
+
     @classmethod
     async def create(
             cls,
@@ -74,9 +136,18 @@ class AuthorService:
         post_dict = post.dict()
         post_dict['user'] = ObjectId(user_id)
 
+        author = await AuthorSnapshotService.snapshot(user_id=user_id)
+
+        if author:
+            post_dict['author'] = author
+
         created_post = await AuthorRepository.create(post_data=post_dict)
-        post_db = await PostRepository.get_for_id(post_id=created_post.inserted_id)
-        new_post = await post_entity(post_db)
+        PostCountService.changed(user_id=user_id, delta=1)
+        await feed_cache.invalidate()
+
+        # Ответ формируется из сохраненных данных без повторного чтения из БД
+        post_dict['_id'] = created_post.inserted_id
+        new_post = post_entity(post_dict)
 
         return new_post
 
@@ -98,7 +169,8 @@ class AuthorService:
         updated_post = await AuthorRepository.update(post_id=post_id, user_id=user_id, post=post)
 
         if updated_post:
-            updated_post_dict = await post_entity(updated_post)
+            await feed_cache.invalidate()
+            updated_post_dict = post_entity(updated_post)
 
             return updated_post_dict
 
@@ -119,4 +191,225 @@ class AuthorService:
 
         deleted_post = await AuthorRepository.delete(post_id=post_id, user_id=user_id)
 
+        if deleted_post:
+            PostCountService.changed(user_id=user_id, delta=-1)
+            await feed_cache.invalidate()
+
         return deleted_post
+
+    @classmethod
+    async def bulk_create(
+            cls,
+            posts: List[PostSchema],
+            user_id: str,
+            ordered: bool = True
+    ) -> List[Dict]:
+        """
+        Пакетное добавление записей автором одним запросом
+        :param posts: данные новых записей
+        :param user_id: id автора
+        :param ordered: True - остановка на первой ошибке, False - выполнение всех операций
+        :return: список с результатами по каждой записи
+        """
+
+        now = datetime.utcnow()
+        author = await AuthorSnapshotService.snapshot(user_id=user_id)
+        results = []
+        operations = []
+
+        for index, post in enumerate(posts):
+            post.created_at = now
+            post.updated_at = now
+
+            post_dict = post.dict()
+            post_dict['_id'] = ObjectId()
+            post_dict['user'] = ObjectId(user_id)
+
+            if author:
+                post_dict['author'] = author
+
+            results.append(cls.__item_result(index=index, post_id=post_dict['_id']))
+            operations.append((index, InsertOne(post_dict)))
+
+        counts = await cls.__run_bulk(operations=operations, results=results, ordered=ordered, done='created')
+        created = counts['nInserted']
+
+        if created:
+            PostCountService.changed(user_id=user_id, delta=created)
+            await feed_cache.invalidate()
+
+        return results
+
+    @classmethod
+    async def bulk_update(
+            cls,
+            posts: List[PostBulkUpdateSchema],
+            user_id: str,
+            ordered: bool = True
+    ) -> List[Dict]:
+        """
+        Пакетное обновление записей автором одним запросом
+        :param posts: id и новые данные записей
+        :param user_id: id автора
+        :param ordered: True - остановка на первой ошибке, False - выполнение всех операций
+        :return: список с результатами по каждой записи
+        """
+
+        now = datetime.utcnow()
+        results, post_ids = await cls.__check_owned(post_ids=[post.id for post in posts], user_id=user_id)
+        operations = []
+
+        for index, post in enumerate(posts):
+            if results[index]['status'] != 'pending':
+                if ordered:
+                    break
+
+                continue
+
+            post.updated_at = now
+            fields = post.dict(exclude_none=True, exclude={'id'})
+            filter_criteria = {'_id': post_ids[index], 'user': ObjectId(user_id)}
+            operations.append((index, UpdateOne(filter_criteria, {'$set': fields})))
+
+        counts = await cls.__run_bulk(operations=operations, results=results, ordered=ordered, done='updated')
+        updated = counts['nMatched']
+
+        if updated:
+            await feed_cache.invalidate()
+
+        return results
+
+    @classmethod
+    async def bulk_delete(
+            cls,
+            post_ids: List[str],
+            user_id: str,
+            ordered: bool = True
+    ) -> List[Dict]:
+        """
+        Пакетное удаление записей автором одним запросом
+        :param post_ids: список id записей
+        :param user_id: id автора
+        :param ordered: True - остановка на первой ошибке, False - выполнение всех операций
+        :return: список с результатами по каждой записи
+        """
+
+        results, object_ids = await cls.__check_owned(post_ids=post_ids, user_id=user_id)
+        operations = []
+
+        for index in range(len(post_ids)):
+            if results[index]['status'] != 'pending':
+                if ordered:
+                    break
+
+                continue
+
+            filter_criteria = {'_id': object_ids[index], 'user': ObjectId(user_id)}
+            operations.append((index, DeleteOne(filter_criteria)))
+
+        # Счетчик постов изменяется на кол-во фактически удаленных записей
+        counts = await cls.__run_bulk(operations=operations, results=results, ordered=ordered, done='deleted')
+        deleted = counts['nRemoved']
+
+        if deleted:
+            PostCountService.changed(user_id=user_id, delta=-deleted)
+            await feed_cache.invalidate()
+
+        return results
+
+    @classmethod
+    def __item_result(cls, index: int, post_id: Any, status: str = 'pending', detail: str | None = None) -> Dict:
+        """
+        Результат операции над записью пакета
+        """
+        return {'index': index, 'id': str(post_id) if post_id else None, 'status': status, 'detail': detail}
+
+    @classmethod
+    async def __check_owned(cls, post_ids: List[str], user_id: str) -> Tuple[List[Dict], List[Optional[ObjectId]]]:
+        """
+        Проверка id записей пакета: невалидные и повторяющиеся id, записи, не принадлежащие автору,
+        исключаются из пакета
+        :return: список с результатами (pending - запись будет обработана) и список id записей
+        """
+
+        object_ids = [ObjectId(post_id) if ObjectId.is_valid(post_id) else None for post_id in post_ids]
+        owned = await AuthorRepository.get_owned_ids(
+            post_ids=list({post_id for post_id in object_ids if post_id}), user_id=user_id
+        )
+        seen = set()
+        results = []
+
+        for index, (post_id, object_id) in enumerate(zip(post_ids, object_ids)):
+            if not object_id:
+                result = cls.__item_result(
+                    index=index, post_id=post_id, status='invalid', detail=f'Невалидный номер записи: {post_id}'
+                )
+            elif object_id in seen:
+                result = cls.__item_result(
+                    index=index, post_id=post_id, status='invalid', detail=f'Запись №{post_id} уже есть в пакете'
+                )
+            elif object_id not in owned:
+                result = cls.__item_result(
+                    index=index, post_id=post_id, status='not_found', detail=f'Запись №{post_id} не найдена'
+                )
+            else:
+                result = cls.__item_result(index=index, post_id=post_id)
+
+            if object_id:
+                seen.add(object_id)
+
+            results.append(result)
+
+        return results, object_ids
+
+    @classmethod
+    async def __run_bulk(
+            cls,
+            operations: List[Tuple[int, Any]],
+            results: List[Dict],
+            ordered: bool,
+            done: str
+    ) -> Dict[str, int]:
+        """
+        Выполнение операций пакета одним запросом и заполнение результатов по каждой записи
+        :param operations: список пар (номер записи в запросе, операция)
+        :param results: результаты по записям запроса (обновляются)
+        :param ordered: True - остановка на первой ошибке, False - выполнение всех операций
+        :param done: статус успешно обработанной записи
+        :return: кол-во записей, фактически обработанных БД (nInserted, nMatched, nRemoved):
+        запись могла быть удалена другим запросом после проверки принадлежности автору
+        """
+
+        errors = {}
+        counts = {}
+
+        if operations:
+            try:
+                result = await AuthorRepository.bulk_write(
+                    operations=[operation for _, operation in operations], ordered=ordered
+                )
+                counts = result.bulk_api_result
+
+            except BulkWriteError as exc:
+                errors = {error['index']: error['errmsg'] for error in exc.details.get('writeErrors', [])}
+                counts = exc.details
+
+        # При ordered после первой ошибки операции не выполняются
+        stopped_at = min(errors) if ordered and errors else None
+
+        for operation_index, (index, _) in enumerate(operations):
+            if operation_index in errors:
+                results[index].update(status='error', detail=errors[operation_index])
+
+            elif stopped_at is not None and operation_index > stopped_at:
+                results[index]['status'] = 'skipped'
+
+            else:
+                results[index]['status'] = done
+
+        # Записи, не вошедшие в пакет из-за остановки на ошибке при проверке
+        for result in results:
+            if result['status'] == 'pending':
+                result['status'] = 'skipped'
+
+        return {key: counts.get(key, 0) for key in ('nInserted', 'nMatched', 'nRemoved')}
@@ -0,0 +1,114 @@
+from typing import Optional
+
+from src.config import settings
+from src.repositories.author import AuthorRepository
+from src.repositories.post import PostRepository
+from src.schemas.post import CountMode
+from src.utils.cache import TTLCache
+
+
+# Кэш счетчиков постов: общий (ключ _ALL) и по авторам (ключ - id автора)
+post_count_cache = TTLCache(maxsize=settings.POST_COUNT_CACHE_SIZE, ttl=settings.POST_COUNT_CACHE_TTL)
+
+_ALL = '*'
+
+
+class PostCountService:
+    """
+    Подсчет общего кол-ва постов для списков: точный (по умолчанию, вместе со страницей)
+    либо приблизительный / кэшированный (по запросу клиента)
+    """
+
+    @classmethod
+    def is_exact(cls, mode: CountMode, search: str, category: Optional[str] = None) -> bool:
+        """
+        Выполняется ли точный подсчет (приблизительный / кэшированный возможен только без фильтрации).
+        Точное кол-во запрашивается вместе со страницей ($facet), без отдельного запроса
+        :param mode: способ подсчета
+        :param search: фраза для фильтрации записей
+        :param category: категория постов
+        """
+
+        return mode == CountMode.exact or (mode == CountMode.estimated and bool(search or category))
+
+    @classmethod
+    async def total(
+            cls,
+            mode: CountMode,
+            search: str,
+            category: Optional[str] = None,
+            substring: bool = False
+    ) -> Optional[int]:
+        """
+        Общее кол-во постов в ленте
+        :param mode: способ подсчета
+        :param search: фраза для фильтрации записей
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :return: кол-во постов (None - без подсчета)
+        """
+
+        if mode == CountMode.none:
+            return None
+
+        # Приблизительный подсчет возможен только без фильтрации, иначе - точный
+        if mode == CountMode.estimated and not search and not category:
+            total = post_count_cache.get(_ALL)
+
+            if total is None:
+                total = await PostRepository.estimated_count()
+                post_count_cache.set(_ALL, total)
+
+            return total
+
+        return await PostRepository.count(search=search, category=category, substring=substring)
+
+    @classmethod
+    async def author_total(
+            cls,
+            mode: CountMode,
+            search: str,
+            user_id: str,
+            category: Optional[str] = None,
+            substring: bool = False
+    ) -> Optional[int]:
+        """
+        Общее кол-во постов автора
+        :param mode: способ подсчета
+        :param search: фраза для фильтрации
+        :param user_id: id автора
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :return: кол-во постов (None - без подсчета)
+        """
+
+        if mode == CountMode.none:
+            return None
+
+        # Кэшированный счетчик возможен только без фильтрации, иначе - точный подсчет
+        if mode == CountMode.estimated and not search and not category:
+            total = post_count_cache.get(str(user_id))
+
+            if total is None:
+                total = await AuthorRepository.count(search='', user_id=user_id)
+                post_count_cache.set(str(user_id), total)
+
+            return total
+
+        return await AuthorRepository.count(
+            search=search, user_id=user_id, category=category, substring=substring
+        )
+
+    @classmethod
+    def changed(cls, user_id: str, delta: int) -> None:
+        """
+        Обновление кэшированных счетчиков при добавлении / удалении постов автором
+        :param user_id: id автора
+        :param delta: изменение кол-ва постов
+        """
+
+        for key in (_ALL, str(user_id)):
+            total = post_count_cache.get(key)
+
+            if total is not None:
+                post_count_cache.set(key, max(total + delta, 0))
@@ -0,0 +1,111 @@
+import zlib
+from typing import AsyncIterator, Optional, Tuple
+
+import orjson
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+
+from src.config import settings
+from src.repositories.post import PostRepository
+from src.serializers.post import post_entity
+from src.services.user import UserService
+from src.utils.exeptions import InvalidExportToken
+from src.utils.response import json_default
+
+
+class ExportService:
+    """
+    Потоковая выгрузка постов в формате NDJSON (одна запись - одна строка JSON).
+    Строки выгружаются по порядку id, поэтому id последней полученной строки служит токеном продолжения
+    """
+
+    @classmethod
+    def parse_id(cls, value: Optional[str], name: str) -> Optional[ObjectId]:
+        """
+        Проверка id автора либо токена продолжения (до начала выгрузки, чтобы вернуть ошибку клиенту)
+        :param value: переданное значение
+        :param name: название параметра для текста ошибки
+        :return: ObjectId либо None, если значение не передано
+        """
+
+        if not value:
+            return None
+
+        try:
+            return ObjectId(value)
+
+        except (InvalidId, TypeError):
+            raise InvalidExportToken(f'Некорректное значение параметра {name}')
+
+    @classmethod
+    async def allowed(cls, current_user_id: str, user_id: Optional[ObjectId]) -> bool:
+        """
+        Проверка доступа к выгрузке: свои посты выгружает любой пользователь,
+        все посты и посты других авторов - только администратор
+        :param current_user_id: id текущего пользователя
+        :param user_id: id автора выгружаемых постов (None - посты всех авторов)
+        :return: True - выгрузка разрешена
+        """
+
+        if user_id is not None and str(user_id) == str(current_user_id):
+            return True
+
+        user = await UserService.get_cached(user_id=current_user_id)
+
+        return bool(user) and user.get('role') == 'admin'
+
+    @classmethod
+    async def batches(
+            cls,
+            user_id: Optional[ObjectId] = None,
+            after: Optional[ObjectId] = None,
+            batch_size: Optional[int] = None
+    ) -> AsyncIterator[Tuple[bytes, str]]:
+        """
+        Выгрузка постов пачками строк NDJSON
+        :param user_id: id автора (None - посты всех авторов)
+        :param after: токен продолжения (id последнего выгруженного поста)
+        :param batch_size: кол-во постов в пачке (по умолчанию EXPORT_BATCH_SIZE)
+        :return: асинхронный итератор по парам (строки пачки, токен продолжения после этой пачки)
+        """
+
+        async for posts in PostRepository.iter_batches(
+                batch_size=batch_size or settings.EXPORT_BATCH_SIZE, user_id=user_id, after=after
+        ):
+            lines = b''.join(
+                orjson.dumps(
+                    post_entity(post),
+                    default=json_default,
+                    option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_APPEND_NEWLINE
+                )
+                for post in posts
+            )
+
+            yield lines, str(posts[-1]['_id'])
+
+    @classmethod
+    async def stream(
+            cls,
+            user_id: Optional[ObjectId] = None,
+            after: Optional[ObjectId] = None,
+            compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        """
+        Поток выгрузки для HTTP-ответа
+        :param user_id: id автора (None - посты всех авторов)
+        :param after: токен продолжения (id последнего выгруженного поста)
+        :param compress: сжимать поток gzip (каждая пачка дописывается в поток сразу, без буферизации)
+        :return: асинхронный итератор по частям ответа
+        """
+
+        compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 - формат gzip
+
+        async for lines, _ in cls.batches(user_id=user_id, after=after):
+            if compressor:
+                yield compressor.compress(lines) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+            else:
+                yield lines
+
+        if compressor:
+            yield compressor.flush()
@@ -0,0 +1,139 @@
+import asyncio
+from typing import Dict
+
+from loguru import logger
+
+from src.config import settings
+from src.database import mongo
+from src.services.count import post_count_cache
+from src.services.post import feed_cache
+from src.services.user import user_cache
+from src.utils.limiter import request_limiters
+from src.utils.metrics import MultiprocessCollector, merge_snapshots, metrics, render
+from src.utils.password import password_executor
+from src.utils.single_flight import single_flight
+from src.utils.throttle import auth_throttle, export_throttle
+
+
+# Общий каталог снимков метрик workers (None - метрики только текущего процесса)
+collector = MultiprocessCollector(settings.METRICS_MULTIPROC_DIR) if settings.METRICS_MULTIPROC_DIR else None
+
+# Накопленные с запуска процесса значения статистики компонентов (выводятся счетчиками *_total),
+# остальные значения - текущее состояние (gauge)
+_CUMULATIVE_STATS = {
+    'hits', 'stale_hits', 'misses', 'admitted', 'rejected', 'rejected_queue_full', 'rejected_timeout',
+    'wait_seconds_total', 'run_seconds_total', 'check_out_failed', 'cleared', 'calls', 'coalesced',
+}
+
+
+class MetricsService:
+    """
+    Сбор метрик приложения и вывод в текстовом формате Prometheus
+    """
+
+    @classmethod
+    def __set_stats(cls, prefix: str, stats: Dict[str, float], labels: Dict[str, str]) -> None:
+        """
+        Перенос статистики компонента в метрики (значения процесса на момент сбора):
+        накопленные значения - счетчиками с суффиксом _total, текущее состояние - gauge
+        """
+
+        for name, value in stats.items():
+            if name in _CUMULATIVE_STATS:
+                metrics.set_total(f'{prefix}_{name.removesuffix("_total")}_total', labels, value)
+            else:
+                metrics.set(f'{prefix}_{name}', labels, value)
+
+    @classmethod
+    def collect_stats(cls) -> None:
+        """
+        Перенос в метрики статистики кэшей, пулов, объединения запросов и ограничений нагрузки
+        """
+
+        for name, cache in (('user', user_cache), ('post_count', post_count_cache)):
+            cls.__set_stats('app_cache', cache.stats(), {'cache': name})
+
+        cls.__set_stats('app_cache', feed_cache.stats(), {'cache': 'feed'})
+        cls.__set_stats('app_executor', password_executor.stats(), {'executor': password_executor.name})
+        cls.__set_stats('mongo_pool', mongo.pool_monitor.stats(), {})
+
+        for query, stats in single_flight.stats().items():
+            totals = {'calls': stats['calls'], 'coalesced': stats['coalesced']}
+            cls.__set_stats('app_single_flight', totals, {'query': query})
+
+        for group, limiter in request_limiters.items():
+            cls.__set_stats('app_limiter', limiter.stats(), {'group': group})
+
+        throttle = auth_throttle.stats()
+
+        for action, value in throttle['admitted'].items():
+            metrics.set_total('app_auth_throttle_admitted_total', {'action': action}, value)
+
+        for reason, value in throttle['rejected'].items():
+            action, scope = reason.split(':', 1)
+            metrics.set_total('app_auth_throttle_rejected_total', {'action': action, 'scope': scope}, value)
+
+        cls.__set_stats('app_throttle', export_throttle.stats(), {'action': export_throttle.action})
+
+    @classmethod
+    def __collect_snapshot(cls) -> Dict:
+        """
+        Снимок метрик текущего процесса со статистикой компонентов (в цикле событий: без ввода-вывода)
+        """
+
+        cls.collect_stats()
+
+        return metrics.snapshot()
+
+    @classmethod
+    async def flush(cls) -> None:
+        """
+        Запись снимка метрик текущего процесса в общий каталог.
+        Запись выполняется в пуле потоков, чтобы не блокировать цикл событий
+        """
+
+        if not collector:
+            cls.collect_stats()
+            return
+
+        snapshot = cls.__collect_snapshot()
+        await asyncio.get_running_loop().run_in_executor(None, collector.write, snapshot)
+
+    @classmethod
+    def __render_all(cls, snapshot: Dict) -> str:
+        """
+        Запись снимка текущего процесса и объединение снимков всех процессов (выполняется в пуле потоков)
+        """
+
+        collector.write(snapshot)
+
+        return render(merge_snapshots(collector.collect()))
+
+    @classmethod
+    async def render(cls) -> str:
+        """
+        Метрики всех процессов (либо текущего процесса без общего каталога) в текстовом формате Prometheus.
+        Чтение и запись файлов снимков выполняются в пуле потоков, чтобы не блокировать цикл событий
+        """
+
+        snapshot = cls.__collect_snapshot()
+
+        if not collector:
+            return render(merge_snapshots([snapshot]))
+
+        return await asyncio.get_running_loop().run_in_executor(None, cls.__render_all, snapshot)
+
+    @classmethod
+    async def flush_periodically(cls) -> None:
+        """
+        Периодическая запись снимка метрик (фоновая задача на время работы приложения),
+        чтобы метрики процесса были доступны при запросе /metrics к любому другому процессу
+        """
+        while True:
+            await asyncio.sleep(settings.METRICS_FLUSH_INTERVAL)
+
+            try:
+                await cls.flush()
+
+            except Exception as exc:
+                logger.error(f'Не удалось записать метрики: {exc}')
@@ -1,8 +1,29 @@
-from typing import Dict, List
+import asyncio
+from typing import Dict, List, Optional
 
+from src.config import settings
 from src.database import Post
 from src.repositories.post import PostRepository
+from src.schemas.post import CountMode
+from src.services.count import PostCountService
+from src.services.user import UserService
 from src.serializers.post import post_list_all_entity
+from src.utils.conditional import make_etag
+from src.utils.cursor import next_page_cursor
+from src.utils.response_cache import ResponseCache, load_backend
+from src.utils.search import is_text_search
+
+
+# Кэш страниц общей ленты (сбрасывается при добавлении, изменении и удалении постов)
+feed_cache = ResponseCache(
+    backend=load_backend(
+        path=settings.FEED_CACHE_BACKEND,
+        maxsize=settings.FEED_CACHE_SIZE,
+        ttl=settings.FEED_CACHE_TTL + settings.FEED_CACHE_STALE_TTL
+    ),
+    ttl=settings.FEED_CACHE_TTL,
+    stale_ttl=settings.FEED_CACHE_STALE_TTL
+)
 
 
 class PostService:
@@ -15,20 +36,115 @@ class PostService:
             cls,
             limit: int,
             page: int,
-            search: str
-    ) -> List[Dict]:
+            search: str,
+            cursor: Optional[str] = None,
+            category: Optional[str] = None,
+            substring: bool = False,
+            count: CountMode = CountMode.exact
+    ) -> Dict:
         """
         Возврат списка постов
         :param limit: кол-во выводимых записей на странице
         :param page: номер текущей страницы
         :param search: фраза для фильтрации записей
-        :return: список с записями
+        :param cursor: курсор последнего поста предыдущей страницы
+        :param category: категория постов
+        :param substring: поиск по частичному совпадению вместо полнотекстового
+        :param count: способ подсчета общего кол-ва постов
+        :return: словарь со списком записей (posts), курсором следующей страницы (next_cursor,
+        None - если страница последняя) и общим кол-вом постов (total)
+        """
+
+        async def load() -> Dict:
+            return await cls.__load_list(
+                limit=limit,
+                page=page,
+                search=search,
+                cursor=cursor,
+                category=category,
+                substring=substring,
+                count=count
+            )
+
+        if not settings.FEED_CACHE_ENABLED:
+            return await load()
+
+        key = ('feed', limit, page, cursor, search, category, substring, count.value)
+
+        return await feed_cache.get_or_load(key=key, loader=load)
+
+    @classmethod
+    def __use_loader(cls) -> bool:
+        """
+        Запрос данных авторов загрузчиком пачкой (если данные авторов не хранятся в постах)
+        """
+
+        return settings.POST_AUTHOR_LOADER and not settings.POST_AUTHOR_SNAPSHOT
+
+    @classmethod
+    async def __with_authors(cls, posts: List[Post]) -> List[Post]:
+        """
+        Подстановка данных авторов вместо id автора одним запросом на все записи (как после $lookup)
+        :param posts: список постов с id автора в поле user
+        :return: список постов с данными авторов (посты удаленных авторов исключаются, как при $unwind)
         """
 
-        posts_list = await PostRepository.get_list(search=search, page=page, limit=limit)
-        posts = await post_list_all_entity(posts_list)
+        authors = await UserService.loader().load_many(str(post['user']) for post in posts)
 
-        return posts
+        # Посты не изменяются на месте: результат объединенного запроса (coalesce) общий для всех вызовов
+        return [{**post, 'user': author} for post, author in zip(posts, authors) if author]
+
+    @classmethod
+    async def __load_list(
+            cls,
+            limit: int,
+            page: int,
+            search: str,
+            cursor: Optional[str],
+            category: Optional[str],
+            substring: bool,
+            count: CountMode
+    ) -> Dict:
+        """
+        Запрос списка постов из БД (без кэша), параметры - как у get_list
+        """
+
+        params = {
+            'search': search, 'page': page, 'limit': limit, 'cursor': cursor, 'category': category,
+            'substring': substring,
+        }
+
+        # Точное общее кол-во подсчитывается в том же запросе, что и страница
+        if PostCountService.is_exact(mode=count, search=search, category=category):
+            posts_list, total = await PostRepository.get_list_with_total(
+                **params, with_authors=not cls.__use_loader()
+            )
+
+        else:
+            # Без загрузчика данные авторов запрашиваются объединением с users в том же запросе
+            get_page = PostRepository.find_list if cls.__use_loader() else PostRepository.get_list
+
+            # Запрос страницы и приблизительного / кэшированного кол-ва выполняются одновременно
+            posts_list, total = await asyncio.gather(
+                get_page(**params),
+                PostCountService.total(mode=count, search=search, category=category, substring=substring)
+            )
+
+        # При полнотекстовом поиске записи упорядочены по релевантности, курсор по дате к ним не применим.
+        # Курсор определяется по странице до исключения постов удаленных авторов
+        if is_text_search(search=search, substring=substring):
+            next_cursor = None
+        else:
+            next_cursor = next_page_cursor(posts=posts_list, limit=limit)
+
+        if cls.__use_loader():
+            posts_list = await cls.__with_authors(posts_list)
+        else:
+            posts_list = [post for post in posts_list if post.get('user')]
+
+        posts = post_list_all_entity(posts_list)
+
+        return {'posts': posts, 'next_cursor': next_cursor, 'total': total}
 
     @classmethod
     async def get(cls, post_id: str) -> List[Post]:
@@ -38,7 +154,40 @@ class PostService:
         :return: список с результатом
         """
 
-        result = await PostRepository.get_with_author_data(post_id=post_id)
-        post = await post_list_all_entity(result)
+        if cls.__use_loader():
+            result = await PostRepository.find_one(post_id=post_id)
+            result = await cls.__with_authors([result] if result else [])
+
+        else:
+            result = await PostRepository.get_with_author_data(post_id=post_id)
+
+        post = post_list_all_entity(result)
 
         return post
+
+    @classmethod
+    async def get_version(cls, post_id: str) -> Optional[Dict]:
+        """
+        Версия записи для условных запросов без запроса полных данных записи и автора
+        :param post_id: id поста
+        :return: словарь с ETag (etag) и датой последнего изменения (last_modified) либо None, если записи нет
+        """
+
+        post = await PostRepository.get_version(post_id=post_id)
+
+        if not post:
+            return None
+
+        # В ответ входят данные автора, поэтому версия учитывает и дату его обновления
+        # (автор запоминается загрузчиком запроса и не запрашивается повторно при выводе записи)
+        author = await UserService.loader().load(str(post['user']))
+
+        if not author:
+            return None
+
+        modified = [date for date in (post['updated_at'], author.get('updated_at')) if date]
+
+        return {
+            'etag': make_etag(post_id, post['updated_at'], author.get('updated_at')),
+            'last_modified': max(modified) if modified else None,
+        }
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Set
+
+from loguru import logger
+
+from src.config import settings
+from src.repositories.post import PostRepository
+from src.repositories.user import UserRepository
+from src.services.post import feed_cache
+from src.services.user import UserService
+
+
+class AuthorSnapshotService:
+    """
+    Копии данных автора в постах (режим POST_AUTHOR_SNAPSHOT): запись при добавлении поста и обновление в фоне
+    после изменения пользователя (UserService.invalidate) либо изменения пользователей в БД напрямую
+    (периодическая проверка по users.updated_at)
+    """
+
+    __tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    async def snapshot(cls, user_id: str) -> dict | None:
+        """
+        Копия данных автора для нового поста (данные пользователя берутся из общего кэша)
+        :param user_id: id автора
+        :return: копия данных автора либо None, если режим выключен или пользователь не найден
+        """
+
+        if not settings.POST_AUTHOR_SNAPSHOT:
+            return None
+
+        user = await UserService.get_cached(user_id=user_id)
+
+        return PostRepository.author_snapshot(user=user) if user else None
+
+    @classmethod
+    def user_changed(cls, user_id: str) -> None:
+        """
+        Обновление копий данных пользователя в его постах в фоне, не задерживая ответ
+        (вызывается после сохранения изменений пользователя в БД)
+        :param user_id: id пользователя
+        """
+
+        if not settings.POST_AUTHOR_SNAPSHOT:
+            return
+
+        task = asyncio.create_task(cls.fan_out(user_id=user_id))
+        cls.__tasks.add(task)
+        task.add_done_callback(cls.__tasks.discard)
+
+    @classmethod
+    async def fan_out(cls, user_id: str) -> int:
+        """
+        Обновление копий данных автора во всех его постах (данные автора читаются из БД в момент обновления,
+        поэтому при нескольких изменениях подряд в постах остается последняя версия)
+        :param user_id: id пользователя
+        :return: кол-во обновленных постов
+        """
+
+        try:
+            user = await UserRepository.get_for_id(user_id=user_id)
+
+            if not user:
+                return 0
+
+            updated = await PostRepository.set_author_snapshot(user=user)
+
+        except Exception as exc:
+            logger.error(f'Не удалось обновить данные автора {user_id} в постах: {exc}')
+            return 0
+
+        if updated:
+            await feed_cache.invalidate()
+
+        logger.debug(f'Данные автора {user_id} обновлены в постах: {updated}')
+
+        return updated
+
+    @classmethod
+    async def refresh_stale(cls, since: datetime) -> int:
+        """
+        Обновление устаревших копий данных пользователей, измененных после указанного времени
+        :param since: время предыдущей проверки
+        :return: кол-во обновленных постов
+        """
+
+        updated = 0
+
+        for user in await UserRepository.get_updated_since(since=since):
+            updated += await PostRepository.set_author_snapshot(user=user)
+
+        if updated:
+            await feed_cache.invalidate()
+            logger.info(f'Обновлено устаревших копий данных авторов в постах: {updated}')
+
+        return updated
+
+    @classmethod
+    async def refresh_stale_periodically(cls) -> None:
+        """
+        Периодическое обновление копий данных пользователей, измененных в БД напрямую (фоновая задача на время
+        работы приложения). Проверяются пользователи, измененные после предыдущей проверки; первая проверка
+        охватывает два интервала до запуска (изменения за время остановки приложения обновляются командой
+        python -m src.migrate_author_snapshots --all)
+        """
+
+        if not settings.POST_AUTHOR_SNAPSHOT:
+            return
+
+        interval = settings.AUTHOR_SNAPSHOT_REFRESH_INTERVAL
+        since = datetime.utcnow() - timedelta(seconds=2 * interval)
+
+        while True:
+            await asyncio.sleep(interval)
+
+            # Время проверки фиксируется до запроса: изменения во время проверки попадут в следующую
+            checked_at = datetime.utcnow()
+
+            try:
+                await cls.refresh_stale(since=since)
+                since = checked_at
+
+            except Exception as exc:
+                logger.error(f'Не удалось обновить копии данных авторов в постах: {exc}')
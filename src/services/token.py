@@ -1,26 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+
 from fastapi import Response
 from fastapi_jwt_auth import AuthJWT
+from loguru import logger
 
+from src.config import settings
+from src.repositories.token import RevokedTokenRepository
+from src.utils.revocation import revocation_list
 from src.utils.token import SetTokenUtils
 
 
 class TokenService:
     """
-    Установка и обновление токена
+    Установка, обновление и отзыв токена
     """
 
     @classmethod
-    async def refresh(cls, response: Response, user_id: int, Authorize: AuthJWT) -> None:
+    def user_claims(cls, user: Dict) -> Dict:
+        """
+        Данные пользователя, записываемые в токен доступа для проверки авторизации без запроса в БД
+        :param user: документ либо словарь с данными пользователя
+        """
+        return {'verified': user['verified'], 'role': user['role']}
+
+    @classmethod
+    async def refresh(
+            cls,
+            response: Response,
+            user_id: int,
+            Authorize: AuthJWT,
+            claims: Dict | None = None
+    ) -> None:
         """
         Установка токенов в куки
         """
-        await SetTokenUtils.access(response=response, user_id=user_id, Authorize=Authorize)
+        await SetTokenUtils.access(response=response, user_id=user_id, Authorize=Authorize, claims=claims)
         await SetTokenUtils.logged(response=response)
 
     @classmethod
-    async def set_cookies(cls, response: Response, user_id: int, Authorize: AuthJWT) -> None:
+    async def set_cookies(
+            cls,
+            response: Response,
+            user_id: int,
+            Authorize: AuthJWT,
+            claims: Dict | None = None
+    ) -> None:
         """
         Установка токенов в куки
         """
-        await cls.refresh(response=response, user_id=user_id, Authorize=Authorize)
+        await cls.refresh(response=response, user_id=user_id, Authorize=Authorize, claims=claims)
         await SetTokenUtils.refresh(response=response, user_id=user_id, Authorize=Authorize)
+
+    @classmethod
+    async def __revoke_claims(cls, raw_token: Dict | None) -> None:
+        """
+        Отзыв токена по его данным (до истечения срока действия он больше не принимается)
+        """
+        jti = raw_token.get('jti') if raw_token else None
+
+        if not jti:
+            return
+
+        expires_at = datetime.utcfromtimestamp(raw_token['exp'])
+
+        await RevokedTokenRepository.create(jti=jti, expires_at=expires_at)
+        revocation_list.add(jti=jti, expires_at=expires_at)
+
+    @classmethod
+    async def revoke(cls, Authorize: AuthJWT, refresh_token: str | None = None) -> None:
+        """
+        Отзыв текущего токена доступа и токена обновления (иначе по токену обновления
+        после выхода можно получить новый токен доступа)
+        :param Authorize: объект AuthJWT с проверенным токеном доступа
+        :param refresh_token: токен обновления из куки запроса
+        """
+        await cls.__revoke_claims(Authorize.get_raw_jwt())
+
+        if not refresh_token:
+            return
+
+        try:
+            refresh_claims = Authorize.get_raw_jwt(encoded_token=refresh_token)
+
+        except Exception as exc:
+            # Недействительный или истекший токен обновления и так не будет принят
+            logger.debug(f'Токен обновления не отозван: {exc.__class__.__name__}')
+            return
+
+        await cls.__revoke_claims(refresh_claims)
+
+    @classmethod
+    async def load_revoked(cls) -> None:
+        """
+        Загрузка в память отозванных токенов из БД
+        (при повторных вызовах догружаются только токены, отозванные после предыдущей загрузки)
+        """
+        started_at = datetime.utcnow()
+        revoked_after = None
+
+        if revocation_list.refreshed_at:
+            # Запас на расхождение часов и запись, не завершенную к моменту предыдущей загрузки
+            revoked_after = revocation_list.refreshed_at - timedelta(seconds=settings.REVOCATION_REFRESH_INTERVAL)
+
+        tokens = await RevokedTokenRepository.get_list(revoked_after=revoked_after)
+
+        for token in tokens:
+            revocation_list.add(jti=token['_id'], expires_at=token['expires_at'])
+
+        revocation_list.prune()
+        revocation_list.refreshed_at = started_at
+
+    @classmethod
+    async def refresh_revoked_periodically(cls) -> None:
+        """
+        Периодическое обновление списка отозванных токенов (фоновая задача на время работы приложения)
+        """
+        while True:
+            await asyncio.sleep(settings.REVOCATION_REFRESH_INTERVAL)
+
+            try:
+                await cls.load_revoked()
+
+            except Exception as exc:
+                logger.error(f'Не удалось обновить список отозванных токенов: {exc}')
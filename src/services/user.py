@@ -1,16 +1,106 @@
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List
 
 from loguru import logger
+from pymongo.errors import DuplicateKeyError
 
+from src.config import settings
 from src.repositories.user import UserRepository
 from src.schemas.user import CreateUserSchema
 from src.serializers.user import user_response_entity
+from src.utils.cache import TTLCache
+from src.utils.exeptions import UserAlreadyExists
+from src.utils.loader import BatchLoader
 from src.utils.password import hash_password
 
 
+# Кэш пользователей по id (документы из БД без хэша пароля)
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+# Загрузчик пользователей текущего запроса (у каждого запроса свой контекст)
+_user_loader: ContextVar[BatchLoader | None] = ContextVar('user_loader', default=None)
+
+
 class UserService:
 
+    @classmethod
+    async def get_cached(cls, user_id: str) -> Dict | None:
+        """
+        Возврат документа пользователя по id (без хэша пароля) из кэша либо из БД
+        :param user_id: id пользователя
+        :return: документ пользователя либо None
+        """
+
+        user = user_cache.get(str(user_id))
+
+        if user is None:
+            user_db = await UserRepository.get_for_id(user_id=user_id)
+
+            if not user_db:
+                return None
+
+            user = {key: value for key, value in user_db.items() if key != 'password'}
+            user_cache.set(str(user_id), user)
+
+        return user
+
+    @classmethod
+    async def get_many_cached(cls, user_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Возврат документов пользователей (без хэша пароля) из кэша, отсутствующие в кэше - одним запросом к БД
+        :param user_ids: список id пользователей
+        :return: словарь {id пользователя: документ} (не найденных пользователей в словаре нет)
+        """
+
+        users = {}
+        missing = []
+
+        for user_id in user_ids:
+            user = user_cache.get(str(user_id))
+
+            if user is None:
+                missing.append(str(user_id))
+            else:
+                users[str(user_id)] = user
+
+        if missing:
+            for user in await UserRepository.get_many(user_ids=missing):
+                users[str(user['_id'])] = user
+                user_cache.set(str(user['_id']), user)
+
+        return users
+
+    @classmethod
+    def loader(cls) -> BatchLoader:
+        """
+        Загрузчик пользователей текущего запроса: пользователи, запрошенные одновременно, загружаются
+        одним запросом через общий кэш, повторный запрос в рамках того же запроса не обращается к кэшу и БД
+        :return: загрузчик (ключ - id пользователя строкой)
+        """
+
+        loader = _user_loader.get()
+
+        if loader is None:
+            loader = BatchLoader(batch_load=cls.get_many_cached)
+            _user_loader.set(loader)
+
+        return loader
+
+    @classmethod
+    def invalidate(cls, user_id: str) -> None:
+        """
+        Удаление пользователя из кэша (вызывается при любом изменении пользователя в БД)
+        и обновление копий его данных в постах в фоне (режим POST_AUTHOR_SNAPSHOT)
+        :param user_id: id пользователя
+        """
+
+        # Импорт при вызове: сервис копий зависит от сервиса постов, который использует UserService
+        from src.services.snapshot import AuthorSnapshotService
+
+        user_cache.invalidate(str(user_id))
+        AuthorSnapshotService.user_changed(user_id=str(user_id))
+
     @classmethod
     async def get(cls, user_id: str) -> Dict | None:
         """
@@ -19,11 +109,14 @@ class UserService:
         :return: словарь с данными пользователя либо None
         """
 
-        # Поиск пользователя в БД
-        user = await UserRepository.get_for_id(user_id=user_id)
+        # Поиск пользователя в кэше либо в БД
+        user = await cls.get_cached(user_id=user_id)
+
+        if not user:
+            return None
 
         # Сериализация данных
-        user_data = await user_response_entity(user)
+        user_data = user_response_entity(user)
 
         return user_data
 
@@ -38,21 +131,32 @@ class UserService:
         user_data.role = 'user'
         user_data.verified = True
         user_data.email = user_data.email.lower()
+
+        # Занятый email проверяется по индексу до хэширования пароля: повторные регистрации
+        # не расходуют потоки bcrypt
+        if await UserRepository.email_exists(email=user_data.email):
+            raise UserAlreadyExists('Пользователь с таким email уже зарегистрирован')
+
         user_data.created_at = datetime.utcnow()
         user_data.updated_at = user_data.created_at
         user_data.password = await hash_password(user_data.password)  # Сохраняем хэш пароля в БД
 
         del user_data.password_confirm  # Удаляем из словаря с входными данными пароль-подтверждение
 
-        # Добавляем пользователя в БД (вернется id пользователя)
-        user_id = await UserRepository.create(user_data=user_data)
+        # Добавляем пользователя в БД одним запросом (вернется сохраненный документ, повторное чтение не нужно),
+        # одновременная регистрация с тем же email определяется по ошибке уникального индекса
+        try:
+            new_user_db = await UserRepository.create(user_data=user_data)
+
+        except DuplicateKeyError:
+            raise UserAlreadyExists('Пользователь с таким email уже зарегистрирован')
 
-        # Получаем только что созданного пользователя из БД по id
-        new_user_db = await UserRepository.get_for_id(user_id=user_id)
+        # У нового пользователя нет постов, поэтому обновлять копии его данных не нужно
+        user_cache.invalidate(str(new_user_db['_id']))
 
         # Передав в сериализатор user_response_entity данные пользователя,
         # мы тем самым удаляем из ответа чувствительные данные (пароль)
-        new_user = await user_response_entity(new_user_db)
+        new_user = user_response_entity(new_user_db)
         logger.info(f'Пользователь успешно зарегистрирован')
 
         return new_user
@@ -4,6 +4,8 @@ from src.routes.auth import router as auth_router
 from src.routes.user import router as user_router
 from src.routes.post import router as post_router
 from src.routes.author import router as author_router
+from src.routes.health import router as health_router
+from src.routes.metrics import router as metrics_router
 
 
 
@@ -16,5 +18,7 @@ def register_routers(app: FastAPI) -> FastAPI:
     app.include_router(user_router)
     app.include_router(post_router)
     app.include_router(author_router)
+    app.include_router(health_router)
+    app.include_router(metrics_router)
 
     return app
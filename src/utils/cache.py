@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру кэш в памяти процесса со сроком жизни записей.
+    При переполнении вытесняется запись, к которой дольше всего не обращались (LRU)
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        :param maxsize: максимальное кол-во записей
+        :param ttl: срок жизни записи в секундах
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Возврат значения по ключу
+        :param key: ключ
+        :return: значение либо None, если записи нет или срок ее жизни истек
+        """
+        item = self.__data.get(key)
+
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self.__data[key]
+
+            self.misses += 1
+            return None
+
+        self.__data.move_to_end(key)
+        self.hits += 1
+
+        return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Сохранение значения по ключу
+        :param key: ключ
+        :param value: значение
+        """
+        self.__data[key] = (time.monotonic() + self.ttl, value)
+        self.__data.move_to_end(key)
+
+        while len(self.__data) > self.maxsize:
+            self.__data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Удаление записи по ключу
+        :param key: ключ
+        """
+        self.__data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Удаление всех записей
+        """
+        self.__data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Статистика использования кэша
+        :return: словарь с кол-вом записей, попаданий и промахов
+        """
+        return {
+            'size': len(self.__data),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
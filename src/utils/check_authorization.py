@@ -2,9 +2,10 @@ from fastapi import Depends, HTTPException, status
 from fastapi_jwt_auth import AuthJWT
 from loguru import logger
 
-from src.repositories.user import UserRepository
-from src.serializers.user import user_entity
+from src.config import settings
+from src.services.user import UserService
 from src.utils.exeptions import UserNotFound, NotVerified
+from src.utils.revocation import revocation_list
 
 
 async def require_user(Authorize: AuthJWT = Depends()) -> int:
@@ -35,8 +36,23 @@ async def require_user(Authorize: AuthJWT = Depends()) -> int:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail='Токен недействителен или срок его действия истек')
 
-    user_db = await UserRepository.get_for_id(user_id=user_id)
-    user = await user_entity(user_db)
+    claims = Authorize.get_raw_jwt()
+
+    # Токен отозван (выход из учетной записи) - проверка по списку в памяти, без запроса в БД
+    if revocation_list.is_revoked(claims.get('jti')):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail='Токен недействителен или срок его действия истек')
+
+    # Проверка по данным из токена доступа без запроса в БД
+    # (токены, выданные до включения AUTH_STATELESS, не содержат этих данных и проверяются по БД)
+    if settings.AUTH_STATELESS and 'verified' in claims:
+        if not claims['verified']:
+            raise NotVerified('У вас не подтвержденная запись')
+
+        return user_id
+
+    # Данные пользователя из кэша (запрос в БД только при промахе)
+    user = await UserService.get_cached(user_id=user_id)
 
     if not user:
         raise UserNotFound('Пользователь больше не существует')
@@ -0,0 +1,89 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict
+
+import orjson
+from fastapi import Request, Response, status
+
+from src.utils.response import json_default
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Строгий ETag по версии ресурса (например, id и дата обновления)
+    :param parts: части версии
+    :return: значение заголовка ETag
+    """
+    version = '|'.join(str(part) for part in parts)
+
+    return f'"{hashlib.sha1(version.encode("utf-8")).hexdigest()}"'
+
+
+def content_etag(content: Any) -> str:
+    """
+    Строгий ETag по содержимому ответа
+    :param content: подготовленные сериализаторами данные ответа
+    :return: значение заголовка ETag
+    """
+    data = orjson.dumps(
+        content, default=json_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS
+    )
+
+    return f'"{hashlib.sha1(data).hexdigest()}"'
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None) -> Dict[str, str]:
+    """
+    Заголовки для условных запросов
+    :param etag: значение ETag
+    :param last_modified: дата последнего изменения ресурса (UTC)
+    :return: словарь с заголовками ETag и Last-Modified
+    """
+    headers = {'ETag': etag}
+
+    if last_modified:
+        headers['Last-Modified'] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """
+    Проверка, что у клиента актуальная версия ресурса (If-None-Match имеет приоритет над If-Modified-Since)
+    :param request: объект запроса
+    :param etag: текущий ETag ресурса
+    :param last_modified: дата последнего изменения ресурса (UTC)
+    :return: True - можно ответить 304
+    """
+    if_none_match = request.headers.get('if-none-match')
+
+    if if_none_match:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+
+        return '*' in tags or etag in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+
+        except (TypeError, ValueError):
+            return False
+
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        # Заголовок передает время с точностью до секунды
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+    return False
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """
+    Ответ 304 без тела
+    :param headers: заголовки ETag / Last-Modified
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from src.utils.exeptions import InvalidCursor
+
+
+def encode_cursor(post: Dict) -> str:
+    """
+    Формирование курсора для следующей страницы по последнему посту текущей страницы
+    :param post: сериализованный пост (словарь с полями id и updated_at)
+    :return: непрозрачная строка курсора
+    """
+    payload = {
+        'u': post['updated_at'].isoformat(),
+        'i': str(post['id']),
+    }
+    data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def next_page_cursor(posts: List[Dict], limit: int) -> Optional[str]:
+    """
+    Курсор следующей страницы
+    :param posts: посты текущей страницы из БД (до исключения постов удаленных авторов,
+    иначе неполная страница будет принята за последнюю)
+    :param limit: кол-во записей на странице
+    :return: строка курсора либо None, если страница последняя
+    """
+    if posts and len(posts) == limit:
+        return encode_cursor({'id': posts[-1]['_id'], 'updated_at': posts[-1]['updated_at']})
+
+    return None
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Разбор курсора, полученного от клиента
+    :param cursor: строка курсора
+    :return: дата обновления и id последнего поста предыдущей страницы
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+
+        return datetime.fromisoformat(payload['u']), ObjectId(payload['i'])
+
+    except Exception:
+        raise InvalidCursor(f'Невалидный курсор: {cursor}')
+
+
+def cursor_filter(cursor: str) -> Dict:
+    """
+    Условие выборки постов, идущих после курсора при сортировке (updated_at, _id) по убыванию
+    :param cursor: строка курсора
+    :return: словарь с условием для $match / find
+    """
+    updated_at, post_id = decode_cursor(cursor)
+
+    return {
+        '$or': [
+            {'updated_at': {'$lt': updated_at}},
+            {'updated_at': updated_at, '_id': {'$lt': post_id}},
+        ]
+    }
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from src.utils.exeptions import ExecutorOverloaded
+
+
+class BoundedExecutor:
+    """
+    Пул потоков для выполнения ресурсоемких синхронных функций вне цикла событий.
+    Задачи сверх числа потоков ожидают в очереди ограниченного размера,
+    при заполненной очереди новые задачи отклоняются
+    """
+
+    def __init__(self, workers: int, queue_size: int, name: str):
+        """
+        :param workers: кол-во потоков
+        :param queue_size: макс. кол-во задач, ожидающих свободный поток
+        :param name: название пула (префикс имен потоков)
+        """
+        self.name = name
+        self.limit = workers + queue_size
+        self.pending = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+        self.__executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Выполнение функции в пуле потоков
+        :param func: синхронная функция
+        :param args: аргументы функции
+        :return: результат функции
+        :raise ExecutorOverloaded: если все потоки заняты и очередь заполнена
+        """
+        if self.pending >= self.limit:
+            self.rejected += 1
+            raise ExecutorOverloaded(f'Пул {self.name} перегружен')
+
+        self.pending += 1
+        self.admitted += 1
+        queued_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            result = func(*args)
+
+            return result, started_at, time.perf_counter()
+
+        try:
+            result, started_at, finished_at = await asyncio.get_running_loop().run_in_executor(self.__executor, job)
+
+        finally:
+            self.pending -= 1
+
+        wait_seconds = started_at - queued_at
+        run_seconds = finished_at - started_at
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+        self.run_seconds_total += run_seconds
+        self.run_seconds_max = max(self.run_seconds_max, run_seconds)
+
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Статистика пула: кол-во принятых, отклоненных и выполняемых задач,
+        суммарное и максимальное время ожидания в очереди и выполнения (сек)
+        """
+        return {
+            'pending': self.pending,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'wait_seconds_total': self.wait_seconds_total,
+            'wait_seconds_max': self.wait_seconds_max,
+            'run_seconds_total': self.run_seconds_total,
+            'run_seconds_max': self.run_seconds_max,
+        }
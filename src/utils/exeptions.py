@@ -3,4 +3,25 @@ class NotVerified(Exception):
     pass
 
 class UserNotFound(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class InvalidCursor(Exception):
+    pass
+
+class MissingIndexes(Exception):
+    pass
+
+class ExecutorOverloaded(Exception):
+    pass
+
+class UserAlreadyExists(Exception):
+    pass
+
+class InvalidExportToken(Exception):
+    pass
+
+class TooManyAttempts(Exception):
+
+    def __init__(self, retry_after: float):
+        super().__init__('Слишком много попыток, повторите позже')
+        self.retry_after = retry_after
@@ -0,0 +1,198 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from src.config import settings
+from src.utils.exeptions import ExecutorOverloaded
+
+
+# Запросы, которые не ограничиваются (проверки состояния должны отвечать и при перегрузке)
+_EXEMPT_PATHS = {'/healthz', '/readyz', '/metrics'}
+_AUTH_PREFIX = '/api/v1/auth/'
+_EXPORT_PATHS = {'/api/v1/posts/export'}
+_READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class ConcurrencyLimiter:
+    """
+    Ограничение кол-ва одновременно обрабатываемых запросов. Запросы сверх лимита ожидают
+    в очереди ограниченного размера (по порядку поступления) не дольше timeout секунд,
+    при заполненной очереди либо истечении ожидания запрос отклоняется
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float):
+        """
+        :param name: название группы запросов
+        :param limit: макс. кол-во одновременно обрабатываемых запросов
+        :param queue_size: макс. кол-во запросов, ожидающих обработки
+        :param timeout: макс. время ожидания в очереди (сек)
+        """
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.__waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        """
+        Занятие места для обработки запроса (освобождается вызовом release)
+        :raise ExecutorOverloaded: если очередь заполнена либо время ожидания истекло
+        """
+        if self.active < self.limit and not self.__waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if len(self.__waiters) >= self.queue_size:
+            self.rejected_queue_full += 1
+            raise ExecutorOverloaded(f'Очередь запросов {self.name} заполнена')
+
+        future = asyncio.get_running_loop().create_future()
+        self.__waiters.append(future)
+        queued_at = time.perf_counter()
+
+        try:
+            # Место передается освободившим его запросом (release), счетчик active не меняется
+            await asyncio.wait_for(future, timeout=self.timeout)
+
+        except asyncio.TimeoutError:
+            self.__discard(future)
+            self.rejected_timeout += 1
+            raise ExecutorOverloaded(f'Истекло время ожидания в очереди запросов {self.name}')
+
+        except asyncio.CancelledError:
+            # Клиент отключился: место, переданное одновременно с отменой, возвращается следующему запросу
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self.__discard(future)
+
+            raise
+
+        wait_seconds = time.perf_counter() - queued_at
+        self.admitted += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def release(self) -> None:
+        """
+        Освобождение места: передается первому ожидающему запросу либо возвращается в лимит
+        """
+        while self.__waiters:
+            future = self.__waiters.popleft()
+
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self.active -= 1
+
+    def __discard(self, future: asyncio.Future) -> None:
+        if future in self.__waiters:
+            self.__waiters.remove(future)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Статистика группы: кол-во обрабатываемых и ожидающих запросов, принятых и отклоненных запросов,
+        суммарное и максимальное время ожидания в очереди (сек)
+        """
+        return {
+            'active': self.active,
+            'queued': len(self.__waiters),
+            'admitted': self.admitted,
+            'rejected_queue_full': self.rejected_queue_full,
+            'rejected_timeout': self.rejected_timeout,
+            'wait_seconds_total': self.wait_seconds_total,
+            'wait_seconds_max': self.wait_seconds_max,
+        }
+
+
+# Отдельные лимиты для чтения, записи, авторизации и выгрузки процесса (одного worker)
+request_limiters = {
+    'read': ConcurrencyLimiter(
+        name='read',
+        limit=settings.LIMIT_READ_CONCURRENCY,
+        queue_size=settings.LIMIT_READ_QUEUE_SIZE,
+        timeout=settings.LIMIT_QUEUE_TIMEOUT_MS / 1000
+    ),
+    'write': ConcurrencyLimiter(
+        name='write',
+        limit=settings.LIMIT_WRITE_CONCURRENCY,
+        queue_size=settings.LIMIT_WRITE_QUEUE_SIZE,
+        timeout=settings.LIMIT_QUEUE_TIMEOUT_MS / 1000
+    ),
+    'auth': ConcurrencyLimiter(
+        name='auth',
+        limit=settings.LIMIT_AUTH_CONCURRENCY,
+        queue_size=settings.LIMIT_AUTH_QUEUE_SIZE,
+        timeout=settings.LIMIT_QUEUE_TIMEOUT_MS / 1000
+    ),
+    'export': ConcurrencyLimiter(
+        name='export',
+        limit=settings.LIMIT_EXPORT_CONCURRENCY,
+        queue_size=settings.LIMIT_EXPORT_QUEUE_SIZE,
+        timeout=settings.LIMIT_QUEUE_TIMEOUT_MS / 1000
+    ),
+}
+
+
+def request_group(method: str, path: str) -> str:
+    """
+    Группа запроса для выбора лимита
+    :param method: метод HTTP
+    :param path: путь запроса
+    :return: auth, export, read либо write
+    """
+    if path.startswith(_AUTH_PREFIX):
+        return 'auth'
+
+    # Выгрузка занимает место на все время передачи ответа, поэтому не расходует лимит чтения
+    if path in _EXPORT_PATHS:
+        return 'export'
+
+    return 'read' if method in _READ_METHODS else 'write'
+
+
+class LoadSheddingMiddleware:
+    """
+    ASGI middleware: ограничение кол-ва одновременно обрабатываемых запросов по группам (чтение, запись, авторизация).
+    При перегрузке запросы быстро получают ответ 503 с Retry-After, а не ожидают до истечения таймаутов БД
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not settings.LOAD_SHEDDING_ENABLED or scope['path'] in _EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = request_limiters[request_group(method=scope['method'], path=scope['path'])]
+
+        try:
+            await limiter.acquire()
+
+        except ExecutorOverloaded:
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={'detail': 'Сервер перегружен, повторите попытку позже'},
+                headers={'Retry-After': str(settings.LIMIT_RETRY_AFTER)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+
+        finally:
+            limiter.release()
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Set
+
+from loguru import logger
+
+
+# Ссылки на выполняемые загрузки пачек (задача без ссылки может быть удалена сборщиком мусора до завершения)
+_dispatch_tasks: Set[asyncio.Task] = set()
+
+
+def _dispatch_done(task: asyncio.Task) -> None:
+    _dispatch_tasks.discard(task)
+
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f'Ошибка загрузки пачки: {task.exception()!r}')
+
+
+class BatchLoader:
+    """
+    Загрузка объектов по ключам пачками (по аналогии с DataLoader): ключи, запрошенные в течение одной итерации
+    цикла событий, загружаются одним запросом, повторный запрос ключа возвращает уже загруженный объект.
+    Экземпляр создается на время обработки одного запроса, поэтому результаты не устаревают
+    """
+
+    def __init__(self, batch_load: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]):
+        """
+        :param batch_load: функция загрузки пачки: список ключей -> словарь {ключ: объект} (нет ключа - нет объекта)
+        """
+        self.__batch_load = batch_load
+        self.__memo: Dict[Hashable, asyncio.Future] = {}
+        self.__queue: List[Hashable] = []
+        self.batches = 0
+
+    def load(self, key: Hashable) -> Awaitable[Any]:
+        """
+        Запрос объекта по ключу
+        :param key: ключ
+        :return: ожидаемый результат (объект либо None, если объект не найден)
+        """
+        future = self.__memo.get(key)
+
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self.__memo[key] = future
+
+            # Первый ключ новой пачки: загрузка выполняется после того, как все ожидающие задачи запросят свои ключи
+            if not self.__queue:
+                loop.call_soon(self.__schedule)
+
+            self.__queue.append(key)
+
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        """
+        Запрос объектов по списку ключей (одинаковые ключи загружаются один раз)
+        :param keys: ключи
+        :return: список объектов в порядке ключей (None для не найденных)
+        """
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def __schedule(self) -> None:
+        task = asyncio.ensure_future(self.__dispatch())
+        _dispatch_tasks.add(task)
+        task.add_done_callback(_dispatch_done)
+
+    async def __dispatch(self) -> None:
+        """
+        Загрузка накопленной пачки ключей
+        """
+        keys, self.__queue = self.__queue, []
+        self.batches += 1
+
+        try:
+            objects = await self.__batch_load(keys)
+
+        except Exception as exc:
+            # Ошибка загрузки не запоминается: следующий запрос ключа повторит загрузку
+            for key in keys:
+                future = self.__memo.pop(key)
+
+                if not future.done():
+                    future.set_exception(exc)
+
+            return
+
+        for key in keys:
+            future = self.__memo[key]
+
+            # Ожидание ключа отменено (например, клиент отключился): следующий запрос ключа загрузит его заново
+            if future.cancelled():
+                del self.__memo[key]
+            else:
+                future.set_result(objects.get(key))
@@ -0,0 +1,334 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import suppress
+from typing import Dict, Iterable, List, Tuple
+
+from loguru import logger
+from starlette.routing import Match
+
+
+# Границы интервалов гистограмм времени (сек)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    Метрики процесса: счетчики, текущие значения и гистограммы с метками.
+    Обновляются из цикла событий и из потоков драйвера MongoDB, поэтому изменения выполняются под блокировкой
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__meta: Dict[str, Tuple[str, str]] = {}
+        self.__counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self.__gauges: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self.__histograms: Dict[str, Dict[Labels, List[float]]] = defaultdict(dict)
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        """
+        Описание метрики для вывода
+        :param name: название метрики
+        :param kind: тип (counter, gauge, histogram)
+        :param help_text: описание
+        """
+        self.__meta[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1) -> None:
+        """
+        Увеличение счетчика
+        """
+        with self.__lock:
+            self.__counters[name][_labels(labels)] += value
+
+    def set_total(self, name: str, labels: Dict[str, str], value: float) -> None:
+        """
+        Установка счетчика по итогу, накопленному компонентом процесса (например, кол-во попаданий в кэш).
+        Итог в пределах процесса не уменьшается, поэтому выводится как counter и суммируется по процессам
+        с сохранением значений завершившихся процессов
+        """
+        with self.__lock:
+            self.__counters[name][_labels(labels)] = value
+
+    def add(self, name: str, labels: Dict[str, str], value: float) -> None:
+        """
+        Изменение текущего значения на value (например, кол-во выполняемых запросов)
+        """
+        with self.__lock:
+            self.__gauges[name][_labels(labels)] += value
+
+    def set(self, name: str, labels: Dict[str, str], value: float) -> None:
+        """
+        Установка текущего значения
+        """
+        with self.__lock:
+            self.__gauges[name][_labels(labels)] = value
+
+    def observe(self, name: str, labels: Dict[str, str], value: float) -> None:
+        """
+        Добавление значения в гистограмму (интервалы LATENCY_BUCKETS)
+        """
+        key = _labels(labels)
+
+        with self.__lock:
+            # Кол-во значений в каждом интервале, затем сумма и общее кол-во значений
+            histogram = self.__histograms[name].get(key)
+
+            if histogram is None:
+                histogram = self.__histograms[name][key] = [0] * (len(LATENCY_BUCKETS) + 2)
+
+            index = bisect.bisect_left(LATENCY_BUCKETS, value)
+
+            if index < len(LATENCY_BUCKETS):
+                histogram[index] += 1
+
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self) -> Dict:
+        """
+        Снимок метрик процесса для записи в файл и объединения с метриками других процессов
+        """
+        with self.__lock:
+            return {
+                'meta': dict(self.__meta),
+                'counters': {name: [[list(key), value] for key, value in data.items()]
+                             for name, data in self.__counters.items()},
+                'gauges': {name: [[list(key), value] for key, value in data.items()]
+                           for name, data in self.__gauges.items()},
+                'histograms': {name: [[list(key), list(value)] for key, value in data.items()]
+                               for name, data in self.__histograms.items()},
+            }
+
+
+def merge_snapshots(snapshots: Iterable[Dict]) -> Dict:
+    """
+    Объединение снимков нескольких процессов: значения с одинаковыми названиями и метками суммируются
+    """
+    merged = {'meta': {}, 'counters': {}, 'gauges': {}, 'histograms': {}}
+
+    for snapshot in snapshots:
+        merged['meta'].update(snapshot['meta'])
+
+        for kind in ('counters', 'gauges'):
+            for name, items in snapshot[kind].items():
+                target = merged[kind].setdefault(name, {})
+
+                for key, value in items:
+                    key = tuple(tuple(pair) for pair in key)
+                    target[key] = target.get(key, 0) + value
+
+        for name, items in snapshot['histograms'].items():
+            target = merged['histograms'].setdefault(name, {})
+
+            for key, value in items:
+                key = tuple(tuple(pair) for pair in key)
+                current = target.get(key)
+                target[key] = value if current is None else [a + b for a, b in zip(current, value)]
+
+    return merged
+
+
+def _format_labels(key: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(key) + list(extra)
+
+    if not pairs:
+        return ''
+
+    escaped = (
+        '{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+
+    return '{' + ','.join(escaped) + '}'
+
+
+def render(merged: Dict) -> str:
+    """
+    Вывод объединенных метрик в текстовом формате Prometheus
+    """
+    lines = []
+
+    def header(name: str, default_kind: str) -> None:
+        kind, help_text = merged['meta'].get(name, (default_kind, name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    for kind, default_kind in (('counters', 'counter'), ('gauges', 'gauge')):
+        for name, data in sorted(merged[kind].items()):
+            header(name, default_kind)
+
+            for key, value in sorted(data.items()):
+                lines.append(f'{name}{_format_labels(key)} {value}')
+
+    for name, data in sorted(merged['histograms'].items()):
+        header(name, 'histogram')
+
+        for key, value in sorted(data.items()):
+            cumulative = 0
+
+            for bound, count in zip(LATENCY_BUCKETS, value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(key, (("le", str(bound)),))} {cumulative}')
+
+            lines.append(f'{name}_bucket{_format_labels(key, (("le", "+Inf"),))} {value[-1]}')
+            lines.append(f'{name}_sum{_format_labels(key)} {value[-2]}')
+            lines.append(f'{name}_count{_format_labels(key)} {value[-1]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class MultiprocessCollector:
+    """
+    Объединение метрик нескольких процессов (workers uvicorn) через общий каталог:
+    каждый процесс периодически записывает свой снимок в файл <pid главного процесса>-<pid>-<время запуска>.json,
+    вывод метрик объединяет все файлы. Счетчики и гистограммы завершившихся процессов сохраняются, их текущие
+    значения (gauges) не учитываются. Время запуска в названии файла не дает процессу с повторно выданным pid
+    перезаписать накопленные значения завершившегося процесса, а файлы предыдущих запусков приложения
+    (другого главного процесса) удаляются
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.__file_names: Dict[int, str] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def __file_name(self) -> str:
+        """
+        Файл снимка текущего процесса (pid определяется при записи: процесс мог быть создан через fork)
+        """
+        pid = os.getpid()
+
+        if pid not in self.__file_names:
+            self.__file_names[pid] = f'{os.getppid()}-{pid}-{time.time_ns()}.json'
+
+        return self.__file_names[pid]
+
+    def write(self, snapshot: Dict) -> None:
+        """
+        Атомарная запись снимка текущего процесса
+        """
+        path = os.path.join(self.directory, self.__file_name())
+        # Снимок может записываться одновременно из нескольких потоков (/metrics и периодическая запись)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+
+        with open(tmp_path, 'w') as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+
+        os.replace(tmp_path, path)
+
+    def collect(self) -> List[Dict]:
+        """
+        Снимки всех процессов текущего запуска приложения
+        """
+        snapshots = []
+        deploy = str(os.getppid())
+
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith('.json'):
+                continue
+
+            parts = file_name.removesuffix('.json').split('-')
+
+            # Снимок предыдущего запуска приложения
+            if len(parts) != 3 or parts[0] != deploy:
+                with suppress(OSError):
+                    os.remove(os.path.join(self.directory, file_name))
+
+                continue
+
+            try:
+                with open(os.path.join(self.directory, file_name)) as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+
+            except (OSError, ValueError) as exc:
+                logger.warning(f'Не удалось прочитать метрики {file_name}: {exc}')
+                continue
+
+            if not _is_alive(int(parts[1])):
+                snapshot['gauges'] = {}
+
+            snapshots.append(snapshot)
+
+        return snapshots
+
+
+def _is_alive(pid: int) -> bool:
+    """
+    Проверка, что процесс с таким pid работает
+    """
+    try:
+        os.kill(pid, 0)
+
+    except ProcessLookupError:
+        return False
+
+    except PermissionError:
+        return True
+
+    return True
+
+
+metrics = MetricsRegistry()
+
+metrics.describe('http_requests_total', 'counter', 'Кол-во обработанных запросов по маршрутам и кодам ответа')
+metrics.describe('http_request_duration_seconds', 'histogram', 'Время обработки запросов по маршрутам')
+metrics.describe('http_requests_in_flight', 'gauge', 'Кол-во запросов, обрабатываемых в данный момент')
+
+
+def route_template(scope) -> str:
+    """
+    Шаблон маршрута запроса (например, /api/v1/posts/{post_id}), чтобы кол-во меток не зависело от id в пути
+    """
+    for route in getattr(scope.get('app'), 'routes', ()):
+        match, _ = route.matches(scope)
+
+        if match == Match.FULL:
+            return route.path
+
+    return 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: время обработки, коды ответа и кол-во выполняемых запросов по шаблонам маршрутов
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] == '/metrics':
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+        labels = {'method': scope['method'], 'route': route_template(scope)}
+
+        metrics.add('http_requests_in_flight', labels, 1)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        finally:
+            metrics.add('http_requests_in_flight', labels, -1)
+            metrics.inc('http_requests_total', {**labels, 'status': status_code})
+            metrics.observe('http_request_duration_seconds', labels, time.perf_counter() - started_at)
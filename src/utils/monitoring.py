@@ -0,0 +1,116 @@
+import threading
+import time
+from typing import Dict, Tuple
+
+from pymongo import monitoring
+
+from src.utils.metrics import metrics
+
+
+metrics.describe('mongo_command_duration_seconds', 'histogram', 'Время выполнения команд MongoDB по коллекциям')
+metrics.describe('mongo_command_failures_total', 'counter', 'Кол-во команд MongoDB, завершившихся ошибкой')
+metrics.describe('mongo_pool_checkout_wait_seconds', 'histogram', 'Время ожидания соединения из пула')
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Состояние пула соединений с MongoDB по событиям драйвера
+    """
+
+    def __init__(self):
+        self.open = 0  # Открытые соединения
+        self.checked_out = 0  # Соединения, выданные для выполнения команд
+        self.check_out_failed = 0  # Неудачные попытки получить соединение (таймаут ожидания и др.)
+        self.cleared = 0  # Сбросы пула (например, при потере связи с сервером)
+        # Соединение запрашивается и выдается в одном потоке драйвера - время начала ожидания хранится в потоке
+        self.__checkout = threading.local()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_check_out_started(self, event):
+        self.__checkout.started_at = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self.check_out_failed += 1
+        self.__observe_wait()
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        self.__observe_wait()
+
+    def __observe_wait(self):
+        started_at = getattr(self.__checkout, 'started_at', None)
+
+        if started_at is not None:
+            metrics.observe('mongo_pool_checkout_wait_seconds', {}, time.perf_counter() - started_at)
+            self.__checkout.started_at = None
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Текущее состояние пула
+        """
+        return {
+            'open': self.open,
+            'checked_out': self.checked_out,
+            'available': self.open - self.checked_out,
+            'check_out_failed': self.check_out_failed,
+            'cleared': self.cleared,
+        }
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """
+    Время выполнения команд MongoDB по коллекциям и командам (события драйвера)
+    """
+
+    def __init__(self):
+        # Коллекция известна только из события начала команды: сохраняется до ее завершения
+        self.__started: Dict[Tuple, str] = {}
+
+    @staticmethod
+    def __key(event) -> Tuple:
+        return event.request_id, event.connection_id
+
+    def started(self, event):
+        # У getMore в поле команды id курсора, коллекция передается отдельно
+        collection = event.command.get(event.command_name)
+
+        if not isinstance(collection, str):
+            collection = event.command.get('collection', '')
+
+        self.__started[self.__key(event)] = collection
+
+    def succeeded(self, event):
+        self.__observe(event)
+
+    def failed(self, event):
+        labels = self.__observe(event)
+        metrics.inc('mongo_command_failures_total', labels)
+
+    def __observe(self, event) -> Dict[str, str]:
+        labels = {'collection': self.__started.pop(self.__key(event), ''), 'command': event.command_name}
+        metrics.observe('mongo_command_duration_seconds', labels, event.duration_micros / 1_000_000)
+
+        return labels
@@ -1,16 +1,26 @@
 from passlib.context import CryptContext
 
+from src.config import settings
+from src.utils.executor import BoundedExecutor
+
 
 pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 
+# Хэширование выполняется в отдельном пуле потоков, чтобы не блокировать цикл событий
+password_executor = BoundedExecutor(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    name='bcrypt'
+)
+
 async def hash_password(password: str) -> str:
     """
     Хэширование паролей в виде обычного текста
     """
-    return pwd_context.hash(password)
+    return await password_executor.run(pwd_context.hash, password)
 
 async def verify_password(password: str, hashed_password: str) -> bool:
     """
     Проверка пароля с его хэшем
     """
-    return pwd_context.verify(password, hashed_password)
+    return await password_executor.run(pwd_context.verify, password, hashed_password)
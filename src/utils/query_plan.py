@@ -0,0 +1,51 @@
+"""
+Проверка плана выполнения конвейера ленты постов (результата explain): объединение с users только для записей
+итоговой страницы, сортировка по индексу, отсутствие полного сканирования коллекции.
+Используется тестом tests/test_query_plan.py на локальном MongoDB
+"""
+from typing import Dict, Iterator, List
+
+
+def _walk(node) -> Iterator[Dict]:
+    """
+    Обход всех вложенных словарей результата explain
+    """
+    if isinstance(node, dict):
+        yield node
+
+        for value in node.values():
+            yield from _walk(value)
+
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+
+
+def plan_problems(explain: Dict, limit: int, sort_in_memory: bool = False) -> List[str]:
+    """
+    Поиск проблем в результате explain('executionStats') конвейера ленты
+    :param explain: результат explain
+    :param limit: кол-во записей на странице
+    :param sort_in_memory: сортировка в памяти допустима (по релевантности при полнотекстовом поиске
+    индекс не используется)
+    :return: список с описанием найденных проблем (пустой, если план корректен)
+    """
+    problems = []
+
+    for node in _walk(explain):
+        stage = str(node.get('stage', '')).upper()
+
+        if stage == 'COLLSCAN':
+            problems.append('Полное сканирование коллекции (COLLSCAN) вместо индекса')
+
+        if stage == 'SORT' and not sort_in_memory:
+            problems.append('Сортировка в памяти (SORT) вместо сортировки по индексу')
+
+        # $lookup в классическом движке либо EQ_LOOKUP при переносе объединения в слой запросов (SBE)
+        if '$lookup' in node or stage == 'EQ_LOOKUP':
+            returned = node.get('nReturned')
+
+            if returned is not None and returned > limit:
+                problems.append(f'Объединение с users выполнено для {returned} записей при limit={limit}')
+
+    return problems
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Any, Dict
+
+import orjson
+from bson import ObjectId
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from src.config import settings
+from src.schemas.mixin import DATETIME_FORMAT
+
+
+def json_default(value: Any) -> str:
+    """
+    Преобразование типов, которые orjson не сериализует сам (дата в формате схем ответа, ObjectId)
+    """
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+
+    if isinstance(value, ObjectId):
+        return str(value)
+
+    raise TypeError
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    Ответ с уже подготовленными сериализаторами данными: записывается через orjson
+    без повторной валидации схемой ответа (response_model)
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def fast_response(content: Dict, status_code: int = 200, headers: Dict[str, str] | None = None) -> Dict | Response:
+    """
+    Ответ для подготовленных сериализаторами данных: при FAST_JSON_RESPONSE данные записываются напрямую,
+    иначе возвращаются для валидации схемой ответа маршрута
+    :param content: данные ответа
+    :param status_code: код ответа
+    :param headers: заголовки ответа (при возврате данных для валидации их устанавливает маршрут)
+    """
+    if settings.FAST_JSON_RESPONSE:
+        return FastJSONResponse(content=content, status_code=status_code, headers=headers)
+
+    return content
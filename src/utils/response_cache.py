@@ -0,0 +1,158 @@
+import asyncio
+import importlib
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from loguru import logger
+
+from src.utils.cache import TTLCache
+
+
+class CacheBackend(ABC):
+    """
+    Хранилище кэша ответов. Для общего кэша нескольких процессов (например, Redis)
+    достаточно реализовать эти методы и указать путь к классу в FEED_CACHE_BACKEND
+    """
+
+    @abstractmethod
+    async def get(self, key: Hashable) -> Optional[Dict]:
+        """
+        Возврат записи по ключу либо None
+        """
+
+    @abstractmethod
+    async def set(self, key: Hashable, entry: Dict, ttl: float) -> None:
+        """
+        Сохранение записи на ttl секунд
+        """
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """
+        Удаление всех записей
+        """
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Хранилище кэша ответов в памяти процесса (по умолчанию)
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.__cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: Hashable) -> Optional[Dict]:
+        return self.__cache.get(key)
+
+    async def set(self, key: Hashable, entry: Dict, ttl: float) -> None:
+        self.__cache.set(key, entry)
+
+    async def clear(self) -> None:
+        self.__cache.clear()
+
+
+def load_backend(path: str | None, maxsize: int, ttl: float) -> CacheBackend:
+    """
+    Создание хранилища кэша
+    :param path: путь к классу хранилища вида "package.module.ClassName" (None - хранилище в памяти)
+    :param maxsize: макс. кол-во записей (для хранилища в памяти)
+    :param ttl: срок хранения записи (сек)
+    """
+    if not path:
+        return MemoryCacheBackend(maxsize=maxsize, ttl=ttl)
+
+    module_name, class_name = path.rsplit('.', 1)
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+
+    return backend_class()
+
+
+class ResponseCache:
+    """
+    Кэш подготовленных ответов с обновлением устаревших записей в фоне (stale-while-revalidate):
+    устаревшая запись отдается сразу, а обновление по ключу запускается только одно
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, stale_ttl: float):
+        """
+        :param backend: хранилище записей
+        :param ttl: срок, в течение которого запись актуальна (сек)
+        :param stale_ttl: срок после устаревания, в течение которого запись отдается с обновлением в фоне (сек)
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.__generation = 0  # Увеличивается при сбросе: результаты загрузок, начатых до сброса, не сохраняются
+        self.__refreshing: Set[Hashable] = set()
+        self.__tasks: Set[asyncio.Task] = set()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Возврат ответа из кэша либо загрузка и сохранение в кэш
+        :param key: ключ запроса
+        :param loader: функция загрузки ответа
+        :return: ответ
+        """
+        entry = await self.backend.get(key)
+
+        if entry:
+            if entry['fresh_until'] > time.time():
+                self.hits += 1
+                return entry['value']
+
+            self.stale_hits += 1
+
+            if key not in self.__refreshing:
+                self.__refreshing.add(key)
+                task = asyncio.create_task(self.__refresh(key=key, loader=loader))
+                self.__tasks.add(task)
+                task.add_done_callback(self.__tasks.discard)
+
+            return entry['value']
+
+        self.misses += 1
+
+        return await self.__load(key=key, loader=loader)
+
+    async def invalidate(self) -> None:
+        """
+        Сброс всех записей (при изменении данных)
+        """
+        self.__generation += 1
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Статистика: попадания в актуальные и устаревшие записи, промахи
+        """
+        return {'hits': self.hits, 'stale_hits': self.stale_hits, 'misses': self.misses}
+
+    async def __load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Загрузка ответа и сохранение в кэш (если за время загрузки кэш не сбрасывался)
+        """
+        generation = self.__generation
+        value = await loader()
+
+        if generation == self.__generation:
+            entry = {'value': value, 'fresh_until': time.time() + self.ttl}
+            await self.backend.set(key, entry, ttl=self.ttl + self.stale_ttl)
+
+        return value
+
+    async def __refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Обновление устаревшей записи в фоне
+        """
+        try:
+            await self.__load(key=key, loader=loader)
+
+        except Exception as exc:
+            logger.error(f'Не удалось обновить запись кэша {key}: {exc}')
+
+        finally:
+            self.__refreshing.discard(key)
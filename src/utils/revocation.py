@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Dict
+
+
+class RevocationList:
+    """
+    Список отозванных токенов (доступа и обновления) в памяти процесса.
+    Хранит только не истекшие идентификаторы токенов (jti), поэтому остается компактным
+    """
+
+    def __init__(self):
+        self.__tokens: Dict[str, datetime] = {}
+        self.refreshed_at: datetime | None = None
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        """
+        Добавление отозванного токена
+        :param jti: идентификатор токена
+        :param expires_at: дата истечения срока действия токена
+        """
+        self.__tokens[jti] = expires_at
+
+    def is_revoked(self, jti: str | None) -> bool:
+        """
+        Проверка, отозван ли токен
+        :param jti: идентификатор токена
+        :return: True - токен отозван
+        """
+        return jti is not None and jti in self.__tokens
+
+    def prune(self) -> None:
+        """
+        Удаление токенов с истекшим сроком действия (они и так не пройдут проверку подписи)
+        """
+        now = datetime.utcnow()
+        self.__tokens = {jti: expires_at for jti, expires_at in self.__tokens.items() if expires_at > now}
+
+    def __len__(self) -> int:
+        return len(self.__tokens)
+
+
+revocation_list = RevocationList()
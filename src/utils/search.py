@@ -0,0 +1,155 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.cursor import cursor_filter
+from src.utils.exeptions import InvalidCursor
+
+
+def is_text_search(search: str, substring: bool) -> bool:
+    """
+    Используется ли полнотекстовый поиск (по текстовому индексу с сортировкой по релевантности)
+    :param search: фраза для фильтрации
+    :param substring: флаг поиска по частичному совпадению
+    :return: True - полнотекстовый поиск, False - без поиска либо поиск по подстроке
+    """
+    return bool(search) and not substring
+
+
+def search_conditions(
+        search: str,
+        category: Optional[str] = None,
+        substring: bool = False
+) -> List[Dict]:
+    """
+    Условия фильтрации постов по фразе и категории
+    :param search: фраза для фильтрации
+    :param category: категория постов
+    :param substring: флаг поиска по частичному совпадению (без индекса, только по явному запросу)
+    :return: список условий для объединения через $and
+    """
+    conditions = []
+
+    if search:
+        if substring:
+            # Поиск по частичному совпадению в title или content (без учета регистра),
+            # спецсимволы регулярных выражений во фразе экранируются
+            pattern = re.escape(search)
+            conditions.append({"$or": [
+                {"title": {"$regex": pattern, "$options": "i"}},
+                {"content": {"$regex": pattern, "$options": "i"}},
+            ]})
+
+        else:
+            # Полнотекстовый поиск по текстовому индексу на title и content
+            conditions.append({"$text": {"$search": search}})
+
+    if category:
+        conditions.append({"category": category})
+
+    return conditions
+
+
+def search_sort(search: str, substring: bool) -> List[Tuple]:
+    """
+    Порядок сортировки постов: по релевантности при полнотекстовом поиске, затем по дате (сначала новые),
+    _id - для однозначного порядка при одинаковой дате
+    :param search: фраза для фильтрации
+    :param substring: флаг поиска по частичному совпадению
+    :return: список пар (поле, направление)
+    """
+    sort = [("updated_at", -1), ("_id", -1)]
+
+    if is_text_search(search=search, substring=substring):
+        sort.insert(0, ("score", {"$meta": "textScore"}))
+
+    return sort
+
+
+def list_filter(
+        search: str,
+        category: Optional[str] = None,
+        substring: bool = False,
+        cursor: Optional[str] = None,
+        conditions: Optional[List[Dict]] = None
+) -> Dict:
+    """
+    Условие выборки списка постов
+    :param search: фраза для фильтрации
+    :param category: категория постов
+    :param substring: флаг поиска по частичному совпадению
+    :param cursor: курсор последнего поста предыдущей страницы
+    :param conditions: дополнительные условия (например, фильтрация по автору)
+    :return: словарь с условием для $match / find
+    """
+    conditions = [
+        *(conditions or []),
+        *search_conditions(search=search, category=category, substring=substring)
+    ]
+
+    # Пагинация по курсору: только записи после последней записи предыдущей страницы
+    if cursor:
+        if is_text_search(search=search, substring=substring):
+            raise InvalidCursor('Курсор не поддерживается при полнотекстовом поиске, используйте page')
+
+        conditions.append(cursor_filter(cursor))
+
+    return {"$and": conditions} if conditions else {}
+
+
+def page_with_total_pipeline(
+        search: str,
+        limit: int,
+        page: int,
+        category: Optional[str] = None,
+        substring: bool = False,
+        cursor: Optional[str] = None,
+        conditions: Optional[List[Dict]] = None,
+        page_stages: Optional[List[Dict]] = None
+) -> List[Dict]:
+    """
+    Конвейер страницы постов с точным общим кол-вом постов по фильтру (без учета пагинации) в одном запросе.
+    Фильтрация и сортировка выполняются до $facet (по индексу), затем в одной ветке выбирается страница,
+    в другой - подсчитываются записи
+    :param search: фраза для фильтрации
+    :param limit: кол-во записей на странице
+    :param page: номер страницы (используется, если не передан курсор)
+    :param category: категория постов
+    :param substring: флаг поиска по частичному совпадению
+    :param cursor: курсор последнего поста предыдущей страницы
+    :param conditions: дополнительные условия (например, фильтрация по автору)
+    :param page_stages: стадии для записей страницы (например, объединение с users)
+    :return: список стадий конвейера, результат - документ {posts: [...], total: [{count: N}]}
+    """
+    page_pipeline = []
+
+    # Пагинация по курсору: подсчет выполняется по всему фильтру, поэтому условие курсора - только в ветке страницы
+    if cursor:
+        if is_text_search(search=search, substring=substring):
+            raise InvalidCursor('Курсор не поддерживается при полнотекстовом поиске, используйте page')
+
+        page_pipeline.append({'$match': cursor_filter(cursor)})
+
+    else:
+        page_pipeline.append({'$skip': (page - 1) * limit})
+
+    page_pipeline += [{'$limit': limit}, *(page_stages or [])]
+
+    return [
+        {'$match': list_filter(search=search, category=category, substring=substring, conditions=conditions)},
+        {'$sort': dict(search_sort(search=search, substring=substring))},
+        {'$facet': {'posts': page_pipeline, 'total': [{'$count': 'count'}]}},
+    ]
+
+
+def page_with_total(result: List[Dict]) -> Tuple[List[Dict], int]:
+    """
+    Записи страницы и общее кол-во из результата конвейера page_with_total_pipeline
+    :param result: результат конвейера (список из одного документа)
+    :return: список записей страницы и общее кол-во записей
+    """
+    if not result:
+        return [], 0
+
+    total = result[0]['total']
+
+    return result[0]['posts'], total[0]['count'] if total else 0
@@ -0,0 +1,75 @@
+import asyncio
+from collections import defaultdict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src.config import settings
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных запросов: пока запрос с таким же ключом выполняется,
+    последующие вызовы ожидают его результат, а не отправляют свой запрос в БД
+    """
+
+    def __init__(self):
+        self.__inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.coalesced: Dict[str, int] = defaultdict(int)
+
+    async def run(self, name: str, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнение запроса либо ожидание результата уже выполняющегося запроса с тем же ключом
+        :param name: название запроса (для статистики)
+        :param key: ключ запроса
+        :param func: функция запроса
+        :return: результат запроса (общий для всех объединенных вызовов, не должен изменяться)
+        """
+        self.calls[name] += 1
+        task = self.__inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self.__inflight[key] = task
+            task.add_done_callback(lambda _: self.__inflight.pop(key, None))
+
+        else:
+            self.coalesced[name] += 1
+
+        # Отмена одного из ожидающих (например, при разрыве соединения клиентом) не отменяет запрос для остальных
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Статистика по запросам: кол-во вызовов, объединенных вызовов и доля объединенных
+        """
+        return {
+            name: {
+                'calls': calls,
+                'coalesced': self.coalesced[name],
+                'ratio': self.coalesced[name] / calls if calls else 0.0,
+            }
+            for name, calls in self.calls.items()
+        }
+
+
+single_flight = SingleFlight()
+
+
+def coalesce(func: Callable) -> Callable:
+    """
+    Декоратор метода репозитория на чтение: одинаковые одновременные вызовы выполняют один запрос.
+    Используется под @classmethod, аргументы вызова должны быть хэшируемыми
+    """
+    name = func.__qualname__
+
+    @wraps(func)
+    async def wrapper(cls, *args, **kwargs):
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await func(cls, *args, **kwargs)
+
+        key = (name, args, tuple(sorted(kwargs.items())))
+
+        return await single_flight.run(name=name, key=key, func=lambda: func(cls, *args, **kwargs))
+
+    return wrapper
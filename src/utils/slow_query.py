@@ -0,0 +1,342 @@
+import asyncio
+import inspect
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import orjson
+from loguru import logger
+
+from src.config import settings
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+from src.utils.tracing import SPAN_KIND_CLIENT, child_span, start_span
+
+
+# Операции чтения, медленное выполнение которых записывается в лог
+TRACKED_OPERATIONS = {'find', 'find_one', 'aggregate', 'find_one_and_update'}
+
+# Методы курсора, возвращающие тот же курсор с измененными параметрами запроса
+_CURSOR_OPTIONS = {'sort', 'skip', 'limit', 'batch_size'}
+
+# План запроса с одинаковой формой запрашивается не чаще одного раза за интервал
+_explained_shapes = TTLCache(maxsize=1000, ttl=settings.SLOW_QUERY_EXPLAIN_INTERVAL)
+_explain_tasks: Set[asyncio.Task] = set()
+
+metrics.describe('mongo_slow_queries_total', 'counter', 'Кол-во медленных запросов к MongoDB из репозиториев')
+
+
+def query_shape(value: Any) -> Any:
+    """
+    Форма запроса: структура фильтра, конвейера или сортировки без конкретных значений
+    (одинаковые по структуре запросы с разными id и фразами имеют одну форму)
+    """
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        shapes = [query_shape(item) for item in value]
+
+        # Список значений (например, для $in) сворачивается в одно значение
+        return shapes if any(isinstance(item, (dict, list)) for item in shapes) else '?'
+
+    return '?'
+
+
+def _caller() -> str:
+    """
+    Функция репозитория, из которой выполнен запрос (ближайшая по стеку вызовов)
+    """
+    frame = sys._getframe(2)
+
+    while frame is not None:
+        if frame.f_globals.get('__name__', '').startswith('src.repositories'):
+            return f"{frame.f_globals['__name__']}.{frame.f_code.co_qualname}"
+
+        frame = frame.f_back
+
+    return 'unknown'
+
+
+def _explain_command(collection: str, operation: str, args: tuple, kwargs: Dict, options: Dict) -> Optional[Dict]:
+    """
+    Команда explain для отслеживаемой операции (None, если план для операции не запрашивается).
+    В режиме executionStats запрос выполняется полностью, поэтому план запроса без ограничения кол-ва
+    результатов (limit курсора, длина to_list либо $limit в конвейере) не запрашивается: для выгрузки
+    или перебора всей коллекции это было бы повторное сканирование коллекции
+    """
+    if operation == 'aggregate':
+        pipeline = args[0] if args else kwargs.get('pipeline', [])
+
+        # Конвейер с записью результата ($out, $merge) нельзя выполнить в режиме explain executionStats
+        if any('$out' in stage or '$merge' in stage for stage in pipeline):
+            return None
+
+        if not any('$limit' in stage for stage in pipeline):
+            # limit(0) у курсора означает отсутствие ограничения
+            if not options.get('limit'):
+                return None
+
+            pipeline = [*pipeline, {'$limit': options['limit']}]
+
+        return {'aggregate': collection, 'pipeline': pipeline, 'cursor': {}}
+
+    query = args[0] if args else kwargs.get('filter', {})
+
+    if operation == 'find_one_and_update':
+        update = args[1] if len(args) > 1 else kwargs.get('update')
+
+        # explain не изменяет данные
+        return {'findAndModify': collection, 'query': query, 'update': update}
+
+    command = {'find': collection, 'filter': query or {}}
+    projection = args[1] if len(args) > 1 else kwargs.get('projection')
+
+    if projection:
+        command['projection'] = projection
+
+    if operation == 'find_one':
+        command['limit'] = 1
+
+    for option in ('sort', 'skip', 'limit'):
+        if option in options:
+            command[option] = options[option]
+
+    if not command.get('limit'):
+        return None
+
+    return command
+
+
+def _plan_summary(explain: Dict) -> Dict:
+    """
+    Основные показатели плана: стадии, кол-во просмотренных ключей индекса и документов, кол-во результатов
+    """
+    stages = []
+    nodes = [explain]
+
+    while nodes:
+        node = nodes.pop()
+
+        if isinstance(node, dict):
+            if 'stage' in node:
+                stages.append(node['stage'])
+
+            nodes.extend(node.values())
+
+        elif isinstance(node, list):
+            nodes.extend(node)
+
+    stats = explain.get('executionStats') or {}
+
+    return {
+        'stages': sorted(set(stages)),
+        'keys_examined': stats.get('totalKeysExamined'),
+        'docs_examined': stats.get('totalDocsExamined'),
+        'returned': stats.get('nReturned'),
+    }
+
+
+async def _explain(db, command: Dict, shape: str, caller: str) -> None:
+    """
+    Запрос плана медленного запроса и запись его в лог (фоновая задача)
+    """
+    try:
+        explain = await db.command({'explain': command, 'verbosity': 'executionStats'})
+
+    except Exception as exc:
+        logger.debug(f'Не удалось получить план запроса {caller}: {exc}')
+        return
+
+    logger.warning(f'План медленного запроса {caller} {shape}: {_plan_summary(explain)}')
+
+
+def _report(
+        collection,
+        operation: str,
+        args: tuple,
+        kwargs: Dict,
+        options: Dict,
+        caller: str,
+        duration_ms: float
+) -> None:
+    """
+    Запись медленного запроса в лог и выборочный запрос его плана
+    """
+    shape = {'query': query_shape(args[0] if args else kwargs.get('filter', kwargs.get('pipeline', {})))}
+    shape.update({option: query_shape(value) for option, value in options.items() if option == 'sort'})
+    shape_text = orjson.dumps(shape, option=orjson.OPT_SORT_KEYS).decode()
+
+    metrics.inc('mongo_slow_queries_total', {'collection': collection.name, 'operation': operation})
+    logger.warning(
+        f'Медленный запрос {collection.name}.{operation} ({duration_ms:.1f} мс) из {caller}: {shape_text}'
+    )
+
+    key = (collection.name, operation, shape_text)
+
+    if random.random() >= settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE or _explained_shapes.get(key):
+        return
+
+    command = _explain_command(collection.name, operation, args, kwargs, options)
+
+    if command is None:
+        return
+
+    _explained_shapes.set(key, True)
+    task = asyncio.create_task(_explain(collection.database, command, shape_text, caller))
+    _explain_tasks.add(task)
+    task.add_done_callback(_explain_tasks.discard)
+
+
+def _sort_spec(key_or_list, direction: Optional[int] = None) -> Dict:
+    """
+    Сортировка курсора (поле и направление либо список пар) в виде документа команды
+    """
+    if isinstance(key_or_list, str):
+        return {key_or_list: direction or 1}
+
+    return dict(key_or_list)
+
+
+def _is_slow(operation: str, duration_ms: float) -> bool:
+    return (
+        operation in TRACKED_OPERATIONS
+        and settings.SLOW_QUERY_MS is not None
+        and duration_ms >= settings.SLOW_QUERY_MS
+    )
+
+
+class TimedCursor:
+    """
+    Курсор с измерением времени чтения результатов (запрос выполняется при чтении, а не при создании курсора)
+    """
+
+    def __init__(self, cursor, collection, operation: str, args: tuple, kwargs: Dict, caller: str):
+        self.__cursor = cursor
+        self.__collection = collection
+        self.__operation = operation
+        self.__args = args
+        self.__kwargs = kwargs
+        self.__caller = caller
+        self.__options: Dict[str, Any] = {}
+
+    def __getattr__(self, attr: str):
+        value = getattr(self.__cursor, attr)
+
+        if attr not in _CURSOR_OPTIONS:
+            return value
+
+        def option(*args, **kwargs):
+            self.__options[attr] = _sort_spec(*args) if attr == 'sort' else args[0]
+            self.__cursor = value(*args, **kwargs)
+
+            return self
+
+        return option
+
+    def __span(self):
+        return start_span(
+            f'mongo.{self.__operation}', kind=SPAN_KIND_CLIENT, **{'db.collection.name': self.__collection.name}
+        )
+
+    def __finished(self, started_at: float, length: Optional[int] = None) -> None:
+        """
+        Запись медленного чтения результатов
+        :param started_at: время начала чтения
+        :param length: кол-во прочитанных за вызов to_list записей (для ограничения explain, если у курсора нет limit)
+        """
+        duration_ms = (time.perf_counter() - started_at) * 1000
+
+        if _is_slow(self.__operation, duration_ms):
+            options = self.__options
+
+            if length and not options.get('limit'):
+                options = {**options, 'limit': length}
+
+            _report(
+                self.__collection,
+                self.__operation,
+                self.__args,
+                self.__kwargs,
+                options,
+                self.__caller,
+                duration_ms
+            )
+
+    async def to_list(self, *args, **kwargs) -> List:
+        started_at = time.perf_counter()
+        length = args[0] if args else kwargs.get('length')
+
+        try:
+            with self.__span():
+                return await self.__cursor.to_list(*args, **kwargs)
+
+        finally:
+            self.__finished(started_at, length)
+
+    async def __aiter__(self):
+        started_at = time.perf_counter()
+
+        # Спан не становится текущим: между yield выполняется код вызывающей стороны со своими спанами
+        span = child_span(
+            f'mongo.{self.__operation}', kind=SPAN_KIND_CLIENT, **{'db.collection.name': self.__collection.name}
+        )
+
+        try:
+            async for document in self.__cursor:
+                yield document
+
+        except Exception as exc:
+            if span is not None:
+                span.error = exc.__class__.__name__
+
+            raise
+
+        finally:
+            if span is not None:
+                span.finish()
+
+            self.__finished(started_at)
+
+
+def track(collection, operation: str, method: Callable) -> Callable:
+    """
+    Измерение времени выполнения операции коллекции: спан трассировки запроса
+    и запись в лог медленных операций чтения (TRACKED_OPERATIONS)
+    :param collection: коллекция Motor
+    :param operation: название операции
+    :param method: метод коллекции
+    :return: метод с измерением времени
+    """
+
+    def wrapper(*args, **kwargs):
+        # Функция репозитория определяется в момент вызова, пока она на вершине стека
+        caller = _caller() if operation in TRACKED_OPERATIONS and settings.SLOW_QUERY_MS is not None else ''
+        result = method(*args, **kwargs)
+
+        if operation in ('find', 'aggregate'):
+            return TimedCursor(result, collection, operation, args, kwargs, caller)
+
+        # Синхронные методы коллекции (не обращаются к БД) возвращаются без изменений
+        if not inspect.isawaitable(result):
+            return result
+
+        async def timed():
+            started_at = time.perf_counter()
+
+            try:
+                with start_span(
+                        f'mongo.{operation}', kind=SPAN_KIND_CLIENT, **{'db.collection.name': collection.name}
+                ):
+                    return await result
+
+            finally:
+                duration_ms = (time.perf_counter() - started_at) * 1000
+
+                if _is_slow(operation, duration_ms):
+                    _report(collection, operation, args, kwargs, {}, caller, duration_ms)
+
+        return timed()
+
+    return wrapper
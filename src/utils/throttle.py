@@ -0,0 +1,176 @@
+import importlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional
+
+from src.config import settings
+from src.utils.exeptions import TooManyAttempts
+
+
+class ThrottleStore(ABC):
+    """
+    Хранилище корзин токенов. Для общего ограничения нескольких процессов (например, Redis со скриптом Lua)
+    достаточно реализовать метод take атомарно и указать путь к классу в AUTH_THROTTLE_STORE
+    """
+
+    @abstractmethod
+    async def take(self, key: str, capacity: int, per_minute: float) -> float:
+        """
+        Списание одного токена из корзины
+        :param key: ключ корзины
+        :param capacity: емкость корзины (допустимый всплеск попыток)
+        :param per_minute: скорость пополнения корзины (токенов в минуту)
+        :return: 0 - токен списан, иначе - через сколько секунд появится токен
+        """
+
+
+class MemoryThrottleStore(ThrottleStore):
+    """
+    Хранилище корзин токенов в памяти процесса (по умолчанию). Кол-во корзин ограничено:
+    при переполнении вытесняется корзина, к которой дольше всего не обращались
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.__buckets: OrderedDict = OrderedDict()
+
+    async def take(self, key: str, capacity: int, per_minute: float) -> float:
+        now = time.monotonic()
+        rate = per_minute / 60
+        tokens, updated = self.__buckets.get(key, (capacity, now))
+
+        # Пополнение корзины за время, прошедшее с предыдущей попытки
+        tokens = min(capacity, tokens + (now - updated) * rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+
+        else:
+            retry_after = (1 - tokens) / rate if rate else 60.0
+
+        self.__buckets[key] = (tokens, now)
+        self.__buckets.move_to_end(key)
+
+        if len(self.__buckets) > self.maxsize:
+            self.__buckets.popitem(last=False)
+
+        return retry_after
+
+
+def load_store(path: str | None, maxsize: int) -> ThrottleStore:
+    """
+    Создание хранилища корзин токенов
+    :param path: путь к классу хранилища вида "package.module.ClassName" (None - хранилище в памяти)
+    :param maxsize: макс. кол-во корзин (для хранилища в памяти)
+    """
+    if not path:
+        return MemoryThrottleStore(maxsize=maxsize)
+
+    module_name, class_name = path.rsplit('.', 1)
+    store_class = getattr(importlib.import_module(module_name), class_name)
+
+    return store_class()
+
+
+class AuthThrottle:
+    """
+    Ограничение частоты попыток входа и регистрации по IP-адресу и по паре email и IP-адрес (корзина токенов).
+    Проверка выполняется до хэширования пароля, поэтому перебор паролей не занимает пул хэширования.
+    Корзина email привязана к IP-адресу: попытки с чужих адресов не блокируют вход владельцу email
+    """
+
+    def __init__(self, store: ThrottleStore):
+        self.store = store
+        self.admitted: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+
+    async def admit(self, action: str, ip: Optional[str], email: str) -> None:
+        """
+        Проверка попытки
+        :param action: действие (login, register)
+        :param ip: IP-адрес клиента
+        :param email: email из запроса
+        :raise TooManyAttempts: если попытки с этого IP-адреса либо для этого email с этого IP-адреса исчерпаны
+        """
+        if not settings.AUTH_THROTTLE_ENABLED:
+            return
+
+        ip = ip or 'unknown'
+        limits = (
+            ('ip', ip, settings.AUTH_THROTTLE_IP_CAPACITY, settings.AUTH_THROTTLE_IP_PER_MINUTE),
+            (
+                'email',
+                f'{email.lower()}:{ip}',
+                settings.AUTH_THROTTLE_EMAIL_CAPACITY,
+                settings.AUTH_THROTTLE_EMAIL_PER_MINUTE
+            ),
+        )
+
+        for scope, value, capacity, per_minute in limits:
+            retry_after = await self.store.take(
+                key=f'{action}:{scope}:{value}', capacity=capacity, per_minute=per_minute
+            )
+
+            if retry_after:
+                self.rejected[f'{action}:{scope}'] += 1
+                raise TooManyAttempts(retry_after=retry_after)
+
+        self.admitted[action] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Кол-во пропущенных попыток по действиям и отклоненных - по действиям и причине (ip, email)
+        """
+        return {'admitted': dict(self.admitted), 'rejected': dict(self.rejected)}
+
+
+auth_throttle = AuthThrottle(
+    store=load_store(path=settings.AUTH_THROTTLE_STORE, maxsize=settings.AUTH_THROTTLE_STORE_SIZE)
+)
+
+
+class UserThrottle:
+    """
+    Ограничение частоты дорогих запросов одного пользователя (например, выгрузки постов): корзина токенов по id
+    """
+
+    def __init__(self, store: ThrottleStore, action: str, capacity: int, per_minute: float):
+        self.store = store
+        self.action = action
+        self.capacity = capacity
+        self.per_minute = per_minute
+        self.admitted = 0
+        self.rejected = 0
+
+    async def admit(self, user_id: str) -> None:
+        """
+        Проверка запроса
+        :param user_id: id пользователя
+        :raise TooManyAttempts: если запросы пользователя исчерпаны
+        """
+        retry_after = await self.store.take(
+            key=f'{self.action}:user:{user_id}', capacity=self.capacity, per_minute=self.per_minute
+        )
+
+        if retry_after:
+            self.rejected += 1
+            raise TooManyAttempts(retry_after=retry_after)
+
+        self.admitted += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Кол-во пропущенных и отклоненных запросов
+        """
+        return {'admitted': self.admitted, 'rejected': self.rejected}
+
+
+# Корзины выгрузок хранятся в том же хранилище, что и корзины попыток входа (ключи не пересекаются)
+export_throttle = UserThrottle(
+    store=auth_throttle.store,
+    action='export',
+    capacity=settings.EXPORT_THROTTLE_CAPACITY,
+    per_minute=settings.EXPORT_THROTTLE_PER_MINUTE
+)
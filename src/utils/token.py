@@ -1,4 +1,5 @@
 from datetime import timedelta
+from typing import Dict
 
 from fastapi import Response
 from fastapi_jwt_auth import AuthJWT
@@ -18,12 +19,19 @@ class SetTokenUtils:
     __logged_in = 'logged_in'
 
     @classmethod
-    async def __create_access(cls, user_id: int, Authorize: AuthJWT):
+    async def __create_access(cls, user_id: int, Authorize: AuthJWT, claims: Dict | None = None):
         """
-        Создаем токен доступа (записываем id пользователя в токен)
+        Создаем токен доступа (записываем id пользователя в токен).
+        При AUTH_STATELESS в токен также записываются данные пользователя для проверки авторизации
+        без запроса в БД (verified, role)
         """
+        user_claims = claims if settings.AUTH_STATELESS and claims else {}
+
         access_token = Authorize.create_access_token(
-            subject=str(user_id), expires_time=timedelta(minutes=cls.__ACCESS_TOKEN_EXPIRES_IN))
+            subject=str(user_id),
+            expires_time=timedelta(minutes=cls.__ACCESS_TOKEN_EXPIRES_IN),
+            user_claims=user_claims
+        )
 
         return access_token
 
@@ -41,11 +49,11 @@ class SetTokenUtils:
         return refresh_token
 
     @classmethod
-    async def access(cls, response: Response, user_id: int, Authorize: AuthJWT):
+    async def access(cls, response: Response, user_id: int, Authorize: AuthJWT, claims: Dict | None = None):
         """
         Сохранение токена доступа в куки объекта запроса
         """
-        access_token = await cls.__create_access(user_id=user_id, Authorize=Authorize)
+        access_token = await cls.__create_access(user_id=user_id, Authorize=Authorize, claims=claims)
 
         response.set_cookie(
             cls.__access_token,
@@ -0,0 +1,363 @@
+import asyncio
+import importlib
+import inspect
+import os
+import pkgutil
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+from loguru import logger
+
+from src.config import settings
+from src.utils.metrics import route_template
+
+
+# Виды спанов в формате OTLP
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+_EXEMPT_PATHS = {'/healthz', '/readyz', '/metrics'}
+
+# Заголовок traceparent (W3C Trace Context): версия-id трассы-id спана-флаги
+_TRACEPARENT = re.compile(r'([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?')
+_TRUSTED_SOURCES = {
+    source.strip() for source in (settings.TRACE_TRUSTED_SOURCES or '').split(',') if source.strip()
+}
+
+
+class Span:
+    """
+    Спан трассировки: операция с временем начала и окончания внутри трассы запроса
+    """
+
+    def __init__(self, name: str, kind: int, trace_id: str, parent: Optional['Span'], spans: List['Span']):
+        """
+        :param name: название операции
+        :param kind: вид спана (SPAN_KIND_*)
+        :param trace_id: id трассы
+        :param parent: родительский спан (None - корневой спан запроса)
+        :param spans: завершенные спаны трассы (общий список для всех спанов трассы)
+        """
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.spans = spans
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.remote_parent_id: Optional[str] = None  # Спан вызывающей стороны (из заголовка traceparent)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def child(self, name: str, kind: int = SPAN_KIND_INTERNAL) -> 'Span':
+        return Span(name=name, kind=kind, trace_id=self.trace_id, parent=self, spans=self.spans)
+
+    def finish(self) -> None:
+        self.end_ns = time.time_ns()
+        self.spans.append(self)
+
+    def to_otlp(self) -> Dict:
+        """
+        Спан в формате OTLP/JSON
+        """
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [
+                {'key': key, 'value': {'stringValue': str(value)}} for key, value in self.attributes.items()
+            ],
+            'status': {'code': _STATUS_ERROR, 'message': self.error} if self.error else {'code': _STATUS_OK},
+        }
+
+        if self.parent is not None:
+            span['parentSpanId'] = self.parent.span_id
+
+        elif self.remote_parent_id:
+            span['parentSpanId'] = self.remote_parent_id
+
+        return span
+
+
+# Текущий спан (у каждого запроса и созданных им задач свой контекст)
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+def child_span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes) -> Optional[Span]:
+    """
+    Спан операции внутри трассы текущего запроса без установки его текущим (для операций, между частями
+    которых выполняется код вызывающей стороны, например, чтение курсора через async for).
+    Вне выбранной для записи трассы спан не создается; спан завершается вызовом finish()
+    :param name: название операции
+    :param kind: вид спана
+    :param attributes: атрибуты спана
+    """
+    parent = _current_span.get()
+
+    if parent is None:
+        return None
+
+    span = parent.child(name=name, kind=kind)
+    span.attributes.update(attributes)
+
+    return span
+
+
+@contextmanager
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Спан операции внутри трассы текущего запроса. Вне выбранной для записи трассы спан не создается
+    :param name: название операции
+    :param kind: вид спана
+    :param attributes: атрибуты спана
+    """
+    span = child_span(name, kind, **attributes)
+
+    if span is None:
+        yield None
+        return
+
+    token = _current_span.set(span)
+
+    try:
+        yield span
+
+    except BaseException as exc:
+        span.error = exc.__class__.__name__
+        raise
+
+    finally:
+        _current_span.reset(token)
+        span.finish()
+
+
+def traced(name: str) -> Callable:
+    """
+    Декоратор: выполнение функции (синхронной или асинхронной) в спане
+    :param name: название спана
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+
+                with start_span(name):
+                    return await func(*args, **kwargs)
+
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return func(*args, **kwargs)
+
+                with start_span(name):
+                    return func(*args, **kwargs)
+
+        wrapper.__traced__ = True
+
+        return wrapper
+
+    return decorator
+
+
+class FileExporter:
+    """
+    Запись трасс в файл: одна строка - одна трасса в формате OTLP/JSON (ExportTraceServiceRequest).
+    Запись выполняется в пуле потоков, чтобы не блокировать цикл событий
+    """
+
+    def __init__(self, path: str, service_name: str):
+        self.path = path
+        self.service_name = service_name
+        self.exported = 0
+
+    def __write(self, line: bytes) -> None:
+        with open(self.path, 'ab') as trace_file:
+            trace_file.write(line)
+
+    async def export(self, spans: List[Span]) -> None:
+        payload = {
+            'resourceSpans': [{
+                'resource': {
+                    'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service_name}}],
+                },
+                'scopeSpans': [{
+                    'scope': {'name': __name__},
+                    'spans': [span.to_otlp() for span in spans],
+                }],
+            }],
+        }
+        line = orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE)
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.__write, line)
+            self.exported += 1
+
+        except OSError as exc:
+            logger.error(f'Не удалось записать трассу: {exc}')
+
+
+exporter = FileExporter(path=settings.TRACE_EXPORT_PATH, service_name=settings.TRACE_SERVICE_NAME)
+
+
+def _parse_traceparent(headers: List) -> Tuple[Optional[str], Optional[str], bool]:
+    """
+    id трассы и спана вызывающей стороны и флаг sampled из заголовка traceparent (W3C Trace Context).
+    Для отсутствующего или некорректного заголовка - (None, None, False)
+    """
+    for name, value in headers:
+        if name != b'traceparent':
+            continue
+
+        match = _TRACEPARENT.fullmatch(value.decode('latin-1').strip())
+
+        if match is None:
+            return None, None, False
+
+        version, trace_id, parent_id, flags, rest = match.groups()
+
+        # Версия ff недопустима, у версии 00 нет дополнительных полей; нулевые id недопустимы
+        if version == 'ff' or (version == '00' and rest) or trace_id == '0' * 32 or parent_id == '0' * 16:
+            return None, None, False
+
+        return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+    return None, None, False
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: корневой спан запроса. Для записи выбирается доля запросов TRACE_SAMPLE_RATE
+    (и запросы с флагом sampled от внутренних сервисов TRACE_TRUSTED_SOURCES), остальные запросы
+    обрабатываются без спанов. Заголовок traceparent задает трассу и родительский спан записываемого запроса
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] in _EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, remote_parent_id, sampled = _parse_traceparent(scope.get('headers', []))
+        client = scope.get('client')
+        trusted = sampled and client is not None and client[0] in _TRUSTED_SOURCES
+
+        # Флаг sampled от внешних клиентов не учитывается: иначе любой клиент мог бы включить запись всех своих запросов
+        if not trusted and random.random() >= settings.TRACE_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        if trace_id is None:
+            trace_id = os.urandom(16).hex()
+
+        spans: List[Span] = []
+        span = Span(
+            name=f"{scope['method']} {route_template(scope)}",
+            kind=SPAN_KIND_SERVER,
+            trace_id=trace_id,
+            parent=None,
+            spans=spans
+        )
+        span.remote_parent_id = remote_parent_id
+        span.attributes.update({'http.method': scope['method'], 'http.target': scope['path']})
+        token = _current_span.set(span)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                span.attributes['http.status_code'] = message['status']
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        except BaseException as exc:
+            span.error = exc.__class__.__name__
+            raise
+
+        finally:
+            _current_span.reset(token)
+
+            span.finish()
+            await exporter.export(spans)
+
+
+def _instrument_class(cls: type) -> None:
+    """
+    Спаны для всех методов класса (@classmethod), кроме асинхронных генераторов
+    """
+    for attr, value in list(vars(cls).items()):
+        if not isinstance(value, classmethod):
+            continue
+
+        func = value.__func__
+
+        if getattr(func, '__traced__', False) or inspect.isasyncgenfunction(func):
+            continue
+
+        method_name = attr.removeprefix(f'_{cls.__name__}')
+        setattr(cls, attr, classmethod(traced(f'{cls.__name__}.{method_name}')(func)))
+
+
+def _instrument_dependant(dependant, name: str) -> None:
+    """
+    Спаны для обработчика маршрута и его асинхронных зависимостей (например, require_user)
+    """
+    call = dependant.call
+
+    if call is not None and inspect.iscoroutinefunction(call) and not getattr(call, '__traced__', False):
+        dependant.call = traced(name)(call)
+
+    for sub_dependant in dependant.dependencies:
+        _instrument_dependant(sub_dependant, name=getattr(sub_dependant.call, '__name__', 'dependency'))
+
+
+def instrument_app(app) -> None:
+    """
+    Подключение трассировки: спаны обработчиков маршрутов, проверки схемы ответа,
+    методов сервисов (*Service) и репозиториев (*Repository)
+    """
+    import fastapi.routing
+    from fastapi.routing import APIRoute
+
+    import src.repositories
+    import src.services
+
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            _instrument_dependant(route.dependant, name=f'route {route.path}')
+
+    # Проверка и сериализация ответа по схеме маршрута (response_model)
+    if not getattr(fastapi.routing.serialize_response, '__traced__', False):
+        fastapi.routing.serialize_response = traced('serialize_response')(fastapi.routing.serialize_response)
+
+    for package in (src.services, src.repositories):
+        for module_info in pkgutil.iter_modules(package.__path__):
+            module = importlib.import_module(f'{package.__name__}.{module_info.name}')
+
+            for value in vars(module).values():
+                if (
+                        inspect.isclass(value)
+                        and value.__module__ == module.__name__
+                        and value.__name__.endswith(('Service', 'Repository'))
+                ):
+                    _instrument_class(value)
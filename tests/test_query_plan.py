@@ -0,0 +1,133 @@
+"""
+Планы выполнения ленты постов (explain) на локальном MongoDB из DATABASE_URL: объединение с users выполняется
+только для записей итоговой страницы, сортировка - по индексу (кроме сортировки по релевантности
+при полнотекстовом поиске), коллекция не сканируется целиком.
+
+Используется временная БД с суффиксом "_explain", после проверки она удаляется.
+Если MongoDB недоступен, тесты пропускаются.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import pytest
+from pydantic import ValidationError
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+try:
+    from src.config import settings
+
+except ValidationError:
+    pytest.skip('Не заданы настройки приложения (.env)', allow_module_level=True)
+
+from src.indexes import INDEXES
+from src.repositories.post import PostRepository
+from src.utils.cursor import encode_cursor
+from src.utils.query_plan import plan_problems
+from src.utils.search import is_text_search
+
+
+_USERS_COUNT = 20
+_POSTS_COUNT = 500
+_LIMIT = 10
+
+# Параметры ленты (cursor=True - курсор на пост из середины ленты)
+_CASES = {
+    'первая страница': {'page': 1, 'search': ''},
+    'глубокая страница': {'page': _POSTS_COUNT // _LIMIT - 1, 'search': ''},
+    'страница по курсору': {'page': 1, 'search': '', 'cursor': True},
+    'полнотекстовый поиск': {'page': 2, 'search': 'content'},
+    'категория': {'page': 2, 'search': '', 'category': 'category 1'},
+    'категория по курсору': {'page': 1, 'search': '', 'category': 'category 1', 'cursor': True},
+    'поиск по подстроке': {'page': 2, 'search': 'content 1', 'substring': True},
+}
+
+
+def _seed(db) -> List[Dict]:
+    """
+    Заполнение временной БД пользователями и постами, создание индексов
+    :return: список постов, отсортированных как в ленте
+    """
+    now = datetime.utcnow().replace(microsecond=0)
+
+    users = [
+        {
+            'name': f'user {number}',
+            'email': f'user{number}@example.com',
+            'photo': None,
+            'role': 'user',
+            'verified': True,
+            'password': '',
+            'created_at': now,
+            'updated_at': now,
+        }
+        for number in range(_USERS_COUNT)
+    ]
+    user_ids = db.users.insert_many(users).inserted_ids
+
+    posts = [
+        {
+            'title': f'title {number}',
+            'content': f'content {number}',
+            'category': f'category {number % 5}',
+            'image': None,
+            'user': user_ids[number % _USERS_COUNT],
+            'created_at': now - timedelta(minutes=number),
+            'updated_at': now - timedelta(minutes=number),
+        }
+        for number in range(_POSTS_COUNT)
+    ]
+    db.posts.insert_many(posts)
+
+    for collection, indexes in INDEXES.items():
+        db[collection].create_indexes(indexes)
+
+    return sorted(posts, key=lambda post: (post['updated_at'], post['_id']), reverse=True)
+
+
+@pytest.fixture(scope='module')
+def feed_db():
+    """
+    Временная БД с постами и курсор на пост из середины ленты
+    """
+    client = MongoClient(settings.DATABASE_URL, serverSelectionTimeoutMS=2000)
+
+    try:
+        client.admin.command('ping')
+
+    except PyMongoError:
+        client.close()
+        pytest.skip(f'MongoDB недоступен: {settings.DATABASE_URL}')
+
+    db = client[f'{settings.MONGO_INITDB_DATABASE}_explain']
+    client.drop_database(db.name)
+
+    try:
+        posts = _seed(db)
+        middle = posts[_POSTS_COUNT // 2]
+
+        yield db, encode_cursor({'id': middle['_id'], 'updated_at': middle['updated_at']})
+
+    finally:
+        client.drop_database(db.name)
+        client.close()
+
+
+@pytest.mark.parametrize('params', list(_CASES.values()), ids=list(_CASES))
+def test_feed_plan(feed_db, params):
+    db, cursor = feed_db
+    params = {**params, 'cursor': cursor} if params.get('cursor') else params
+
+    pipeline = PostRepository.build_list_pipeline(limit=_LIMIT, **params)
+    explain = db.command(
+        {
+            'explain': {'aggregate': 'posts', 'pipeline': pipeline, 'cursor': {}},
+            'verbosity': 'executionStats',
+        }
+    )
+
+    assert plan_problems(
+        explain=explain,
+        limit=_LIMIT,
+        sort_in_memory=is_text_search(search=params['search'], substring=params.get('substring', False))
+    ) == []